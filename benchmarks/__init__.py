@@ -0,0 +1,4 @@
+"""
+Benchmarks of the parser, run from the root of a checkout as modules, e.g.
+python -m benchmarks.run (see the README).
+"""
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Cost of the sequence statistics (base composition, GC skew and k-mer
+counts) computed while parsing the ORIGIN section.
+
+A synthetic bacterial chromosome (see synthetic.py) is parsed with the
+default ORIGIN parser, with the statistics computed afterwards from the
+parsed sequence and with a SequenceStatsParser (keeping the sequence or
+not). The throughput is given in bp of the genome per second.
+
+Usage:
+    python -m benchmarks.bench_composition [--length 5000000] [--k 4] \\
+        [--window 10000] [--repeat 5]
+"""
+from __future__ import print_function, division
+import argparse
+import timeit
+from gbparse import Parser
+from gbparse import composition
+from gbparse.content_parsers.composition_parsers import SequenceStatsParser
+from benchmarks.synthetic import Generator
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--length', type=int, default=5000000)
+    arg_parser.add_argument('--k', type=int, default=4)
+    arg_parser.add_argument('--window', type=int, default=10000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    data = Generator(
+            length=args.length, feature_density=0.
+            ).record('REF0001').encode('utf-8')
+    default_parser = Parser()
+
+    def afterwards():
+        for genome in default_parser.iter_parse_buffer(data):
+            sequence = genome['content']['sequence']
+            composition.SequenceStats(args.k).update(sequence)
+            composition.gc_skew(sequence, args.window)
+
+    variants = [
+            ('parse only', lambda: list(
+                default_parser.iter_parse_buffer(data)
+                )),
+            ('afterwards', afterwards),
+            ]
+    for name, sequence in (('during parse', 'str'), ('stats only', None)):
+        stats_parser = Parser()
+        stats_parser.content_parser = dict(
+                stats_parser.content_parser,
+                origin={None: SequenceStatsParser(
+                    k=args.k, window=args.window, sequence=sequence
+                    )}
+                )
+        variants.append((name, lambda _p=stats_parser: list(
+            _p.iter_parse_buffer(data)
+            )))
+    print('{0} bp, k={1}, numpy: {2}'.format(
+        args.length, args.k, composition.np is not None
+        ))
+    for name, fct in variants:
+        best = min(timeit.repeat(fct, number=1, repeat=args.repeat))
+        print('{0:<14}{1:>10.1f} Mbp/s{2:>10.1f} ms'.format(
+            name, args.length / best / 1e6, best * 1e3
+            ))
+
+
+if __name__ == '__main__':
+    main()
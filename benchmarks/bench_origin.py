@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Throughput of the ORIGIN content parsers.
+
+Usage:
+    python -m benchmarks.bench_origin [--length 5000000] [--repeat 5]
+"""
+from __future__ import print_function, division
+import argparse
+import random
+import timeit
+from gbparse.content_parsers import default_parsers as dp
+
+
+def origin_reference(content_lines, genome_content):
+    """
+    The ORIGIN parser up to version 0.1-alpha, kept for comparison.
+    """
+    dp._assert_key(genome_content)
+    _content = ''.join(
+                    ' '.join(
+                        [' '.join(x.split(' ')[1:]) for x in content_lines]
+                    ).split(' ')
+                )
+    origin_dict = {'sequence': _content}
+    genome_content['content'].update(origin_dict)
+    return None
+
+
+def origin_lines(length, seed=0):
+    """
+    Content lines of an ORIGIN section as handed to the content parsers.
+    """
+    rng = random.Random(seed)
+    sequence = ''.join(rng.choice('acgt') for _ in range(length))
+    lines = ['ORIGIN']
+    for start in range(0, length, 60):
+        chunk = sequence[start:start + 60]
+        lines.append('{0} {1}'.format(
+            start + 1,
+            ' '.join(chunk[i:i + 10] for i in range(0, len(chunk), 10))
+            ))
+    return lines
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--length', type=int, default=5000000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    lines = origin_lines(args.length)
+    n_bytes = sum(len(_l) + 1 for _l in lines)
+    print('ORIGIN section of {0} bp ({1:.1f} MB)'.format(
+        args.length, n_bytes / 1e6
+        ))
+    for name, content_parser in (
+            ('reference', origin_reference),
+            ('origin', dp.origin),
+            ('origin_bytes', dp.origin_bytes),
+            ('origin_2bit', dp.origin_2bit),
+            ):
+        best = min(timeit.repeat(
+            lambda: content_parser(lines, {}),
+            number=1,
+            repeat=args.repeat
+            ))
+        print('{0:<14}{1:>10.1f} MB/s{2:>10.1f} ms'.format(
+            name, n_bytes / best / 1e6, best * 1e3
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Features per second of the qualifier tokenizer of the FEATURES subsections.
+
+The gene, CDS and RNA subsections of a densely annotated synthetic record
+(see synthetic.py) are tokenized from their content lines (tokenize) and from
+their raw bytes (tokenize_bytes, used for memory mapped files), compared to
+splitting the joined lines on '/' and '=' as done up to version 0.1-alpha
+(which breaks on values containing '/' or '=' and joins the lines of a value
+without spaces). Without a from_bytes parser, the content lines are decoded
+from the raw bytes first, which the 'reference (bytes)' row includes.
+
+Usage:
+    python -m benchmarks.bench_qualifiers [--length 1000000] [--density 3]
+"""
+from __future__ import print_function, division
+import argparse
+import timeit
+from gbparse import Parser
+from gbparse.content_parsers import SectionSpan
+from gbparse.content_parsers.qualifiers import tokenize, tokenize_bytes
+from benchmarks.synthetic import Generator
+
+
+def reference(content_lines):
+    """
+    The qualifier parsing up to version 0.1-alpha.
+    """
+    qualifiers = {}
+    for _line in ''.join(content_lines).split('/'):
+        if '=' in _line:
+            _key, _val = _line.split('=')
+            qualifiers[_key.lower()] = _val.replace('"', '').lower()
+        else:
+            qualifiers['bp_range'] = _line
+    return qualifiers
+
+
+class _Collector(object):
+    """
+    Content parser keeping the raw bytes of the subsections.
+    """
+    def __init__(self):
+        self.sections = []
+
+    def __call__(self, content_lines, genome_content):
+        return None
+
+    def from_bytes(self, data, genome_content):
+        self.sections.append(data)
+        return None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--length', type=int, default=1000000)
+    arg_parser.add_argument('--density', type=float, default=3.)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    data = Generator(
+            length=args.length, feature_density=args.density
+            ).record('REF0001').encode('utf-8')
+    collector = _Collector()
+    parser = Parser()
+    # the source subsection keeps its parser, it is not measured
+    features = dict(parser.content_parser['features'])
+    for _sub in features:
+        if _sub not in (None, 'source'):
+            features[_sub] = collector
+    parser.content_parser = dict(parser.content_parser, features=features)
+    next(parser.iter_parse_buffer(data))
+    sections = collector.sections
+    lines = [SectionSpan(_s, 21).lines() for _s in sections]
+    print('{0} features, {1:.1f} MB'.format(
+        len(sections), sum(map(len, sections)) / 1e6
+        ))
+    variants = (
+            ('reference', lambda: [reference(_l) for _l in lines]),
+            ('tokenize', lambda: [tokenize(_l, True) for _l in lines]),
+            ('reference (bytes)', lambda: [
+                reference(SectionSpan(_s, 21).lines()) for _s in sections
+                ]),
+            ('bytes', lambda: [tokenize_bytes(_s, True) for _s in sections]),
+            )
+    for name, fct in variants:
+        best = min(timeit.repeat(fct, number=1, repeat=args.repeat))
+        print('{0:<20}{1:>12.0f} features/s{2:>10.1f} ms'.format(
+            name, len(sections) / best, best * 1e3
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Lines per second of the line scanner of Parser.iter_parse.
+
+The scanner is timed on a synthetic bacterial chromosome (see synthetic.py),
+alone (all content parsers replaced by a no-op) and together with the
+default content parsers, each compared to the scanner up to version
+0.1-alpha. The bytes scanner (Parser.iter_parse_buffer, used for memory
+mapped files by Parser.parse_path) is timed on the encoded file.
+
+Usage:
+    python -m benchmarks.bench_scanner [--length 5000000] [--repeat 3]
+"""
+from __future__ import print_function, division
+import io
+import argparse
+import timeit
+from gbparse import Parser
+from benchmarks.synthetic import Generator
+
+
+class ReferenceParser(Parser):
+    """
+    Parser using the scanner up to version 0.1-alpha, kept for comparison.
+    """
+    def iter_parse(self, fileobject):
+        self._start_parse(lazy=False, include=None, exclude=None)
+        for line in fileobject:
+            if line.startswith(' '):  # we are in a subsection or content
+                if self._subsection_possible and \
+                        line[self._val_indent_subs].isalnum():  # new subsect
+                    assert (self.parse_section())
+                    self._section_content_lines = []
+                    assert (self._section is not None)
+                    self._subsection = line[:self._val_sep].strip().lower()
+                    self._section_content = []
+                else:  # in content block
+                    assert (self._section is not None)
+                    assert (self._section_content_lines)
+            else:  # we are in a new section or at the end
+                if line.startswith(self._genome_end):  # genome ended
+                    assert (self.parse_section())
+                    yield self.parse_genome()
+                else:  # new section
+                    assert (self.parse_section())
+                    self._subsection = None
+                    self._section_content = None
+                    self._section_content_lines = []
+                    self._section = line[:line.find(' ')].lower()
+            self._section_content_lines.append(
+                    line[self._val_sep:].strip()
+                    )
+
+
+def _no_op(content_lines, genome_content):
+    return None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--length', type=int, default=5000000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    flatfile = Generator(length=args.length).record('REF0001')
+    data = flatfile.encode('utf-8')
+    n_lines = flatfile.count('\n')
+    print('Reference genome of {0} bp ({1} lines)'.format(
+        args.length, n_lines
+        ))
+    no_op_parsers = dict(
+            (_section, dict((_sub, _no_op) for _sub in _parsers))
+            for _section, _parsers in Parser().content_parser.items()
+            )
+    for mode, content_parser in (
+            ('scan only', no_op_parsers),
+            ('full parse', None),
+            ):
+        parsers = []
+        for parser_class in (ReferenceParser, Parser):
+            parser = parser_class()
+            if content_parser is not None:
+                parser.content_parser = content_parser
+            parsers.append(parser)
+        reference, parser = parsers
+        # the scanners are only comparable if they parse the same genomes
+        expected = list(reference.iter_parse(io.StringIO(flatfile)))
+        if list(parser.iter_parse(io.StringIO(flatfile))) != expected or \
+                list(parser.iter_parse_buffer(data)) != expected:
+            raise AssertionError(
+                    'The genomes differ from the reference ({0})'.format(mode)
+                    )
+        timings = []
+        for fct in (
+                lambda: list(reference.iter_parse(io.StringIO(flatfile))),
+                lambda: list(parser.iter_parse(io.StringIO(flatfile))),
+                lambda: list(parser.iter_parse_buffer(data)),
+                ):
+            timings.append(min(timeit.repeat(
+                fct, number=1, repeat=args.repeat
+                )))
+        for name, best in zip(('reference', 'scanner', 'bytes'), timings):
+            print('{0:<12}{1:<12}{2:>12.0f} lines/s{3:>10.1f} ms'.format(
+                mode, name, n_lines / best, best * 1e3
+                ))
+        print('{0:<12}speedup {1:.2f}x, bytes {2:.2f}x'.format(
+            mode, timings[0] / timings[1], timings[0] / timings[2]
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Startup cost of a fresh process that parses a single small record, i.e.
+importing gbparse, creating a Parser and parsing the record.
+
+Each repetition runs in a new interpreter. The script exits with status 1 if
+the best import or Parser construction time exceeds its budget, so it can
+be used to keep track of the startup cost.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 20] [--budget-import 60] \\
+        [--budget-parser 2]
+"""
+from __future__ import print_function, division
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from benchmarks import synthetic
+
+# run in a new interpreter, prints the timings (seconds) as json
+_CHILD = '''
+import sys, json, time
+_start = time.perf_counter()
+import gbparse
+_imported = time.perf_counter()
+parser = gbparse.Parser()
+_constructed = time.perf_counter()
+genomes = parser.parse_path(sys.argv[1])
+_parsed = time.perf_counter()
+for _ in range(100):
+    gbparse.Parser()
+print(json.dumps({
+    'import': _imported - _start,
+    'first parser': _constructed - _imported,
+    'parse record': _parsed - _constructed,
+    'next parser': (time.perf_counter() - _parsed) / 100,
+    'network stack': 'requests' in sys.modules,
+    }))
+'''
+
+
+def run_child(path):
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+            [package_dir] + [_p for _p in [env.get('PYTHONPATH')] if _p]
+            )
+    output = subprocess.check_output(
+            [sys.executable, '-c', _CHILD, path], env=env
+            )
+    return json.loads(output.decode('utf-8'))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.RawDescriptionHelpFormatter
+            )
+    arg_parser.add_argument('--repeat', type=int, default=20)
+    arg_parser.add_argument(
+            '--budget-import', type=float, default=60.,
+            help='budget of `import gbparse` in ms'
+            )
+    arg_parser.add_argument(
+            '--budget-parser', type=float, default=2.,
+            help='budget of the first Parser() of a process in ms'
+            )
+    args = arg_parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'record.gb')
+        synthetic.write(path, records=1, length=5000)
+        runs = [run_child(path) for _ in range(args.repeat)]
+    finally:
+        shutil.rmtree(workdir)
+    for name in ('import', 'first parser', 'next parser', 'parse record'):
+        print('{0:<16}{1:>10.3f} ms (best), {2:>10.3f} ms (median)'.format(
+            name,
+            min(_r[name] for _r in runs) * 1e3,
+            sorted(_r[name] for _r in runs)[len(runs) // 2] * 1e3
+            ))
+    print('requests imported: {0}'.format(runs[0]['network stack']))
+    exceeded = [
+            (name, budget) for name, budget in (
+                ('import', args.budget_import),
+                ('first parser', args.budget_parser),
+                )
+            if min(_r[name] for _r in runs) * 1e3 > budget
+            ]
+    for name, budget in exceeded:
+        print('{0} exceeds its budget of {1} ms'.format(name, budget))
+    if exceeded:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Queries over a gbparse.store.GenomeStore compared to scanning the genomes
+saved as JSON Lines.
+
+A synthetic division file (see synthetic.py) is parsed into both a store and
+a JSON Lines file, then the CDS with a given product and the features within
+a coordinate range of a record are looked up.
+
+Usage:
+    python -m benchmarks.bench_store [--scale 0.2] [--repeat 3]
+"""
+from __future__ import print_function, division
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import timeit
+from gbparse import Parser
+from gbparse.store import GenomeStore
+from benchmarks import synthetic
+
+
+def scan_product(path, product):
+    """
+    :return: number of CDS with the product, loading every genome.
+    """
+    n_features = 0
+    with open(path, 'rb') as f_in:
+        for line in f_in:
+            genome = json.loads(line.decode('utf-8'))
+            n_features += sum(
+                    1 for _g in genome['content'].get('genes', [])
+                    if _g.get('cds_included') and _g.get('product') == product
+                    )
+    return n_features
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--scale', type=float, default=0.2)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        flatfile = os.path.join(workdir, 'division.gb')
+        synthetic.write(
+                flatfile, **synthetic.profile_kwargs('division', args.scale)
+                )
+        parser = Parser()
+        jsonl = os.path.join(workdir, 'division.jsonl')
+        timings = [('write jsonl', min(timeit.repeat(
+            lambda: parser.parse_path(flatfile, save_to=jsonl),
+            number=1, repeat=args.repeat
+            )))]
+
+        def write_store():
+            if os.path.exists(os.path.join(workdir, 'division.db')):
+                os.remove(os.path.join(workdir, 'division.db'))
+            with GenomeStore(os.path.join(workdir, 'division.db')) as store:
+                parser.parse_path(flatfile, save_to=store)
+        timings.append(('write store', min(timeit.repeat(
+            write_store, number=1, repeat=args.repeat
+            ))))
+        store = GenomeStore(os.path.join(workdir, 'division.db'))
+        record = store.keys()[-1]
+        product = store.features(type='cds', record=record).row(0)['product']
+        print('{0} records, {1} CDS with product {2!r}'.format(
+            len(store),
+            len(store.features(type='cds', product=product)),
+            product
+            ))
+        assert scan_product(jsonl, product) == len(
+                store.features(type='cds', product=product)
+                )
+        for name, fct in (
+                ('scan jsonl', lambda: scan_product(jsonl, product)),
+                ('store product', lambda: store.features(
+                    type='cds', product=product
+                    )),
+                ('store range', lambda: store.features(
+                    record=record, start=10000, end=20000
+                    )),
+                ('store genome', lambda: store.genome(record)),
+                ):
+            timings.append((name, min(timeit.repeat(
+                fct, number=1, repeat=args.repeat
+                ))))
+        store.close()
+        for name, best in timings:
+            print('{0:<16}{1:>10.1f} ms'.format(name, best * 1e3))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Throughput of the translation of all CDS of a genome.
+
+A synthetic bacterial chromosome (see synthetic.py) is parsed once, then its
+CDS are extracted and translated with the vectorized lookup tables (numpy)
+and codon by codon. The throughput is given in bp of the genome per second.
+
+Measured on a single core (python 3.11, numpy 2.4) for the default 5 Mbp
+genome with 4275 CDS: 83 to 136 Mbp/s vectorized and 16 to 24 Mbp/s codon by
+codon over repeated runs. The vectorized translation thus does not reliably
+reach 100 Mbp/s: about half of its time is spent in python for each CDS
+(parsing its location, slicing and finishing its protein), the lookups over
+the genome take the rest.
+
+Usage:
+    python -m benchmarks.bench_translation [--length 5000000] [--repeat 5]
+"""
+from __future__ import print_function, division
+import argparse
+import timeit
+from gbparse import Parser
+from gbparse import translation
+from benchmarks.synthetic import Generator
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--length', type=int, default=5000000)
+    arg_parser.add_argument('--density', type=float, default=0.9)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    data = Generator(
+            length=args.length, feature_density=args.density
+            ).record('REF0001').encode('utf-8')
+    genome = next(Parser().iter_parse_buffer(data))
+    n_cds = sum(
+            1 for _g in genome['content']['genes'] if _g.get('cds_included')
+            )
+    print('{0} bp, {1} CDS'.format(args.length, n_cds))
+    variants = [('python', False)]
+    if translation.np is not None:
+        variants.insert(0, ('vectorized', True))
+    for name, vectorized in variants:
+        best = min(timeit.repeat(
+            lambda: translation.translate_genome(
+                genome, table=11, vectorized=vectorized
+                ),
+            number=1,
+            repeat=args.repeat
+            ))
+        print('{0:<12}{1:>10.1f} Mbp/s{2:>10.1f} ms'.format(
+            name, args.length / best / 1e6, best * 1e3
+            ))
+
+
+if __name__ == '__main__':
+    main()
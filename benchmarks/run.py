@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""
+Benchmark suite of the parser on synthetic flatfiles.
+
+For each case (see benchmarks/synthetic.py PROFILES) the throughput, the peak
+resident memory (measured in a separate process) and the time spent in each
+content parser are measured. Results are written as json, two result files
+can be compared to catch regressions.
+
+Usage:
+    python -m benchmarks.run [--cases viral,bacterial,division,features]
+        [--scale 1] [--repeat 3] [--output results.json]
+    python -m benchmarks.run --compare old.json new.json [--threshold 0.1]
+"""
+from __future__ import print_function, division
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+import timeit
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+from gbparse import Parser
+from gbparse.stats import ParseStats
+from benchmarks import synthetic
+
+# metrics compared by --compare, True if larger is better
+METRICS = (
+        ('mb_per_s', True),
+        ('records_per_s', True),
+        ('peak_rss_mb', False),
+        )
+
+
+def fixture(case, scale, workdir):
+    """
+    :return: path to the synthetic flatfile of a case, generated if missing.
+    """
+    kwargs = synthetic.profile_kwargs(case, scale)
+    path = os.path.join(workdir, '{0}-{1}-{2}.gb'.format(
+        case, kwargs['records'], kwargs['length']
+        ))
+    if not os.path.exists(path):
+        synthetic.write(path + '.tmp', **kwargs)
+        os.rename(path + '.tmp', path)
+    return path
+
+
+def peak_rss(path):
+    """
+    Parse the file at path in a new process.
+
+    :return: peak resident memory of that process in MB or None.
+    """
+    if resource is None:
+        return None
+    output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.run', '--rss', path],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            )
+    return float(output.decode().strip())
+
+
+def _rss_child(path):
+    Parser().parse_path(path)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    print(rss / (1 << 20) if sys.platform == 'darwin' else rss / (1 << 10))
+
+
+def run_case(case, scale, repeat, workdir):
+    path = fixture(case, scale, workdir)
+    size = os.path.getsize(path)
+    parser = Parser()
+    genomes = parser.parse_path(path)
+    n_records = len(genomes)
+    best = min(timeit.repeat(
+        lambda: parser.parse_path(path),
+        number=1,
+        repeat=repeat
+        ))
+    timed_parser = Parser()
+    timed_parser.stats = ParseStats()
+    # collecting the statistics must not change the parsed genomes
+    if timed_parser.parse_path(path) != genomes:
+        raise AssertionError(
+                'The genomes of {0} differ with ParseStats'.format(path)
+                )
+    stats = timed_parser.stats.summary()
+    return {
+            'file': os.path.basename(path),
+            'bytes': size,
+            'records': n_records,
+            'seconds': best,
+            'mb_per_s': size / best / 1e6,
+            'records_per_s': n_records / best,
+            'peak_rss_mb': peak_rss(path),
+            'scanner_seconds': stats['scanner_seconds'],
+            'content_parsers': stats['sections'],
+            }
+
+
+def _revision():
+    try:
+        return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=subprocess.STDOUT
+                ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, new_path, threshold):
+    """
+    Print the relative change of the METRICS per case.
+
+    :return: number of metrics that got worse by more than threshold.
+    """
+    with open(old_path) as f_in:
+        old = json.load(f_in)['cases']
+    with open(new_path) as f_in:
+        new = json.load(f_in)['cases']
+    regressions = 0
+    for case in sorted(set(old) & set(new)):
+        for metric, larger_is_better in METRICS:
+            before, after = old[case].get(metric), new[case].get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if larger_is_better else change
+            flag = ''
+            if worse > threshold:
+                regressions += 1
+                flag = 'REGRESSION'
+            print('{0:<12}{1:<16}{2:>12.2f}{3:>12.2f}{4:>+9.1%}  {5}'.format(
+                case, metric, before, after, change, flag
+                ))
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.RawDescriptionHelpFormatter
+            )
+    arg_parser.add_argument(
+            '--cases', default=','.join(sorted(synthetic.PROFILES))
+            )
+    arg_parser.add_argument('--scale', type=float, default=1.)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--output')
+    arg_parser.add_argument(
+            '--workdir',
+            default=os.path.join(tempfile.gettempdir(), 'gbparse-benchmarks')
+            )
+    arg_parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    arg_parser.add_argument('--threshold', type=float, default=0.1)
+    arg_parser.add_argument('--rss', help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.rss:
+        return _rss_child(args.rss)
+    if args.compare:
+        regressions = compare(args.compare[0], args.compare[1],
+                              args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    if not os.path.isdir(args.workdir):
+        os.makedirs(args.workdir)
+    results = {
+            'meta': {
+                'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'revision': _revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'scale': args.scale,
+                'repeat': args.repeat,
+                },
+            'cases': {},
+            }
+    for case in args.cases.split(','):
+        result = run_case(case, args.scale, args.repeat, args.workdir)
+        results['cases'][case] = result
+        print('{0:<12}{1:>8.1f} MB/s{2:>10.1f} records/s{3:>10} MB RSS'.format(
+            case,
+            result['mb_per_s'],
+            result['records_per_s'],
+            '-' if result['peak_rss_mb'] is None
+            else '{0:.0f}'.format(result['peak_rss_mb'])
+            ))
+        slowest = sorted(
+                result['content_parsers'].items(),
+                key=lambda _i: -_i[1]['seconds']
+                )[:3]
+        for name, timing in slowest:
+            print('    {0:<24}{1:>8.3f} s{2:>10} calls'.format(
+                name, timing['seconds'], timing['calls']
+                ))
+    if args.output:
+        with open(args.output, 'w') as f_out:
+            json.dump(results, f_out, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
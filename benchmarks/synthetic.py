@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+"""
+Generator of synthetic GenBank flatfiles for benchmarks and fixtures.
+
+The output is fully determined by the arguments (incl. the seed), thus the
+same file can be regenerated anywhere instead of being checked in.
+
+Usage:
+    python -m benchmarks.synthetic out.gb --profile bacterial
+    python -m benchmarks.synthetic out.gb --records 10 --length 50000 \\
+        --feature-density 0.8 --qualifiers gene,locus_tag,product
+"""
+from __future__ import print_function, division
+import argparse
+import random
+
+# all qualifiers the generator can write, see Generator.qualifiers
+QUALIFIERS = (
+        'gene', 'locus_tag', 'product', 'protein_id', 'db_xref', 'note',
+        'translation',
+        )
+
+# typical record layouts
+PROFILES = {
+        # many small records, e.g. a viral division
+        'viral': dict(records=200, length=15000, feature_density=1.2),
+        # a single bacterial chromosome
+        'bacterial': dict(records=1, length=5000000, feature_density=0.9),
+        # a division file of mid sized records
+        'division': dict(records=500, length=40000, feature_density=0.9),
+        # densely annotated records, dominated by the FEATURES section
+        'features': dict(records=50, length=100000, feature_density=3.0),
+        }
+
+_AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWY'
+_WORDS = (
+        'putative', 'hypothetical', 'protein', 'transporter', 'binding',
+        'domain', 'family', 'regulator', 'membrane', 'kinase', 'subunit',
+        'dehydrogenase', 'transcriptional', 'ribosomal', 'ATP', 'DNA',
+        )
+
+
+def _wrap(text, width, first_width=None):
+    """
+    Split text into chunks of width characters (first_width for the first).
+    """
+    first_width = width if first_width is None else first_width
+    chunks = [text[:first_width]]
+    for start in range(first_width, len(text), width):
+        chunks.append(text[start:start + width])
+    return chunks
+
+
+class Generator(object):
+    """
+    Writes synthetic GenBank records.
+
+    Parameter:
+    ----------
+    :param length: Length of the sequence of each record in bp.
+    :param feature_density: Number of genes per kb. Each gene is followed by
+        a CDS or, with probability rna_fraction, a tRNA or rRNA feature.
+    :param qualifiers: Qualifiers written for each feature (a subset of
+        QUALIFIERS). db_xref is written twice per CDS.
+    :param rna_fraction: Fraction of the genes coding for an RNA.
+    :param seed: Seed of the random number generator.
+    """
+    def __init__(self, length=10000, feature_density=1.0,
+                 qualifiers=QUALIFIERS, rna_fraction=0.05, seed=0):
+        self.length = length
+        self.feature_density = feature_density
+        self.qualifiers = tuple(_q for _q in QUALIFIERS if _q in qualifiers)
+        self.rna_fraction = rna_fraction
+        self._rng = random.Random(seed)
+
+    def _words(self, n):
+        return ' '.join(self._rng.choice(_WORDS) for _ in range(n))
+
+    def _qualifier_lines(self, key, value, quoted=True):
+        indent = ' ' * 21
+        text = '/{0}={1}'.format(key, '"{0}"'.format(value) if quoted
+                                 else value)
+        if key == 'translation':  # wrapped without spaces
+            return [indent + _c for _c in _wrap(text, 58)]
+        lines = []
+        line = ''
+        for word in text.split(' '):
+            if line and len(line) + 1 + len(word) > 58:
+                lines.append(indent + line)
+                line = word
+            else:
+                line = '{0} {1}'.format(line, word) if line else word
+        lines.append(indent + line)
+        return lines
+
+    def _feature_lines(self, feature_type, location, qualifiers):
+        lines = ['     {0:<16}{1}'.format(feature_type, location)]
+        for key, value in qualifiers:
+            lines.extend(self._qualifier_lines(key, value))
+        return lines
+
+    def _features(self, name):
+        lines = self._feature_lines(
+                'source',
+                '1..{0}'.format(self.length),
+                [('organism', 'Completely made up'),
+                 ('mol_type', 'genomic DNA')]
+                )
+        n_genes = int(self.length / 1000. * self.feature_density)
+        if not n_genes:
+            return lines
+        spacing = self.length // n_genes
+        for i in range(n_genes):
+            start = i * spacing + self._rng.randint(1, max(spacing // 10, 1))
+            end = min(
+                    start + self._rng.randint(spacing // 2, spacing * 9 // 10),
+                    self.length
+                    )
+            end -= (end - start + 1) % 3
+            location = '{0}..{1}'.format(start, end)
+            if self._rng.random() < 0.5:
+                location = 'complement({0})'.format(location)
+            tag = '{0}_{1:05d}'.format(name, i)
+            gene = []
+            if 'gene' in self.qualifiers:
+                gene.append(('gene', 'gen{0}'.format(i)))
+            if 'locus_tag' in self.qualifiers:
+                gene.append(('locus_tag', tag))
+            lines.extend(self._feature_lines('gene', location, gene))
+            if self._rng.random() < self.rna_fraction:
+                feature_type = self._rng.choice(('tRNA', 'rRNA'))
+                product = '{0}-{1}'.format(
+                        feature_type, self._rng.choice(_AMINO_ACIDS)
+                        )
+            else:
+                feature_type = 'CDS'
+                product = self._words(self._rng.randint(2, 5))
+            qualifiers = list(gene)
+            if 'product' in self.qualifiers:
+                qualifiers.append(('product', product))
+            if feature_type == 'CDS':
+                if 'protein_id' in self.qualifiers:
+                    qualifiers.append(
+                            ('protein_id', 'WP_{0:09d}.1'.format(i))
+                            )
+                if 'db_xref' in self.qualifiers:
+                    qualifiers.extend([
+                        ('db_xref', 'GI:{0}'.format(10 ** 9 + i)),
+                        ('db_xref', 'GeneID:{0}'.format(i)),
+                        ])
+                if 'note' in self.qualifiers and self._rng.random() < 0.3:
+                    qualifiers.append(
+                            ('note', self._words(self._rng.randint(5, 30)))
+                            )
+                if 'translation' in self.qualifiers:
+                    qualifiers.append(('translation', 'M' + ''.join(
+                        self._rng.choice(_AMINO_ACIDS)
+                        for _ in range((end - start + 1) // 3 - 2)
+                        )))
+            lines.extend(
+                    self._feature_lines(feature_type, location, qualifiers)
+                    )
+        return lines
+
+    def _origin(self):
+        rng = self._rng
+        sequence = ''.join(rng.choice('acgt') for _ in range(self.length))
+        lines = ['ORIGIN      ']
+        for start in range(0, self.length, 60):
+            chunk = sequence[start:start + 60]
+            lines.append('{0:>9} {1}'.format(
+                start + 1,
+                ' '.join(chunk[i:i + 10] for i in range(0, len(chunk), 10))
+                ))
+        return lines
+
+    def record(self, name):
+        """
+        :return: the flatfile of a single record as string.
+        """
+        lines = [
+            'LOCUS       {0:<16}{1:>12} bp    DNA     circular BCT '
+            '01-JAN-2018'.format(name, self.length),
+            'DEFINITION  Completely made up {0}, complete genome.'.format(
+                name
+                ),
+            'ACCESSION   {0}'.format(name),
+            'VERSION     {0}.1  GI:{1}'.format(
+                name, 10 ** 9 + sum(map(ord, name))
+                ),
+            'DBLINK      BioProject: PRJNA111111',
+            '            BioSample: SAMN111111',
+            'KEYWORDS    .',
+            'SOURCE      Completely made up',
+            '  ORGANISM  Completely made up',
+            '            Bacteria; Proteobacteria; Gammaproteobacteria;',
+            '            Enterobacterales.',
+            'REFERENCE   1  (bases 1 to {0})'.format(self.length),
+            '  AUTHORS   Doe,J., Roe,R. and Poe,P.',
+            '  TITLE     Direct Submission',
+            '  JOURNAL   Submitted (01-JAN-2018) Nowhere',
+            'COMMENT     Synthetic record.',
+            'FEATURES             Location/Qualifiers',
+            ]
+        lines.extend(self._features(name))
+        lines.extend(self._origin())
+        lines.append('//')
+        return '\n'.join(lines) + '\n'
+
+
+def generate(records=1, length=10000, feature_density=1.0,
+             qualifiers=QUALIFIERS, rna_fraction=0.05, seed=0):
+    """
+    Generate the records of a synthetic flatfile one at a time.
+
+    :return: generator of the records (strings), see Generator for the
+        parameters.
+    """
+    generator = Generator(
+            length=length,
+            feature_density=feature_density,
+            qualifiers=qualifiers,
+            rna_fraction=rna_fraction,
+            seed=seed
+            )
+    for i in range(records):
+        yield generator.record('SY{0:06d}'.format(i))
+
+
+def write(path, **kwargs):
+    """
+    Write a synthetic flatfile to path, see generate for the arguments.
+
+    :return: size of the file in bytes.
+    """
+    size = 0
+    with open(path, 'w') as f_out:
+        for record in generate(**kwargs):
+            f_out.write(record)
+            size += len(record)
+    return size
+
+
+def profile_kwargs(profile, scale=1.):
+    """
+    :return: the arguments of generate for one of the PROFILES, with the
+        number of records (or the length of single record profiles) scaled.
+    """
+    kwargs = dict(PROFILES[profile])
+    if kwargs['records'] > 1:
+        kwargs['records'] = max(int(kwargs['records'] * scale), 1)
+    else:
+        kwargs['length'] = max(int(kwargs['length'] * scale), 1000)
+    return kwargs
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.RawDescriptionHelpFormatter
+            )
+    arg_parser.add_argument('path')
+    arg_parser.add_argument('--profile', choices=sorted(PROFILES))
+    arg_parser.add_argument('--scale', type=float, default=1.)
+    arg_parser.add_argument('--records', type=int, default=1)
+    arg_parser.add_argument('--length', type=int, default=10000)
+    arg_parser.add_argument('--feature-density', type=float, default=1.)
+    arg_parser.add_argument('--qualifiers', default=','.join(QUALIFIERS))
+    arg_parser.add_argument('--rna-fraction', type=float, default=0.05)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+    if args.profile is not None:
+        kwargs = profile_kwargs(args.profile, args.scale)
+    else:
+        kwargs = dict(
+                records=args.records,
+                length=args.length,
+                feature_density=args.feature_density,
+                qualifiers=args.qualifiers.split(','),
+                rna_fraction=args.rna_fraction,
+                )
+    size = write(args.path, seed=args.seed, **kwargs)
+    print('Wrote {0} ({1:.1f} MB)'.format(args.path, size / 1e6))
+
+
+if __name__ == '__main__':
+    main()
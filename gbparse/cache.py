@@ -0,0 +1,252 @@
+from __future__ import unicode_literals, absolute_import
+import os
+import io
+import time
+import pickle
+import sqlite3
+import hashlib
+from .records import iter_record_keys
+
+
+def genome_key(genome):
+    """
+    Cache key of a parsed genome: its version (accession.version) if present,
+    else its accession or its LOCUS name.
+    """
+    if 'version' in genome:
+        return genome['version'][None]
+    elif 'accession' in genome:
+        return genome['accession'].split()[0]
+    return genome['locus'][None]
+
+
+class FetchCache(object):
+    """
+    Persistent on-disk cache of the flatfiles fetched from ncbi.
+
+    Each record is stored as a separate file, keyed by its accession.version,
+    and can be looked up by any of its identifiers (LOCUS name, accession,
+    version or GI number). Optionally the parsed genome is stored as well.
+
+    Entries older than ttl seconds are dropped and the least recently used
+    entries are evicted once the cache exceeds max_bytes. The content of each
+    file is validated against its sha256 checksum when read.
+
+    Parameter:
+    ----------
+    :param path: Folder holding the cache (created if missing).
+    :param max_bytes: Maximal size of the cached files.
+    :param ttl: Time to live of an entry in seconds, None for no expiry.
+    :param store_parsed: Also store the parsed genomes (as pickle files).
+    """
+    def __init__(self, path, max_bytes=1 << 30, ttl=None, store_parsed=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store_parsed = store_parsed
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._db = sqlite3.connect(os.path.join(path, 'index.sqlite'))
+        with self._db:
+            self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS entries ('
+                    'key TEXT PRIMARY KEY, size INTEGER, checksum TEXT, '
+                    'parsed INTEGER, created REAL, accessed REAL)'
+                    )
+            self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS aliases ('
+                    'alias TEXT PRIMARY KEY, key TEXT)'
+                    )
+            self._db.execute(
+                    'CREATE INDEX IF NOT EXISTS entries_accessed '
+                    'ON entries (accessed)'
+                    )
+
+    def _file(self, key, suffix):
+        return os.path.join(self.path, key.replace(os.sep, '_') + suffix)
+
+    def _remove(self, key):
+        with self._db:
+            self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._db.execute('DELETE FROM aliases WHERE key = ?', (key,))
+        for suffix in ('.gb', '.pkl'):
+            if os.path.exists(self._file(key, suffix)):
+                os.remove(self._file(key, suffix))
+
+    def get(self, genome_id, parsed=False):
+        """
+        Get a genome from the cache and count the hit or miss.
+
+        :param genome_id: LOCUS name, accession, version or GI number.
+        :param parsed: Return the parsed genome if it is cached.
+        :return: the parsed genome (dict), the flatfile of the genome (bytes)
+            or None if the genome is not (validly) cached.
+        """
+        entry = self._lookup(genome_id)
+        cached = None
+        if entry is not None:
+            key, has_parsed = entry
+            if parsed and has_parsed:
+                cached = self.get_parsed(key)
+            if cached is None:
+                cached = self.get_raw(key)
+        if cached is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return cached
+
+    def _lookup(self, genome_id):
+        """
+        Find the entry of a genome.
+
+        :return: (key, has_parsed) of the entry or None.
+        """
+        row = self._db.execute(
+                'SELECT entries.key, entries.created, entries.parsed '
+                'FROM aliases JOIN entries ON aliases.key = entries.key '
+                'WHERE aliases.alias = ?',
+                (str(genome_id),)
+                ).fetchone()
+        if row is not None and self.ttl is not None and \
+                row[1] + self.ttl < time.time():
+            self._remove(row[0])
+            row = None
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute(
+                    'UPDATE entries SET accessed = ? WHERE key = ?',
+                    (time.time(), row[0])
+                    )
+        return row[0], bool(row[2])
+
+    def get_raw(self, key):
+        """
+        :return: the flatfile of the entry as bytes or None if the file is
+            missing or corrupted (the entry is then removed).
+        """
+        row = self._db.execute(
+                'SELECT checksum FROM entries WHERE key = ?', (key,)
+                ).fetchone()
+        try:
+            with open(self._file(key, '.gb'), 'rb') as f_in:
+                raw = f_in.read()
+        except (IOError, OSError):
+            raw = None
+        if row is None or raw is None or \
+                hashlib.sha256(raw).hexdigest() != row[0]:
+            self._remove(key)
+            return None
+        return raw
+
+    def get_parsed(self, key):
+        """
+        :return: the parsed genome of the entry or None.
+        """
+        try:
+            with open(self._file(key, '.pkl'), 'rb') as f_in:
+                return pickle.load(f_in)
+        except (IOError, OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def put(self, raw):
+        """
+        Add the record(s) of a flatfile to the cache.
+
+        :param raw: bytes of one or more records.
+        :return: list of the keys of the added records.
+        """
+        keys = []
+        now = time.time()
+        for offset, length, aliases in iter_record_keys(io.BytesIO(raw)):
+            if not aliases:
+                continue
+            # prefer the version (accession.version) as key
+            key = next((_a for _a in aliases if '.' in _a), aliases[0])
+            record = raw[offset:offset + length]
+            with open(self._file(key, '.gb'), 'wb') as f_out:
+                f_out.write(record)
+            with self._db:
+                self._db.execute(
+                        'INSERT OR REPLACE INTO entries VALUES '
+                        '(?, ?, ?, 0, ?, ?)',
+                        (
+                            key, len(record),
+                            hashlib.sha256(record).hexdigest(), now, now
+                        )
+                        )
+                self._db.executemany(
+                        'INSERT OR REPLACE INTO aliases VALUES (?, ?)',
+                        [(_a, key) for _a in set(aliases)]
+                        )
+            keys.append(key)
+        self.evict()
+        return keys
+
+    def put_parsed(self, genome):
+        """
+        Store the parsed version of a genome whose flatfile is cached.
+        """
+        key = genome_key(genome)
+        if self._db.execute(
+                'SELECT 1 FROM entries WHERE key = ?', (key,)
+                ).fetchone() is None:
+            return None
+        with open(self._file(key, '.pkl'), 'wb') as f_out:
+            pickle.dump(genome, f_out, pickle.HIGHEST_PROTOCOL)
+        with self._db:
+            self._db.execute(
+                    'UPDATE entries SET parsed = 1 WHERE key = ?', (key,)
+                    )
+        return None
+
+    def size(self):
+        """
+        :return: total size in bytes of the cached flatfiles.
+        """
+        return self._db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM entries'
+                ).fetchone()[0]
+
+    def evict(self):
+        """
+        Remove expired entries and the least recently used entries until the
+        cache fits into max_bytes.
+        """
+        if self.ttl is not None:
+            for (key,) in self._db.execute(
+                    'SELECT key FROM entries WHERE created < ?',
+                    (time.time() - self.ttl,)
+                    ).fetchall():
+                self._remove(key)
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return None
+        for key, size in self._db.execute(
+                'SELECT key, size FROM entries ORDER BY accessed'
+                ).fetchall():
+            self._remove(key)
+            excess -= size
+            if excess <= 0:
+                break
+        return None
+
+    def stats(self):
+        """
+        :return: dict with the number of hits, misses and entries and the
+            size of the cache in bytes.
+        """
+        return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': self._db.execute(
+                    'SELECT COUNT(*) FROM entries'
+                    ).fetchone()[0],
+                'bytes': self.size(),
+                }
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,290 @@
+from __future__ import unicode_literals, absolute_import
+# Column-wise storage of the features of genomes.
+from array import array
+from .locations import parse_location, LocationParsingException
+
+
+class DictColumn(object):
+    """
+    Dictionary encoded string column: each row holds the index (code) of its
+    value in values, -1 for missing values.
+    """
+    __slots__ = ('codes', 'values', '_index')
+
+    def __init__(self, n_missing=0):
+        self.codes = array('i', [-1]) * n_missing
+        self.values = []
+        self._index = {}
+
+    def code(self, value):
+        """
+        :return: the code of value, adding it to the dictionary if needed.
+        """
+        try:
+            return self._index[value]
+        except KeyError:
+            self._index[value] = len(self.values)
+            self.values.append(value)
+            return self._index[value]
+
+    def append(self, value):
+        self.codes.append(-1 if value is None else self.code(value))
+
+    def __getitem__(self, row):
+        code = self.codes[row]
+        return self.values[code] if code >= 0 else None
+
+    def to_list(self):
+        """
+        :return: list of the values of all rows, None for missing values.
+        """
+        values = self.values
+        return [values[_c] if _c >= 0 else None for _c in self.codes]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getstate__(self):
+        return self.codes, self.values
+
+    def __setstate__(self, state):
+        self.codes, self.values = state
+        self._index = dict((_v, _i) for _i, _v in enumerate(self.values))
+
+
+class FeatureTable(object):
+    """
+    Features of one or more genomes stored column-wise.
+
+    The coordinates (1-based, inclusive) and strand of each feature are kept
+    in integer arrays, the record, type, location string and every qualifier
+    in dictionary encoded string columns. Rows are added with append and
+    tables of several genomes can be combined with concat.
+
+    Columns can be accessed by name, e.g. table['start'] or
+    table['product'], and exported with to_numpy, to_arrow or to_dict (the
+    json compatible form written by the sinks of gbparse.sinks).
+    """
+    def __init__(self):
+        self.start = array('q')
+        self.end = array('q')
+        self.strand = array('b')
+        self.record = DictColumn()
+        self.type = DictColumn()
+        self.location = DictColumn()
+        self.qualifiers = {}
+
+    def __len__(self):
+        return len(self.start)
+
+    def append(self, record, feature_type, location, qualifiers):
+        """
+        Add a feature.
+
+        :param record: name of the record the feature belongs to.
+        :param feature_type: feature key, e.g. 'cds'.
+        :param location: location string, e.g. 'complement(1..20)'.
+        :param qualifiers: dict of the (string) qualifier values.
+        """
+        try:
+            _location = parse_location(location)
+            self.start.append(_location.start)
+            self.end.append(_location.end)
+            self.strand.append(_location.strand)
+        except LocationParsingException:
+            self.start.append(-1)
+            self.end.append(-1)
+            self.strand.append(0)
+        n_rows = len(self.start) - 1
+        self.record.append(record)
+        self.type.append(feature_type)
+        self.location.append(location)
+        for key, value in qualifiers.items():
+            if key not in self.qualifiers:
+                self.qualifiers[key] = DictColumn(n_rows)
+            self.qualifiers[key].append(value)
+        for key, column in self.qualifiers.items():
+            if len(column) == n_rows:  # qualifier missing for this feature
+                column.codes.append(-1)
+        return None
+
+    def columns(self):
+        """
+        :return: list of the column names.
+        """
+        return ['record', 'type', 'location', 'start', 'end', 'strand'] + \
+            sorted(self.qualifiers)
+
+    def __getitem__(self, name):
+        if name in ('start', 'end', 'strand', 'record', 'type', 'location'):
+            return getattr(self, name)
+        return self.qualifiers[name]
+
+    def row(self, i):
+        """
+        :return: the feature in row i as a dict (missing qualifiers omitted).
+        """
+        feature = {
+                'record': self.record[i],
+                'type': self.type[i],
+                'location': self.location[i],
+                'start': self.start[i],
+                'end': self.end[i],
+                'strand': self.strand[i],
+                }
+        for key, column in self.qualifiers.items():
+            if column.codes[i] >= 0:
+                feature[key] = column[i]
+        return feature
+
+    def rows(self, **conditions):
+        """
+        Select the rows matching all conditions, e.g.
+        table.rows(type='cds', gene='dnaa'). The comparison is vectorized if
+        numpy is available.
+
+        :return: list of row indices.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        selected = [True] * len(self) if np is None \
+            else np.ones(len(self), dtype=bool)
+        for name, value in conditions.items():
+            column = self[name]
+            if isinstance(column, DictColumn):
+                if value not in column._index:
+                    return []
+                values, value = column.codes, column._index[value]
+            else:
+                values = column
+            if np is None:
+                selected = [
+                        _s and _v == value for _s, _v in zip(selected, values)
+                        ]
+            else:
+                selected &= np.frombuffer(
+                        values, dtype=values.typecode
+                        ) == value
+        if np is None:
+            return [_i for _i, _s in enumerate(selected) if _s]
+        return np.flatnonzero(selected).tolist()
+
+    @classmethod
+    def concat(cls, tables):
+        """
+        Combine several tables (e.g. of several genomes) into one.
+        """
+        combined = cls()
+        for table in tables:
+            n_rows = len(combined)
+            combined.start.extend(table.start)
+            combined.end.extend(table.end)
+            combined.strand.extend(table.strand)
+            for name in ('record', 'type', 'location'):
+                _extend(getattr(combined, name), getattr(table, name))
+            for key, column in table.qualifiers.items():
+                if key not in combined.qualifiers:
+                    combined.qualifiers[key] = DictColumn(n_rows)
+                _extend(combined.qualifiers[key], column)
+            for column in combined.qualifiers.values():
+                if len(column) < len(combined):
+                    column.codes.extend(
+                            array('i', [-1]) * (len(combined) - len(column))
+                            )
+        return combined
+
+    def to_numpy(self):
+        """
+        Export the table as a numpy structured array. String columns hold the
+        codes of their values, see self.categories.
+
+        :return: numpy.ndarray
+        """
+        import numpy as np
+        columns = self.columns()
+        dtypes = {'start': 'i8', 'end': 'i8', 'strand': 'i1'}
+        table = np.empty(
+                len(self),
+                dtype=[(str(_c), dtypes.get(_c, 'i4')) for _c in columns]
+                )
+        for name in columns:
+            column = self[name]
+            table[str(name)] = np.frombuffer(
+                    column.codes if isinstance(column, DictColumn)
+                    else column,
+                    dtype=dtypes.get(name, 'i4')
+                    )
+        return table
+
+    def to_dict(self):
+        """
+        Export the table as a dict of lists, one per column (see
+        self.columns), missing qualifiers being None. The table is restored
+        with from_dict.
+        """
+        columns = {}
+        for name in self.columns():
+            column = self[name]
+            columns[name] = column.to_list() \
+                if isinstance(column, DictColumn) else column.tolist()
+        return columns
+
+    @classmethod
+    def from_dict(cls, columns):
+        """
+        Build a table from the dict of lists returned by to_dict.
+        """
+        table = cls()
+        for name in ('start', 'end', 'strand'):
+            getattr(table, name).extend(columns[name])
+        for name, values in columns.items():
+            if name in ('start', 'end', 'strand'):
+                continue
+            column = DictColumn()
+            for value in values:
+                column.append(value)
+            if name in ('record', 'type', 'location'):
+                setattr(table, name, column)
+            else:
+                table.qualifiers[name] = column
+        return table
+
+    def categories(self, name):
+        """
+        :return: list of the values of a string column, indexed by code.
+        """
+        return self[name].values
+
+    def to_arrow(self):
+        """
+        Export the table as a pyarrow.Table, string columns are dictionary
+        encoded.
+        """
+        import numpy as np
+        import pyarrow as pa
+        arrays = []
+        for name in self.columns():
+            column = self[name]
+            if isinstance(column, DictColumn):
+                codes = np.frombuffer(column.codes, dtype='i4')
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(codes, mask=codes < 0),
+                    pa.array(column.values, type=pa.string())
+                    ))
+            else:
+                arrays.append(pa.array(np.frombuffer(
+                    column, dtype={'q': 'i8', 'b': 'i1'}[column.typecode]
+                    )))
+        return pa.Table.from_arrays(arrays, names=self.columns())
+
+
+def _extend(column, other):
+    """
+    Append the rows of the DictColumn other to column.
+    """
+    mapping = [column.code(_v) for _v in other.values]
+    column.codes.extend(
+            array('i', [mapping[_c] if _c >= 0 else -1 for _c in other.codes])
+            )
@@ -0,0 +1,296 @@
+from __future__ import unicode_literals, absolute_import, division
+# Base composition, GC skew and k-mer statistics of nucleotide sequences,
+# computed while parsing with
+# gbparse.content_parsers.composition_parsers.SequenceStatsParser.
+import collections
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# symbols counted separately, any other symbol is counted as 'other'
+SYMBOLS = ('a', 'c', 'g', 't', 'n')
+# code of each byte: the index of its symbol in SYMBOLS (either case) or 5
+_CODES = bytes(bytearray(
+        dict(
+            [(ord(_s), _i) for _i, _s in enumerate(SYMBOLS)] +
+            [(ord(_s.upper()), _i) for _i, _s in enumerate(SYMBOLS)]
+            ).get(_b, len(SYMBOLS))
+        for _b in range(256)
+        ))
+_CODE_BYTES = [bytes(bytearray([_i])) for _i in range(len(SYMBOLS) + 1)]
+_G, _C = _CODE_BYTES[2], _CODE_BYTES[1]
+
+
+def _as_bytes(sequence):
+    """
+    :return: a sequence given as str, bytes or PackedSequence as bytes.
+    """
+    if hasattr(sequence, 'unpack'):  # gbparse.sequence.PackedSequence
+        return sequence.unpack()
+    if isinstance(sequence, bytes):
+        return sequence
+    return sequence.encode('ascii')
+
+
+def _encode(sequence):
+    """
+    :return: the sequence with each symbol replaced by its code (see _CODES).
+    """
+    return _as_bytes(sequence).translate(_CODES)
+
+
+def gc_skew(sequence, window=10000):
+    """
+    GC skew (G - C) / (G + C) in consecutive windows of a sequence.
+
+    Parameter:
+    ----------
+    :param sequence: Sequence as str, bytes or PackedSequence.
+    :param window: Size of the windows in bp, the last window may be
+        shorter.
+
+    :return: list of the skew of each window, None for windows without G or
+        C.
+    """
+    return _gc_skew(_encode(sequence), window)
+
+
+def _gc_skew(codes, window):
+    """
+    gc_skew of a coded sequence, see _encode.
+    """
+    if np is not None:
+        values = np.frombuffer(codes, np.uint8)
+        n_full = len(values) // window * window
+        windows = values[:n_full].reshape(-1, window)
+        n_g = np.count_nonzero(windows == 2, axis=1).tolist()
+        n_c = np.count_nonzero(windows == 1, axis=1).tolist()
+        if n_full < len(values):
+            n_g.append(codes.count(_G, n_full))
+            n_c.append(codes.count(_C, n_full))
+    else:
+        starts = range(0, len(codes), window)
+        n_g = [codes.count(_G, _s, _s + window) for _s in starts]
+        n_c = [codes.count(_C, _s, _s + window) for _s in starts]
+    return [
+            (_g - _c) / (_g + _c) if _g + _c else None
+            for _g, _c in zip(n_g, n_c)
+            ]
+
+
+def _composition(codes):
+    """
+    :return: list of the number of each symbol in SYMBOLS and of any other
+        symbol in a coded sequence (see _encode).
+    """
+    if np is not None:
+        values = np.frombuffer(codes, np.uint8)
+        counts = [
+                int(np.count_nonzero(values == _i))
+                for _i in range(len(SYMBOLS))
+                ]
+    else:
+        counts = [codes.count(_code) for _code in _CODE_BYTES[:-1]]
+    counts.append(len(codes) - sum(counts))
+    return counts
+
+
+def _kmer_counts(codes, k, ambiguous=True):
+    """
+    Count the k-mers of a coded sequence (see _encode) that consist of a, c,
+    g and t only.
+
+    Parameter:
+    ----------
+    :param codes: Coded sequence, see _encode.
+    :param k: Length of the k-mers.
+    :param ambiguous: Whether the sequence may hold symbols other than a, c,
+        g and t, which are skipped.
+
+    :return: list (or numpy array) of the counts indexed by the k-mer with
+        the bases as 2-bit digits, e.g. 'ac' -> 0 * 4 + 1.
+    """
+    size = 4 ** k
+    n = len(codes) - k + 1
+    if n <= 0:
+        return [0] * size if np is None else np.zeros(size, np.int64)
+    if np is not None:
+        values = np.frombuffer(codes, np.uint8)
+        index = np.zeros(n, _index_dtype(k))
+        for j in range(k):
+            index <<= 2
+            index |= values[j:j + n] & 3
+        if ambiguous:
+            # k-mers overlapping another symbol are counted at index size
+            other = values > 3
+            skip = other[:n].copy()
+            for j in range(1, k):
+                skip |= other[j:j + n]
+            index[skip] = size
+        return np.bincount(index, minlength=size + 1)[:size]
+    counts = [0] * size
+    for kmer, count in collections.Counter(
+            codes[_i:_i + k] for _i in range(n)).items():
+        index = 0
+        for _code in bytearray(kmer):
+            if _code > 3:
+                break
+            index = index * 4 + _code
+        else:
+            counts[index] += count
+    return counts
+
+
+def _index_dtype(k):
+    """
+    :return: the smallest numpy integer type holding the index of any k-mer
+        and the index 4 ** k of skipped k-mers.
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if 4 ** k < np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def _kmer_name(index, k):
+    return ''.join(
+            SYMBOLS[(index >> (2 * (k - 1 - _j))) & 3] for _j in range(k)
+            )
+
+
+class SequenceStats(object):
+    """
+    Base composition and k-mer counts of one or more sequences.
+
+    Statistics of several records, e.g. of a whole division parsed with
+    Parser.parse_parallel, are combined with merge (or add_genome), they can
+    be pickled and converted to and from json compatible dicts.
+
+    Parameter:
+    ----------
+    :param k: Length of the counted k-mers, None (or 0) to not count
+        k-mers. k-mers containing symbols other than a, c, g and t are
+        skipped.
+    """
+    def __init__(self, k=None):
+        self.k = k or None
+        self.records = 0
+        self.length = 0
+        self.counts = [0] * (len(SYMBOLS) + 1)
+        self.kmers = None if self.k is None else [0] * 4 ** self.k
+
+    def update(self, sequence):
+        """
+        Add the statistics of a sequence (str, bytes or PackedSequence).
+        """
+        return self._update_codes(_encode(sequence))
+
+    def _update_codes(self, codes):
+        counts = _composition(codes)
+        self.records += 1
+        self.length += len(codes)
+        self.counts = [_a + _b for _a, _b in zip(self.counts, counts)]
+        if self.k is not None:
+            self._add_kmers(_kmer_counts(
+                codes, self.k, ambiguous=sum(counts[4:]) > 0
+                ))
+        return self
+
+    def _add_kmers(self, kmers):
+        if np is not None:
+            self.kmers = np.add(self.kmers, kmers, dtype=np.int64)
+        else:
+            self.kmers = [_a + _b for _a, _b in zip(self.kmers, kmers)]
+
+    def merge(self, other):
+        """
+        Add the statistics of another SequenceStats with the same k.
+        """
+        if other.k != self.k:
+            raise ValueError(
+                    'Cannot merge the statistics of {0}-mers and '
+                    '{1}-mers'.format(self.k, other.k)
+                    )
+        self.records += other.records
+        self.length += other.length
+        self.counts = [_a + _b for _a, _b in zip(self.counts, other.counts)]
+        if self.k is not None:
+            self._add_kmers(other.kmers)
+        return self
+
+    def add_genome(self, genome):
+        """
+        Merge the statistics stored in a parsed genome (see
+        SequenceStatsParser), e.g. as fct of Parser.parse_parallel.
+        """
+        return self.merge(
+                self.__class__.from_dict(genome['content']['composition'])
+                )
+
+    @property
+    def composition(self):
+        """
+        :return: dict of the number of each symbol in SYMBOLS and of any
+            other symbol ('other').
+        """
+        return dict(zip(SYMBOLS + ('other',), self.counts))
+
+    @property
+    def gc(self):
+        """
+        :return: fraction of g and c among the bases a, c, g and t, None if
+            there are none.
+        """
+        n_acgt = sum(self.counts[:4])
+        return (self.counts[1] + self.counts[2]) / n_acgt if n_acgt else None
+
+    def kmer_counts(self):
+        """
+        :return: dict of the counts of the k-mers occurring at least once.
+        """
+        if self.k is None:
+            return {}
+        return dict(
+                (_kmer_name(_i, self.k), int(_n))
+                for _i, _n in enumerate(self.kmers) if _n
+                )
+
+    def to_dict(self):
+        """
+        :return: json compatible dict of the statistics, see from_dict.
+        """
+        summary = {
+                'records': self.records,
+                'length': self.length,
+                'composition': self.composition,
+                'gc': self.gc,
+                }
+        if self.k is not None:
+            summary['k'] = self.k
+            summary['kmers'] = self.kmer_counts()
+        return summary
+
+    @classmethod
+    def from_dict(cls, summary):
+        stats = cls(summary.get('k'))
+        stats.records = summary['records']
+        stats.length = summary['length']
+        stats.counts = [
+                summary['composition'][_s] for _s in SYMBOLS + ('other',)
+                ]
+        if stats.k is not None:
+            for kmer, count in summary['kmers'].items():
+                index = 0
+                for _base in kmer:
+                    index = index * 4 + SYMBOLS.index(_base)
+                stats.kmers[index] = count
+            if np is not None:
+                stats.kmers = np.array(stats.kmers, np.int64)
+        return stats
+
+    def __repr__(self):
+        return '{0}(records={1}, length={2}, gc={3})'.format(
+                self.__class__.__name__, self.records, self.length, self.gc
+                )
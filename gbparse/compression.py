@@ -0,0 +1,287 @@
+from __future__ import unicode_literals, absolute_import
+# Transparent reading of compressed GenBank files.
+import io
+import os
+import bz2
+import gzip
+import zlib
+import struct
+import bisect
+import threading
+try:
+    import queue
+except ImportError:  # python 2
+    import Queue as queue
+try:
+    import lzma
+except ImportError:  # python 2
+    lzma = None
+
+# size of the blocks read from the decompressor
+BLOCK_SIZE = 1 << 20
+
+_MAGIC = (
+        (b'\x1f\x8b', 'gzip'),
+        (b'BZh', 'bz2'),
+        (b'\xfd7zXZ\x00', 'xz'),
+        (b'\x28\xb5\x2f\xfd', 'zstd'),
+        )
+_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd'}
+
+
+def compression_of(path):
+    """
+    Detect the compression of a file from its first bytes (or its extension
+    for empty files).
+
+    :return: one of 'gzip', 'bgzf', 'bz2', 'xz', 'zstd' or None.
+    """
+    with open(path, 'rb') as fobj:
+        head = fobj.read(18)
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            if compression == 'gzip' and _is_bgzf_header(head):
+                return 'bgzf'
+            return compression
+    if not head:
+        return _EXTENSIONS.get(os.path.splitext(path)[1])
+    return None
+
+
+def random_access(path):
+    """
+    :return: True if the file at path can be read from any offset without
+        decompressing what precedes it.
+    """
+    return compression_of(path) in (None, 'bgzf')
+
+
+def _decompressor(path, compression):
+    if compression in ('gzip', 'bgzf'):
+        return gzip.open(path, 'rb')
+    elif compression == 'bz2':
+        return bz2.BZ2File(path, 'rb')
+    elif compression == 'xz':
+        if lzma is None:
+            raise ImportError('Reading .xz files requires python 3.')
+        return lzma.open(path, 'rb')
+    elif compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                    'Reading .zst files requires the zstandard package: '
+                    'pip install zstandard'
+                    )
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+    raise ValueError('Unknown compression {0}'.format(compression))
+
+
+def open_path(path, threaded=True, seekable=False):
+    """
+    Open a (possibly compressed) file for reading in binary mode.
+
+    Parameter:
+    ----------
+    :param path: Path to an uncompressed, gzip (incl. BGZF), bz2, xz or zstd
+        compressed file.
+    :param threaded: Decompress in a separate thread, such that the
+        decompression runs while the caller processes the data.
+    :param seekable: Return a file object supporting seek. For BGZF files
+        this is cheap, for other compressed files seeking decompresses the
+        file up to the requested offset.
+
+    :return: binary file object (offsets refer to the uncompressed data).
+    """
+    compression = compression_of(path)
+    if compression is None:
+        return open(path, 'rb')
+    if compression == 'bgzf' and seekable:
+        return io.BufferedReader(BgzfReader(path), BLOCK_SIZE)
+    decompressor = _decompressor(path, compression)
+    if threaded and not seekable:
+        return io.BufferedReader(ThreadedReader(decompressor), BLOCK_SIZE)
+    return io.BufferedReader(decompressor, BLOCK_SIZE) \
+        if compression == 'zstd' else decompressor
+
+
+def open_text(path, encoding='utf-8', threaded=True):
+    """
+    Open a (possibly compressed) file for reading in text mode.
+    """
+    return io.TextIOWrapper(
+            open_path(path, threaded=threaded),
+            encoding=encoding
+            )
+
+
+class ThreadedReader(io.RawIOBase):
+    """
+    Read a file object in blocks from a background thread.
+
+    Up to max_blocks blocks are read ahead, which lets e.g. the decompression
+    of a file run in parallel to the parsing of its content.
+    """
+    def __init__(self, fileobject, block_size=BLOCK_SIZE, max_blocks=8):
+        io.RawIOBase.__init__(self)
+        self._fileobject = fileobject
+        self._block_size = block_size
+        self._blocks = queue.Queue(max_blocks)
+        self._block = b''
+        self._position = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._read_ahead)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _read_ahead(self):
+        try:
+            while not self._stop.is_set():
+                block = self._fileobject.read(self._block_size)
+                self._put(block)
+                if not block:
+                    break
+        except Exception as error:
+            self._put(error)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return None
+            except queue.Full:
+                continue
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._block is None:  # end of file reached before
+            return 0
+        if self._position >= len(self._block):
+            block = self._blocks.get()
+            if isinstance(block, Exception):
+                raise block
+            if not block:  # end of file
+                self._block = None
+                return 0
+            self._block = block
+            self._position = 0
+        size = min(len(buffer), len(self._block) - self._position)
+        buffer[:size] = self._block[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._fileobject.close()
+        io.RawIOBase.close(self)
+
+
+def _is_bgzf_header(head):
+    """
+    Check for the 'BC' extra subfield of a BGZF block header.
+    """
+    return len(head) >= 18 and head[3:4] == b'\x04' and \
+        head[12:14] == b'BC'
+
+
+def _bgzf_blocks(path):
+    """
+    Scan the block headers of a BGZF file.
+
+    :return: two lists holding the compressed and uncompressed offsets at
+        which the blocks start.
+    """
+    compressed = []
+    uncompressed = []
+    c_offset = 0
+    u_offset = 0
+    with open(path, 'rb') as fobj:
+        while True:
+            head = fobj.read(18)
+            if not head:
+                break
+            if not _is_bgzf_header(head):
+                raise IOError('{0} is not a valid BGZF file'.format(path))
+            block_size = struct.unpack('<H', head[16:18])[0] + 1
+            fobj.seek(c_offset + block_size - 4)
+            (isize,) = struct.unpack('<I', fobj.read(4))
+            if isize:
+                compressed.append(c_offset)
+                uncompressed.append(u_offset)
+            c_offset += block_size
+            u_offset += isize
+    return compressed, uncompressed + [u_offset]
+
+
+# block tables of the BGZF files opened in this process
+_bgzf_tables = {}
+
+
+class BgzfReader(io.RawIOBase):
+    """
+    Random access to the uncompressed content of a BGZF file (e.g. created by
+    bgzip).
+
+    BGZF files consist of independently compressed blocks of at most 64KB,
+    thus seeking only requires decompressing a single block. The block table
+    is built once per file and process by reading the block headers.
+    """
+    def __init__(self, path):
+        io.RawIOBase.__init__(self)
+        _stat = os.stat(path)
+        key = (path, _stat.st_size, _stat.st_mtime)
+        if key not in _bgzf_tables:
+            _bgzf_tables[key] = _bgzf_blocks(path)
+        self._compressed, self._uncompressed = _bgzf_tables[key]
+        self._fileobject = open(path, 'rb')
+        self._position = 0
+        self._block_index = None
+        self._block = b''
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._uncompressed[-1]
+        self._position = max(offset, 0)
+        return self._position
+
+    def _load_block(self, index):
+        if index != self._block_index:
+            self._fileobject.seek(self._compressed[index])
+            head = self._fileobject.read(18)
+            block_size = struct.unpack('<H', head[16:18])[0] + 1
+            xlen = struct.unpack('<H', head[10:12])[0]
+            data = self._fileobject.read(block_size - 18)
+            # skip the remaining extra fields and the CRC32/ISIZE trailer
+            self._block = zlib.decompress(data[xlen - 6:-8], -15)
+            self._block_index = index
+
+    def readinto(self, buffer):
+        if self._position >= self._uncompressed[-1]:
+            return 0
+        index = bisect.bisect_right(self._uncompressed, self._position) - 1
+        self._load_block(index)
+        start = self._position - self._uncompressed[index]
+        size = min(len(buffer), len(self._block) - start)
+        buffer[:size] = self._block[start:start + size]
+        self._position += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._fileobject.close()
+        io.RawIOBase.close(self)
@@ -0,0 +1,107 @@
+"""
+Settings of a gbparse.Parser, see gbparse/config.cfg.
+
+The configuration file is read once per process and the settings are shared
+by all Parsers, which matters for short lived processes that create a Parser
+for a few records only.
+"""
+from __future__ import unicode_literals, absolute_import
+import os
+import configparser
+
+DEFAULT_PATH = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        'config.cfg'
+        )
+
+# settings per path of a configuration file, loaded once per process
+_loaded = {}
+# options of the default configuration file
+_defaults = None
+
+
+def _settings(config):
+    """
+    :return: dict of the settings of the Parser in a ConfigParser.
+    """
+    return {
+            'val_indent_short': config.getint('Default', 'val_indent_short'),
+            'val_indent_long': config.getint('Default', 'val_indent_long'),
+            'val_sep_short': config.getint('Default', 'val_sep_short'),
+            'val_sep_long': config.getint('Default', 'val_sep_long'),
+            'val_genome_end': config.get('Default', 'val_genome_end'),
+            'ncbi_nuccore_url': config.get(
+                'GenBank', 'ncbi_nuccore_url', fallback=None
+                ),
+            'fetch_retries': config.getint(
+                'GenBank', 'fetch_retries', fallback=3
+                ),
+            'fetch_backoff': config.getfloat(
+                'GenBank', 'fetch_backoff', fallback=0.5
+                ),
+            'fetch_timeout': config.getfloat(
+                'GenBank', 'fetch_timeout', fallback=60.
+                ),
+            }
+
+
+def _as_dict(config):
+    """
+    :return: the options of a ConfigParser as dict {section: {option: value}}.
+    """
+    return dict(
+            (_section, dict(config.items(_section, raw=True)))
+            for _section in config.sections()
+            )
+
+
+def _default_config():
+    """
+    :return: ConfigParser holding the default configuration.
+    """
+    global _defaults
+    if _defaults is None:
+        config = configparser.ConfigParser()
+        config.read(DEFAULT_PATH)
+        _defaults = _as_dict(config)
+    config = configparser.ConfigParser()
+    config.read_dict(_defaults)
+    return config
+
+
+def load_config(config=None):
+    """
+    Get the settings of a Parser.
+
+    Parameter:
+    ----------
+    :param config: None for the default configuration (gbparse/config.cfg),
+        the path of a configuration file, a configparser.ConfigParser or a
+        dict {section: {option: value}}, e.g.
+        {'GenBank': {'fetch_retries': 5}}. Options not given are taken from
+        the default configuration.
+
+    :return: dict of the settings. The settings loaded from a file are
+        shared, thus the dict must not be modified.
+    """
+    if config is None:
+        config = DEFAULT_PATH
+    if isinstance(config, str):
+        path = os.path.abspath(config)
+        try:
+            return _loaded[path]
+        except KeyError:
+            pass
+        parsed = _default_config()
+        if path != DEFAULT_PATH:
+            if not parsed.read(path):
+                raise IOError(
+                        'Cannot read the configuration file {0}'.format(path)
+                        )
+        _loaded[path] = _settings(parsed)
+        return _loaded[path]
+    parsed = _default_config()
+    if isinstance(config, configparser.RawConfigParser):
+        config = _as_dict(config)
+    parsed.read_dict(config)
+    return _settings(parsed)
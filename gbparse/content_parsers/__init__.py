@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 from . import default_parsers as dp
+from .columnar_parsers import FeatureColumns, columnar_feature_types
 
 default_parser = {
         'locus': {None: dp.locus},
@@ -31,3 +32,117 @@ default_parser = {
             },
         'origin': {None: dp.origin},
         }
+
+# Parsers of the FEATURES section that collect the features in a
+# gbparse.columnar.FeatureTable (genome['content']['features']), use e.g.
+# parser.content_parser = dict(parser.content_parser, features=columnar_parser)
+columnar_parser = dict(
+        [
+            (None, dp.simple_string),
+            ('source', dp.features_source),
+            ] + [
+            (_type, FeatureColumns(_type)) for _type in columnar_feature_types
+            ]
+        )
+
+# Keys of a genome written by the default parsers, used to parse sections on
+# demand (see gbparse.lazy). A key is given as a path, i.e. ('locus',) for
+# genome['locus'] or ('content', 'genes') for genome['content']['genes'], a
+# None in a path matches any key.
+default_parser_keys = {
+        'locus': {None: [('locus',)]},
+        'definition': {None: [('definition',)]},
+        'accession': {None: [('accession',)]},
+        'version': {None: [('version',)]},
+        'dblink': {None: [('dblink',)]},
+        'keywords': {None: [('keywords',)]},
+        'source': {
+            None: [('content', 'source')],
+            'organism': [('content', 'organism')]
+            },
+        'reference': {
+            None: [('reference',)],
+            'authors': [('reference',)],
+            'title': [('reference',)],
+            'journal': [('reference',)]
+            },
+        'comment': {None: [('comment',)]},
+        'features': {
+            None: [('features',)],
+            'source': [('content', None)],
+            'gene': [('content', 'genes')],
+            'cds': [('content', 'genes')],
+            'rrna': [('content', 'genes')],
+            'trna': [('content', 'genes')],
+            'ncrna': [('content', 'genes')],
+            'tmrna': [('content', 'genes')],
+            },
+        'origin': {None: [('content', 'sequence')]},
+        }
+
+
+class SectionSpan(object):
+    """
+    The raw bytes of a (sub)section, as collected by Parser.iter_parse_buffer.
+
+    The bytes are only decoded into content lines (see lines) if the content
+    parser needs them; content parsers with a from_bytes attribute are handed
+    the bytes directly, see call_content_parser.
+    """
+    __slots__ = ('data', 'sep')
+
+    def __init__(self, data, sep):
+        self.data = data
+        self.sep = sep
+
+    def lines(self):
+        """
+        :return: the content lines as handed to a content parser.
+        """
+        lines = self.data.decode('utf-8').split('\n')
+        if not lines[-1]:
+            lines.pop()
+        sep = self.sep
+        return [_line[sep:].strip() for _line in lines]
+
+    @property
+    def n_bytes(self):
+        return len(self.data)
+
+    def __len__(self):
+        return self.data.count(b'\n') + (not self.data.endswith(b'\n'))
+
+
+def call_content_parser(content_parser, content_lines, genome_content):
+    """
+    Run a content parser on the lines (or SectionSpan) of a (sub)section.
+    """
+    if isinstance(content_lines, SectionSpan):
+        from_bytes = getattr(content_parser, 'from_bytes', None)
+        if from_bytes is not None:
+            return from_bytes(content_lines.data, genome_content)
+        content_lines = content_lines.lines()
+    return content_parser(content_lines, genome_content)
+
+
+def store_section_content(genome_content, section, subsection, content):
+    """
+    Add the content returned by a content parser to the genome.
+
+    Content parsers either modify genome_content directly and return None or
+    return the content of the (sub)section, which is then stored under
+    genome_content[section][subsection] (subsection being None for the
+    content of the section itself).
+    """
+    if content is None:  # the content parser modified an existing object.
+        return None
+    if subsection is not None:  # make sure a section with subsections is a
+        # dictionary.
+        if not isinstance(genome_content[section], dict):
+            # need to make this section a dict
+            genome_content[section] = {None: genome_content[section]}
+        # add the subsection to the dict of the section
+        genome_content[section][subsection] = content
+    else:  # dealing with a section
+        genome_content[section] = {None: content}
+    return None
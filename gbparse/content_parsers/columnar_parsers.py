@@ -0,0 +1,49 @@
+from __future__ import unicode_literals, absolute_import
+from ..columnar import FeatureTable
+from .default_parsers import _assert_key
+from .qualifiers import tokenize, tokenize_bytes
+
+
+class FeatureColumns(object):
+    """
+    Content parser adding the features of one type (e.g. 'cds') as rows to
+    the gbparse.columnar.FeatureTable in genome_content['content']['features']
+    instead of creating a dict per feature.
+
+    The values of a qualifier occurring several times are joined by '; '.
+    """
+    def __init__(self, feature_type):
+        self.feature_type = feature_type
+
+    def __call__(self, content_lines, genome_content):
+        return self._add(tokenize(content_lines, True), genome_content)
+
+    def from_bytes(self, data, genome_content):
+        return self._add(tokenize_bytes(data, True), genome_content)
+
+    def _add(self, tokens, genome_content):
+        _assert_key(genome_content)
+        _assert_key(genome_content['content'], 'features', FeatureTable)
+        _location, qualifiers = tokens
+        for _key, _val in qualifiers.items():
+            if isinstance(_val, list):  # e.g. several /db_xref
+                qualifiers[_key] = '; '.join(_val)
+        locus = genome_content.get('locus')
+        genome_content['content']['features'].append(
+                locus.get(None) if isinstance(locus, dict) else None,
+                self.feature_type,
+                _location,
+                qualifiers
+                )
+        return None
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(self.__class__.__name__, self.feature_type)
+
+
+# feature keys that are collected by default in columnar mode
+columnar_feature_types = (
+        'gene', 'cds', 'mrna', 'rrna', 'trna', 'ncrna', 'tmrna', 'misc_rna',
+        'exon', 'intron', 'misc_feature', 'repeat_region', 'mobile_element',
+        'regulatory', 'rep_origin', 'mat_peptide', 'sig_peptide',
+        )
@@ -0,0 +1,65 @@
+from __future__ import unicode_literals, absolute_import
+from ..composition import SequenceStats, _encode, _gc_skew
+from ..sequence import PackedSequence
+from .default_parsers import _assert_key, _origin_sequence, \
+    _origin_sequence_from_bytes
+
+
+class SequenceStatsParser(object):
+    """
+    Content parser of the ORIGIN section computing the statistics of the
+    sequence (see gbparse.composition.SequenceStats) from the extracted
+    sequence bytes, before the sequence is stored. The statistics are stored
+    as dict in genome_content['content']['composition'].
+
+    Parameter:
+    ----------
+    :param k: Length of the counted k-mers, None to not count k-mers.
+    :param window: Size in bp of the windows of the GC skew (stored as list
+        under 'gc_skew'), None to skip the GC skew.
+    :param sequence: How the sequence is stored in
+        genome_content['content']['sequence']: 'str' (like the default
+        parser), 'bytes', '2bit' (a gbparse.sequence.PackedSequence) or
+        None to drop the sequence and keep the statistics only.
+    """
+    # ways to store the sequence
+    _sequence_types = ('str', 'bytes', '2bit')
+
+    def __init__(self, k=None, window=None, sequence='str'):
+        if sequence is not None and sequence not in self._sequence_types:
+            raise ValueError(
+                    'Unknown sequence type {0!r}, expected one of {1}'.format(
+                        sequence, ', '.join(self._sequence_types)
+                        )
+                    )
+        self.k = k
+        self.window = window
+        self.sequence = sequence
+
+    def __call__(self, content_lines, genome_content):
+        return self._add(_origin_sequence(content_lines), genome_content)
+
+    def from_bytes(self, data, genome_content):
+        return self._add(_origin_sequence_from_bytes(data), genome_content)
+
+    def _add(self, sequence, genome_content):
+        _assert_key(genome_content)
+        # the sequence is coded once for all statistics
+        codes = _encode(sequence)
+        summary = SequenceStats(self.k)._update_codes(codes).to_dict()
+        if self.window:
+            summary['gc_skew'] = _gc_skew(codes, self.window)
+        genome_content['content']['composition'] = summary
+        if self.sequence == 'str':
+            genome_content['content']['sequence'] = sequence.decode('ascii')
+        elif self.sequence == 'bytes':
+            genome_content['content']['sequence'] = sequence
+        elif self.sequence == '2bit':
+            genome_content['content']['sequence'] = \
+                PackedSequence.pack(sequence)
+        return None
+
+    def __repr__(self):
+        return '{0}(k={1!r}, window={2!r}, sequence={3!r})'.format(
+                self.__class__.__name__, self.k, self.window, self.sequence
+                )
@@ -1,4 +1,8 @@
 from __future__ import unicode_literals, print_function, absolute_import
+import functools
+from ..sequence import PackedSequence
+from .. import diagnostics
+from .qualifiers import tokenize, tokenize_bytes
 # we might need to pass en existing dict/list then return None
 # if return is None then do not further process content.
 
@@ -92,6 +96,28 @@ def source_organism(content_lines, genome_content):
     return None
 
 
+def source_organism_lineage(content_lines, genome_content):
+    """
+    Same as source_organism, also keeping the taxonomic ranks following the
+    name of the organism in genome_content['content']['lineage'], as
+    'organism' is replaced by the /organism of the source feature. Used by
+    gbparse.store.GenomeStore to query records by taxon.
+    """
+    source_organism(content_lines, genome_content)
+    genome_content['content']['lineage'] = _lineage(
+            genome_content['content']['organism']
+            )
+    return None
+
+
+def _lineage(organism):
+    """
+    :return: the taxonomic ranks of the organism as parsed by
+        source_organism (without the trailing '.').
+    """
+    return [x.rstrip('.') for x in organism[1:]]
+
+
 def reference(content_lines, genome_content):
     if 'reference' not in genome_content:
         genome_content['reference'] = [
@@ -140,73 +166,42 @@ def reference_journal(content_lines, genome_content):
     return None
 
 
-def _features_source_digest(_k, _v):
-    """
-    This function properly converts all entries in the FEATURE-source section
-    TODO: The proper conversions for each key, value pair need to be made
-    """
-    if _k == 'collection_date':
-        return _v.replace('"', '').lower()  # TODO
-    else:
-        return _v.replace('"', '').lower()  # TODO
-
-
-def _features_gene_or_cds_digest(_k, _v):
-    """
-    This function properly converts all entries in the FEATURE-gene and
-    FEATURE-cds sections
-    TODO: The proper conversions for each key, value pair need to be made
-    """
-    if _k == '':
-        return _v.replace('"', '').lower()  # TODO
-    else:
-        return _v.replace('"', '').lower()  # TODO
-
-
-def _get_gene(_content):
+def _get_gene(_location, _qualifiers):
     """
     Create a dictionary from the content of either the FEATURES-gene or the
-    FEATURES-cds sections using _features_gene_or_cds_digest to convert each
-    value contained in the content.
+    FEATURES-cds sections.
 
     Parameter:
     ----------
-    :param _content: List of strings each of the form 'some_key="some_value"'
-    :return: conversion of the _content to a dictionary.
+    :param _location: The location of the feature, e.g. 'complement(1..20)'.
+    :param _qualifiers: dict of the qualifiers, see
+        gbparse.content_parsers.qualifiers.tokenize.
+    :return: conversion of the feature to a dictionary.
     """
-    _gene = {}
-    for _line in _content:
-        if '=' in _line:
-            _key, _val = _line.split('=')
-            _gene[_key.lower()] = _features_gene_or_cds_digest(
-                    _key, _val
-                    )
-        else:
-            _gene['bp_range'] = _line
+    _gene = {'bp_range': _location}
+    _gene.update(_qualifiers)
     return _gene
 
 
 def features_source(content_lines, genome_content):
+    return _features_source(tokenize(content_lines, True), genome_content)
+
+
+def _features_source(tokens, genome_content):
     _assert_key(genome_content)
-    _content = ''.join(content_lines).split('/')
-    source_dict = {}
-    for _line in _content:
-        if '=' in _line:
-            _key, _val = _line.split('=')
-            source_dict[_key.lower()] = _features_source_digest(
-                    _key, _val
-                    )
-        else:
-            source_dict['bp_range'] = _line
+    source_dict = _get_gene(*tokens)
     genome_content['content'].update(source_dict)
     return None
 
 
 def features_gene(content_lines, genome_content):
+    return _features_gene(tokenize(content_lines, True), genome_content)
+
+
+def _features_gene(tokens, genome_content):
     _assert_key(genome_content)
     _assert_key(genome_content['content'], 'genes', _value_type=list)
-    _content = ''.join(content_lines).split('/')
-    _gene = _get_gene(_content)
+    _gene = _get_gene(*tokens)
     _gene['_done'] = False
     _gene['cds_included'] = False
     _gene['rna_included'] = False
@@ -218,18 +213,32 @@ def features_gene(content_lines, genome_content):
     return None
 
 
+def _locus_name(genome_content):
+    locus = genome_content.get('locus')
+    return locus.get(None) if isinstance(locus, dict) else None
+
+
 def features_cds(content_lines, genome_content):
+    return _features_cds(tokenize(content_lines, True), genome_content)
+
+
+def _features_cds(tokens, genome_content, paired=True):
     _assert_key(genome_content)
     _assert_key(genome_content['content'], 'genes', _value_type=list)
-    _content = ''.join(content_lines).split('/')
-    _gene = _get_gene(_content)
+    _gene = _get_gene(*tokens)
     _gene['cds_included'] = True  # will overwrite on update
     _gene['_done'] = True
-    if not len(genome_content['content']['genes']) or \
+    if not paired:  # the gene features are not parsed
+        _gene['rna_included'] = False
+        genome_content['content']['genes'].append(_gene)
+    elif not len(genome_content['content']['genes']) or \
             genome_content['content']['genes'][-1]['_done']:
-        print(
-                'There is a cds without preceding gene part.\nA new gene '
-                'will thus be added'
+        diagnostics.warn(
+                'cds_without_gene',
+                'There is a cds without preceding gene part in %s (%s). A '
+                'new gene will thus be added',
+                _locus_name(genome_content),
+                tokens[0]
                 )
         _gene['rna_included'] = False
         genome_content['content']['genes'].append(
@@ -241,18 +250,38 @@ def features_cds(content_lines, genome_content):
                 )
 
 
+def features_cds_unpaired(content_lines, genome_content):
+    """
+    features_cds for parses that drop the gene features (see
+    gbparse.projection.Projection): each CDS is added as a feature of its
+    own instead of being merged into the preceding gene.
+    """
+    return _features_cds(
+            tokenize(content_lines, True), genome_content, paired=False
+            )
+
+
 def features_rna(content_lines, genome_content):
+    return _features_rna(tokenize(content_lines, True), genome_content)
+
+
+def _features_rna(tokens, genome_content, paired=True):
     _assert_key(genome_content)
     _assert_key(genome_content['content'], 'genes', _value_type=list)
-    _content = ''.join(content_lines).split('/')
-    _gene = _get_gene(_content)
+    _gene = _get_gene(*tokens)
     _gene['rna_included'] = True  # will overwrite on update
     _gene['_done'] = True
-    if not len(genome_content['content']['genes']) or \
+    if not paired:  # the gene features are not parsed
+        _gene['cds_included'] = False
+        genome_content['content']['genes'].append(_gene)
+    elif not len(genome_content['content']['genes']) or \
             genome_content['content']['genes'][-1]['_done']:
-        print(
-                'There is a <x>RNA without preceding gene part.\nA new gene '
-                'will thus be added'
+        diagnostics.warn(
+                'rna_without_gene',
+                'There is a <x>RNA without preceding gene part in %s (%s). A '
+                'new gene will thus be added',
+                _locus_name(genome_content),
+                tokens[0]
                 )
         _gene['cds_included'] = False
         genome_content['content']['genes'].append(
@@ -264,13 +293,131 @@ def features_rna(content_lines, genome_content):
                 )
 
 
+def features_rna_unpaired(content_lines, genome_content):
+    """
+    features_rna for parses that drop the gene features, see
+    features_cds_unpaired.
+    """
+    return _features_rna(
+            tokenize(content_lines, True), genome_content, paired=False
+            )
+
+
+# replacements of the feature parsers pairing features with the preceding
+# gene, used if the gene features are not parsed
+unpaired_parser = {
+        features_cds: features_cds_unpaired,
+        features_rna: features_rna_unpaired,
+        }
+
+
+# characters to remove from the lines of the ORIGIN section
+_ORIGIN_DELETE = b'0123456789 \t'
+
+
+def _origin_sequence(content_lines):
+    """
+    Assemble the sequence of an ORIGIN section in one pass: the lines are
+    joined and the base counts and whitespace removed in bulk.
+
+    :return: the sequence as bytes
+    """
+    if content_lines and content_lines[0].startswith('ORIGIN'):
+        content_lines = content_lines[1:]
+    return ''.join(content_lines).encode('ascii').translate(
+            None, _ORIGIN_DELETE
+            )
+
+
+def _origin_sequence_from_bytes(data):
+    """
+    Same as _origin_sequence for the raw bytes of the ORIGIN section (see
+    gbparse.content_parsers.SectionSpan), which skips splitting it into
+    lines.
+    """
+    if data.startswith(b'ORIGIN'):
+        data = data[data.find(b'\n') + 1:] if b'\n' in data else b''
+    return data.translate(None, _ORIGIN_DELETE + b'\r\n')
+
+
 def origin(content_lines, genome_content):
     _assert_key(genome_content)
-    _content = ''.join(
-                    ' '.join(
-                        [' '.join(x.split(' ')[1:]) for x in content_lines]
-                    ).split(' ')
-                )
-    origin_dict = {'sequence': _content}
+    origin_dict = {
+            'sequence': _origin_sequence(content_lines).decode('ascii')
+            }
+    genome_content['content'].update(origin_dict)
+    return None
+
+
+def origin_bytes(content_lines, genome_content):
+    """
+    Same as origin but the sequence is stored as bytes.
+    """
+    _assert_key(genome_content)
+    origin_dict = {'sequence': _origin_sequence(content_lines)}
+    genome_content['content'].update(origin_dict)
+    return None
+
+
+def _origin_from_bytes(data, genome_content):
+    _assert_key(genome_content)
+    genome_content['content'].update({
+        'sequence': _origin_sequence_from_bytes(data).decode('ascii')
+        })
+    return None
+
+
+def _origin_bytes_from_bytes(data, genome_content):
+    _assert_key(genome_content)
+    genome_content['content'].update({
+        'sequence': _origin_sequence_from_bytes(data)
+        })
+    return None
+
+
+def origin_2bit(content_lines, genome_content):
+    """
+    Same as origin but the sequence is stored as a
+    gbparse.sequence.PackedSequence using 2 bits per base.
+    """
+    _assert_key(genome_content)
+    origin_dict = {
+            'sequence': PackedSequence.pack(_origin_sequence(content_lines))
+            }
     genome_content['content'].update(origin_dict)
     return None
+
+
+def _origin_2bit_from_bytes(data, genome_content):
+    _assert_key(genome_content)
+    genome_content['content'].update({
+        'sequence': PackedSequence.pack(_origin_sequence_from_bytes(data))
+        })
+    return None
+
+
+def _from_tokens(parse_tokens):
+    """
+    :return: parser of the raw bytes of a FEATURES subsection handing the
+        tokens of gbparse.content_parsers.qualifiers.tokenize_bytes to
+        parse_tokens.
+    """
+    def from_bytes(data, genome_content):
+        return parse_tokens(tokenize_bytes(data, True), genome_content)
+    return from_bytes
+
+
+# parsers of the raw section bytes, used by Parser.iter_parse_buffer
+origin.from_bytes = _origin_from_bytes
+origin_bytes.from_bytes = _origin_bytes_from_bytes
+origin_2bit.from_bytes = _origin_2bit_from_bytes
+features_source.from_bytes = _from_tokens(_features_source)
+features_gene.from_bytes = _from_tokens(_features_gene)
+features_cds.from_bytes = _from_tokens(_features_cds)
+features_rna.from_bytes = _from_tokens(_features_rna)
+features_cds_unpaired.from_bytes = _from_tokens(
+        functools.partial(_features_cds, paired=False)
+        )
+features_rna_unpaired.from_bytes = _from_tokens(
+        functools.partial(_features_rna, paired=False)
+        )
@@ -0,0 +1,317 @@
+from __future__ import unicode_literals, absolute_import
+# Tokenizer of the content of the FEATURES subsections (gene, CDS, ...).
+import re
+from operator import itemgetter
+try:
+    from functools import lru_cache
+except ImportError:  # python 2, the layouts are parsed each time
+    def lru_cache(maxsize):
+        return lambda fct: fct
+
+# qualifiers whose values are wrapped without spaces
+JOIN_WITHOUT_SPACE = frozenset(['translation'])
+
+# indentation of the continuation lines of a subsection
+_INDENT = '\n' + ' ' * 21
+_FIRST_QUALIFIER = _INDENT + '/'
+_LINE_BREAK = re.compile('[ \\t\\r]*\\n[ \\t]*')
+
+# number of layouts of the qualifiers cached, see _layout
+_MAX_LAYOUTS = 4096
+
+
+def _add(qualifiers, key, value):
+    """
+    Add a qualifier, joining the lines of its value.
+    """
+    if '\n' in value:
+        value = value.replace('\n', '' if key in JOIN_WITHOUT_SPACE else ' ')
+    if key not in qualifiers:
+        qualifiers[key] = value
+    elif isinstance(qualifiers[key], list):
+        qualifiers[key].append(value)
+    else:  # the qualifier occurs several times, e.g. /db_xref
+        qualifiers[key] = [qualifiers[key], value]
+    return None
+
+
+def _tokenize_text(text, lower):
+    """
+    Tokenize the lines of a FEATURES subsection joined by '\n', see
+    tokenize.
+    """
+    if text.startswith('/'):  # no location
+        location, start = '', 1
+    else:
+        start = text.find('\n/')
+        if start < 0:
+            return text.replace('\n', ''), {}
+        location = text[:start]
+        if '\n' in location:
+            location = location.replace('\n', '')
+        start += 2
+    text = text[start:]
+    if lower:
+        text = text.lower()
+    if '""' in text:  # escaped quotes
+        return location, _split_quoted(text)
+    qualifiers = {}
+    # Without escaped quotes a quoted value holds no quote: it ends at the
+    # next '"\n/' and may contain '\n/'. Splitting there gives each quoted
+    # value as one slice, unquoted qualifiers in between are split at '\n/'.
+    pieces = text.split('"\n/')
+    if pieces[-1].endswith('"'):  # the closing quote of the last value
+        pieces[-1] = pieces[-1][:-1]
+    for piece in pieces:
+        key, quoted, value = piece.partition('="')
+        if not quoted or '\n/' in key:  # unquoted values or flags
+            if not quoted and piece.endswith('='):
+                # the line of an opening quote ended right after it
+                return location, _split_quoted(text)
+            unquoted = key.split('\n/')
+            if quoted:
+                key = unquoted.pop()
+            for _piece in unquoted:
+                _key, _, _value = _piece.partition('=')
+                _add(qualifiers, _key, _value)
+            if not quoted:
+                continue
+        # the same as _add, inlined as this runs for each qualifier
+        if '\n' in value:
+            value = value.replace(
+                    '\n', '' if key in JOIN_WITHOUT_SPACE else ' '
+                    )
+        if key not in qualifiers:
+            qualifiers[key] = value
+        elif isinstance(qualifiers[key], list):
+            qualifiers[key].append(value)
+        else:  # the qualifier occurs several times, e.g. /db_xref
+            qualifiers[key] = [qualifiers[key], value]
+    return location, qualifiers
+
+
+def _split_layout(text, line_break, n_lines=None):
+    """
+    Split the qualifiers of a FEATURES subsection if all of them have quoted
+    values without escaped quotes (the usual case), else return None.
+
+    The text is split at the quotes: the values are every other piece, the
+    pieces in between hold the keys. Features of the same kind share these
+    keys, their layout is thus parsed once, see _layout.
+
+    Parameter:
+    ----------
+    :param text: The qualifiers without the '/' of the first one.
+    :param line_break: The separator of the lines, '\\n' or _INDENT for the
+        raw text, whose continuation lines must then be indented by exactly
+        21 spaces.
+    :param n_lines: The number of lines of the text, if known.
+    """
+    pieces = text.split('"')
+    if pieces[-1]:
+        return None
+    layout = _layout('"'.join(pieces[:-1:2]), line_break)
+    if layout is None:
+        return None
+    keys, repeated, join_without_space = layout
+    n_keys = len(pieces) // 2
+    if n_lines == n_keys:  # one line per qualifier
+        return _build(keys, repeated, pieces)
+    if n_lines is None:
+        joined = '"'.join(pieces[1::2])
+        if '\n' in joined and line_break != '\n' and (
+                joined.count('\n') != joined.count(line_break) or
+                ' \n' in joined or line_break + ' ' in joined
+                ):  # unusual indentation or trailing whitespace
+            return None
+        n_lines = n_keys + joined.count('\n')
+    # line breaks within the values
+    n_breaks = n_lines - n_keys
+    if n_breaks:
+        for _index in join_without_space:
+            value = pieces[_index]
+            if '\n' in value:
+                n_breaks -= value.count('\n')
+                pieces[_index] = value.replace(line_break, '')
+        if n_breaks:
+            pieces[1::2] = '"'.join(pieces[1::2]).replace(
+                    line_break, ' '
+                    ).split('"')
+    return _build(keys, repeated, pieces)
+
+
+def _build(keys, repeated, pieces):
+    """
+    Build the qualifiers from the (key, index) pairs of a layout and the
+    pieces of the text split at the quotes.
+    """
+    qualifiers = {}
+    for key, index in keys:
+        qualifiers[key] = pieces[index]
+    for key, values in repeated:
+        qualifiers[key] = list(values(pieces))
+    return qualifiers
+
+
+@lru_cache(maxsize=_MAX_LAYOUTS)
+def _layout(outside, line_break):
+    """
+    Parse the keys of quoted qualifiers from the text around their values,
+    e.g. 'gene="\\n/db_xref="\\n/db_xref=' for
+    'gene="a"\\n/db_xref="b"\\n/db_xref="c"'.
+
+    Features of the same kind share their layout, the _MAX_LAYOUTS layouts
+    used most recently are cached (shared by the threads and Parsers of the
+    process, the cache is thread safe).
+
+    :return: None if the text does not consist of such keys only, else
+        the (key, index) pairs of the keys and the index of their (first)
+        value in the pieces of the text split at the quotes, the (key,
+        itemgetter) pairs of the keys occurring several times (e.g.
+        /db_xref), the itemgetter returning all their values from the
+        pieces, and the indices of the pieces holding the values in
+        JOIN_WITHOUT_SPACE.
+    """
+    n_keys = outside.count('"') + 1
+    if not outside.endswith('=') or outside.count('=') != n_keys or \
+            outside.count('\n') != n_keys - 1:
+        return None
+    keys = outside[:-1].split('="{0}/'.format(line_break))
+    if len(keys) != n_keys:
+        return None
+    indices = {}
+    for _index, _key in enumerate(keys):
+        indices.setdefault(_key, []).append(2 * _index + 1)
+    return (
+            tuple(
+                (_key, _indices[0]) for _key, _indices in indices.items()
+                ),
+            tuple(
+                (_key, itemgetter(*_indices))
+                for _key, _indices in indices.items() if len(_indices) > 1
+                ),
+            tuple(
+                2 * _i + 1 for _i, _k in enumerate(keys)
+                if _k in JOIN_WITHOUT_SPACE
+                ),
+            )
+
+
+def _split_quoted(text):
+    """
+    Split the qualifiers of a FEATURES subsection at each '\n/' that is not
+    part of a quoted value, counting the quotes of each value. Used by
+    _tokenize_text for values with escaped quotes ("") and opening quotes
+    at the end of a line.
+    """
+    qualifiers = {}
+    pending = None
+    for piece in text.split('\n/'):
+        if pending is not None:  # the line was part of a quoted value
+            piece = '{0}\n/{1}'.format(pending, piece)
+            pending = None
+        key, _, value = piece.partition('=')
+        if value[:1] == '"':
+            # a value ending with a quote is complete if the number of its
+            # quotes is even
+            if not value.endswith('"', 1) or value.count('"') % 2:
+                pending = piece  # the quoted value continues
+                continue
+            value = value[1:-1]
+            if '""' in value:
+                value = value.replace('""', '"')
+        if '\n' in value:
+            value = value.replace(
+                    '\n', '' if key in JOIN_WITHOUT_SPACE else ' '
+                    )
+        if key not in qualifiers:
+            qualifiers[key] = value
+        elif isinstance(qualifiers[key], list):
+            qualifiers[key].append(value)
+        else:  # the qualifier occurs several times, e.g. /db_xref
+            qualifiers[key] = [qualifiers[key], value]
+    if pending is not None:  # unterminated quote
+        key, _, value = pending.partition('=')
+        qualifiers[key] = value[1:].replace('\n', ' ')
+    return qualifiers
+
+
+def tokenize(content_lines, lower=False):
+    """
+    Split the content lines of a FEATURES subsection into the location and
+    the qualifiers.
+
+    A qualifier starts with a line beginning with '/', unless the line is
+    part of a quoted value, thus values may contain '/' and '=' (e.g. URLs in
+    a /note). The lines of a value are joined by a space, except for the
+    qualifiers in JOIN_WITHOUT_SPACE (e.g. /translation), the enclosing
+    quotes are removed and escaped quotes ("") unescaped. Qualifiers without
+    value (e.g. /pseudo) get the value ''. The values of a qualifier that
+    occurs several times (e.g. /db_xref) are collected in a list.
+
+    The lines are joined once and split at the quotes, each quoted value,
+    e.g. a long /translation, is thus a single slice of the joined text.
+    The pieces in between the values hold the keys (the layout), which are
+    the same for the features of the same kind: each layout is parsed once
+    and cached, the qualifiers are then built from the values without
+    scanning them. Other subsections, e.g. with unquoted values or escaped
+    quotes, are split at the closing quotes ('"' followed by a line starting
+    with '/') and, if values hold escaped quotes, at each line starting with
+    '/' while counting the quotes.
+
+    Parameter:
+    ----------
+    :param content_lines: The stripped lines of the subsection, the first one
+        starting with the location.
+    :param lower: Convert the keys and values (not the location) to lower
+        case.
+
+    :return: the location and a dict of the qualifiers.
+    """
+    text = '\n'.join(content_lines)
+    location, start, qualifiers = text.partition('\n/')
+    if start and '\n' not in location and not location.startswith('/'):
+        qualifiers = _split_layout(
+                qualifiers.lower() if lower else qualifiers, '\n',
+                len(content_lines) - 1
+                )
+        if qualifiers is not None:
+            return location, qualifiers
+    return _tokenize_text(text, lower)
+
+
+def tokenize_bytes(data, lower=False):
+    """
+    Same as tokenize for the raw bytes of a FEATURES subsection (including
+    the feature key on the first line, see gbparse.content_parsers
+    .SectionSpan).
+
+    Instead of splitting the content into lines and stripping each of them,
+    the qualifiers are split with their indentation (which then ends up in
+    the layouts, see tokenize), only the values spanning lines are
+    unindented. Otherwise, e.g. with unusual indentation or trailing
+    whitespace, the indentation of all lines is removed at once.
+    """
+    text = data.decode('utf-8')
+    if '\r' not in text and '\t' not in text:
+        # usually the first line holds the feature key and the location, the
+        # qualifiers are then split with their indentation left in place
+        end = text.find('\n')
+        location = text[:end].split(None, 1)
+        if len(location) == 2 and location[1][0] != '/' and \
+                text.startswith(_FIRST_QUALIFIER, end):
+            qualifiers = text[end + len(_FIRST_QUALIFIER):].rstrip()
+            qualifiers = _split_layout(
+                    qualifiers.lower() if lower else qualifiers, _INDENT
+                    )
+            if qualifiers is not None:
+                return location[1].rstrip(), qualifiers
+    text = text.replace(_INDENT, '\n')
+    if '\r' in text or '\n ' in text or ' \n' in text or '\t' in text:
+        # line breaks with unusual indentation or trailing whitespace
+        text = _LINE_BREAK.sub('\n', text)
+    # the first line starts with the feature key
+    key, space, text = text.strip().partition(' ')
+    if '\n' in key:  # the location starts on the next line
+        text = key[key.find('\n'):] + space + text
+    return _tokenize_text(text.lstrip(' '), lower)
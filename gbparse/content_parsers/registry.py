@@ -0,0 +1,202 @@
+"""
+Registry of the content parsers used by a gbparse.Parser.
+
+Each Parser holds its own ContentParsers, a copy of the default parsers
+(see gbparse.content_parsers.default_parser), thus changing the parsers of
+one Parser does not affect any other Parser in the process.
+
+Besides callables, a content parser can be given as a reference of the form
+'module:attribute' (e.g. 'mypackage.parsers:parse_comment'), which is only
+imported once the parser is used. References can be sent to worker processes
+(see Parser.parse_parallel) regardless of how the processes are started.
+
+Installed packages can register content parsers as entry points of the group
+'gbparse.content_parsers', named after the section (e.g. 'comment') or the
+section and subsection (e.g. 'features.mobile_element'):
+
+    entry_points={
+        'gbparse.content_parsers': [
+            'comment = mypackage.parsers:parse_comment',
+            ],
+        }
+
+Such a parser is added for a (sub)section without content parser and
+replaces a default parser, while parsers set on a Parser take precedence.
+"""
+from __future__ import absolute_import, unicode_literals
+import logging
+import importlib
+
+from . import default_parser, default_parser_keys
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'gbparse.content_parsers'
+
+# references resolved in this process
+_resolved = {}
+# content parsers registered as entry points, loaded once per process
+_plugins = None
+
+
+class PluginException(Exception):
+    pass
+
+
+def resolve(reference):
+    """
+    Get the object a reference of the form 'module:attribute' (the attribute
+    may be a dotted path, e.g. 'module:Class.method') points to. Any other
+    object is returned as is.
+    """
+    if not isinstance(reference, str):
+        return reference
+    try:
+        return _resolved[reference]
+    except KeyError:
+        pass
+    module_name, sep, attributes = reference.partition(':')
+    if not sep or not module_name or not attributes:
+        raise PluginException(
+                'Invalid content parser reference {0!r}, expected '
+                '"module:attribute"'.format(reference)
+                )
+    try:
+        obj = importlib.import_module(module_name)
+        for _attribute in attributes.split('.'):
+            obj = getattr(obj, _attribute)
+    except (ImportError, AttributeError) as e:
+        raise PluginException(
+                'Cannot load the content parser {0!r}: {1}'.format(
+                    reference, e
+                    )
+                )
+    _resolved[reference] = obj
+    return obj
+
+
+def _entry_points(group):
+    """
+    :return: list of (name, reference) of the entry points in group.
+
+    importlib.metadata is only imported here, on the first parse, as
+    importing it takes longer than the rest of the startup of a Parser.
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # python < 3.8
+        try:
+            from importlib_metadata import entry_points
+        except ImportError:
+            logger.debug('importlib.metadata is missing, no plugins loaded')
+            return []
+    try:
+        selected = entry_points(group=group)
+    except TypeError:  # python < 3.10, a dict of all groups
+        selected = entry_points().get(group, ())
+    return [
+            # drop extras, e.g. 'module:function [extra]'
+            (_entry_point.name, _entry_point.value.partition('[')[0].strip())
+            for _entry_point in selected
+            ]
+
+
+def plugin_parsers():
+    """
+    :return: the content parsers registered as entry points (references) in
+        the form {section: {subsection: reference}}.
+    """
+    global _plugins
+    if _plugins is None:
+        plugins = {}
+        for name, reference in _entry_points(ENTRY_POINT_GROUP):
+            section, _, subsection = name.lower().partition('.')
+            plugins.setdefault(section, {})[subsection or None] = reference
+            logger.debug(
+                    'Content parser plugin %s: %s', name, reference
+                    )
+        _plugins = plugins
+    return _plugins
+
+
+class ContentParsers(dict):
+    """
+    The content parsers of a Parser in the form
+    {section: {subsection: content parser}}, subsection being None for the
+    parser of the section itself. The parsers are callables or references
+    (see resolve).
+
+    The dicts of the sections are copied, both on creation and when sections
+    are set or updated, such that changes to a ContentParsers never affect
+    the parsers it was created from or given, and vice versa.
+
+    Parameter:
+    ----------
+    :param parsers: dict {section: {subsection: content parser}}, defaults
+        to the default parsers.
+    """
+    def __init__(self, parsers=None):
+        if parsers is None:
+            parsers = default_parser
+        super(ContentParsers, self).__init__(
+                (_section, dict(_subsections))
+                for _section, _subsections in parsers.items()
+                )
+
+    def __setitem__(self, section, subsections):
+        super(ContentParsers, self).__setitem__(section, dict(subsections))
+
+    def update(self, *args, **kwargs):
+        for section, subsections in dict(*args, **kwargs).items():
+            self[section] = subsections
+
+    def setdefault(self, section, subsections=None):
+        if section not in self:
+            self[section] = {} if subsections is None else subsections
+        return self[section]
+
+    def register(self, section, subsection, content_parser):
+        """
+        Set the content parser of a (sub)section.
+
+        Parameter:
+        ----------
+        :param section: Name of the section in lower case, e.g. 'comment'.
+        :param subsection: Name of the subsection in lower case or None for
+            the section itself.
+        :param content_parser: Callable or reference (see resolve).
+        """
+        self.setdefault(section, {})[subsection] = content_parser
+
+    def copy(self):
+        return self.__class__(self)
+
+    def compile(self):
+        """
+        Resolve the content parser of each (sub)section once.
+
+        :return: dict {(section, subsection): (content parser, keys)}, keys
+            being the genome keys the parser writes to (see
+            gbparse.content_parsers.default_parser_keys), any key for a
+            custom parser.
+        """
+        dispatch = {}
+        for section, subsections in self.items():
+            for subsection, content_parser in subsections.items():
+                dispatch[(section, subsection)] = content_parser
+        for section, subsections in plugin_parsers().items():
+            defaults = default_parser.get(section, {})
+            for subsection, reference in subsections.items():
+                current = dispatch.get((section, subsection))
+                if current is None or \
+                        current is defaults.get(subsection):
+                    dispatch[(section, subsection)] = reference
+        for (section, subsection), reference in dispatch.items():
+            content_parser = resolve(reference)
+            if content_parser is not None and content_parser is \
+                    default_parser.get(section, {}).get(subsection):
+                keys = default_parser_keys[section][subsection]
+            else:
+                keys = [()]
+            dispatch[(section, subsection)] = (content_parser, keys)
+        return dispatch
@@ -0,0 +1,162 @@
+from __future__ import unicode_literals, absolute_import
+# Warnings issued while parsing, see Parser.diagnostics.
+import logging
+import threading
+
+logger = logging.getLogger('gbparse')
+
+
+class DiagnosticException(Exception):
+    """
+    Raised instead of a warning in strict mode.
+    """
+    pass
+
+
+class Diagnostics(object):
+    """
+    Collects the warnings of the parses run by a Parser.
+
+    Each warning has a kind (e.g. 'cds_without_gene') and is counted per
+    (kind, section, subsection). Identical messages are logged only once and
+    at most max_messages different messages are logged per (kind, section,
+    subsection), the rest is only counted. At the end of each parse a
+    summary of the counts is logged if there were any warnings.
+
+    Messages are formatted lazily, i.e. only if they are actually logged.
+
+    Parameter:
+    ----------
+    :param strict: Raise a DiagnosticException instead of issuing a warning.
+    :param max_messages: Number of messages logged per (kind, section,
+        subsection), None for no limit.
+    :param level: Logging level of the warnings and the summary.
+    :param logger: logging.Logger to use, defaults to the 'gbparse' logger.
+    :param summary: Log a summary at the end of each parse.
+    """
+    def __init__(self, strict=False, max_messages=10, level=logging.WARNING,
+                 logger=logger, summary=True):
+        self.strict = strict
+        self.max_messages = max_messages
+        self.level = level
+        self.logger = logger
+        self.summary = summary
+        self.counts = {}
+        self._logged = {}
+
+    def warn(self, kind, message, *args):
+        """
+        Issue a warning in the current (sub)section, message % args is the
+        text of the warning.
+        """
+        _, section, subsection = context()
+        key = (kind, section, subsection)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if self.strict:
+            raise DiagnosticException(
+                    '{0} ({1})'.format(message % args, _key_name(key))
+                    )
+        logged = self._logged.get(key)
+        if self.max_messages is not None and \
+                len(logged or ()) >= self.max_messages:
+            return None
+        if not self.logger.isEnabledFor(self.level):
+            return None
+        text = message % args
+        if logged is None:
+            logged = self._logged[key] = set()
+        elif text in logged:  # duplicate
+            return None
+        logged.add(text)
+        if self.max_messages is not None and \
+                len(logged) == self.max_messages:
+            text += ' (further warnings of this kind are only counted)'
+        self.logger.log(self.level, text)
+        return None
+
+    def mark(self):
+        """
+        :return: snapshot of the counts, see log_summary.
+        """
+        return dict(self.counts)
+
+    def since(self, mark=None):
+        """
+        :return: dict of the warning counts since the snapshot mark (all if
+            None), keyed by 'kind in section.subsection'.
+        """
+        mark = mark or {}
+        return dict(
+                (_key_name(_k), _n - mark.get(_k, 0))
+                for _k, _n in self.counts.items()
+                if _n > mark.get(_k, 0)
+                )
+
+    def log_summary(self, mark=None):
+        """
+        Log the number of warnings of each kind since the snapshot mark.
+        """
+        counts = self.since(mark)
+        if counts and self.summary and self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                    self.level,
+                    'Parsing issued %d warning(s): %s',
+                    sum(counts.values()),
+                    ', '.join(
+                        '{0}: {1}'.format(_k, counts[_k])
+                        for _k in sorted(counts)
+                        )
+                    )
+        return None
+
+    def merge(self, counts):
+        """
+        Add the counts of another Diagnostics (e.g. of a worker process).
+        """
+        for key, count in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        return None
+
+    def reset(self):
+        self.counts = {}
+        self._logged = {}
+        return None
+
+
+def _key_name(key):
+    kind, section, subsection = key
+    if section is None:
+        return kind
+    elif subsection is None:
+        return '{0} in {1}'.format(kind, section)
+    return '{0} in {1}.{2}'.format(kind, section, subsection)
+
+
+# Diagnostics used outside of a parse, e.g. by a content parser called
+# directly.
+default_diagnostics = Diagnostics()
+
+_local = threading.local()
+
+
+def set_context(diagnostics, section, subsection):
+    """
+    Set the Diagnostics and the (sub)section of the content parser called
+    next in this thread.
+    """
+    _local.context = (diagnostics, section, subsection)
+
+
+def context():
+    """
+    :return: the Diagnostics, section and subsection of the content parser
+        running in this thread.
+    """
+    return getattr(_local, 'context', (default_diagnostics, None, None))
+
+
+def warn(kind, message, *args):
+    """
+    Issue a warning from a content parser, see Diagnostics.warn.
+    """
+    return context()[0].warn(kind, message, *args)
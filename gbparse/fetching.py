@@ -0,0 +1,167 @@
+from __future__ import absolute_import
+# Concurrent fetching of genomes from ncbi (python 3 only): the blocking
+# requests run in a thread pool, scheduled by an asyncio event loop.
+import io
+import asyncio
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from urllib3 import exceptions as urllib3_exceptions
+from .sinks import open_sink
+
+# HTTP status codes worth retrying
+_TRANSIENT_STATUS = (429, 500, 502, 503, 504)
+# errors worth retrying: the body is read from response.raw, thus errors
+# while receiving it are raised by urllib3 instead of requests.
+_TRANSIENT_ERRORS = (
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+        urllib3_exceptions.ProtocolError,
+        urllib3_exceptions.ReadTimeoutError,
+        urllib3_exceptions.DecodeError,
+        )
+
+
+class _TransientError(Exception):
+    pass
+
+
+class RateLimiter(object):
+    """
+    Space out calls to wait() such that at most rate calls happen per second.
+    """
+    def __init__(self, rate):
+        self._interval = 1. / rate if rate else 0.
+        self._next = 0.
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self._interval
+
+
+def _batches(genome_ids, batch_size):
+    for i in range(0, len(genome_ids), batch_size):
+        yield genome_ids[i:i + batch_size]
+
+
+def _fetch_batch(session, parser, url, timeout, options):
+    """
+    Download a batch of genomes and parse the response while it arrives.
+    Runs in a worker thread.
+    """
+    with session.get(url, stream=True, timeout=timeout) as response:
+        if response.status_code in _TRANSIENT_STATUS:
+            raise _TransientError(
+                    'ncbi responded with {0}'.format(response.status_code)
+                    )
+        if response.status_code != 200:
+            raise parser.FetchException(
+                    'The provided genome id(s) is/are not valid. No content '
+                    'could be fetched from ncbi (status {0}).'.format(
+                        response.status_code
+                        )
+                    )
+        response.raw.decode_content = True
+        # let the text wrapper see the end of the stream instead of a closed
+        # file once the complete body is read.
+        response.raw.auto_close = False
+        # the batch is only returned once its complete body is parsed, a
+        # failed attempt is retried from scratch with a new parser.
+        return list(parser.iter_parse(
+                io.TextIOWrapper(
+                    response.raw,
+                    encoding=response.encoding or 'utf-8'
+                    ),
+                **options
+                ))
+
+
+async def fetch_many(
+        parser, genome_id, batch_size=200, concurrency=3, rate=3.0,
+        save_to=None, fct=None, *args, **kwargs):
+    """
+    Coroutine version of Parser.fetch_many, to be used from a running event
+    loop. The first argument is the Parser whose configuration and content
+    parsers are used, see Parser.fetch_many for the other arguments.
+
+    The requests are made with requests (blocking) in a pool of concurrency
+    threads, each thread also parsing its response. The event loop only
+    schedules them, spaces them out (RateLimiter) and waits for the retries.
+    At most 2 * concurrency batches are scheduled at a time: the next batch
+    is only scheduled once the genomes of the first one are handled, thus
+    the number of pending requests and parsed genomes held in memory does
+    not grow with the number of ids.
+    """
+    genome_ids = [str(_id) for _id in parser._genome_id_list(genome_id)]
+    options = parser._pop_parse_options(kwargs)
+    loop = asyncio.get_running_loop()
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=concurrency
+            )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def fetch_batch(batch):
+        url = parser.ncbi_nuccore_url.format(','.join(batch))
+        async with semaphore:
+            for attempt in range(parser.fetch_retries + 1):
+                await limiter.wait()
+                try:
+                    return await loop.run_in_executor(
+                            executor,
+                            _fetch_batch,
+                            session,
+                            parser._spawn(),
+                            url,
+                            parser.fetch_timeout,
+                            options
+                            )
+                except _TRANSIENT_ERRORS + (_TransientError,) as error:
+                    if attempt == parser.fetch_retries:
+                        raise parser.FetchException(
+                                'Fetching {0} failed after {1} attempts: '
+                                '{2}'.format(url, attempt + 1, error)
+                                )
+                    await asyncio.sleep(parser.fetch_backoff * 2 ** attempt)
+
+    batches = _batches(genome_ids, batch_size)
+    tasks = collections.deque()
+
+    def schedule():
+        batch = next(batches, None)
+        if batch is not None:
+            tasks.append(asyncio.ensure_future(fetch_batch(batch)))
+
+    if save_to is None:
+        parsed_genomes = []
+    try:
+        for _ in range(2 * concurrency):
+            schedule()
+        with open_sink(save_to) as sink:
+            # handle the genomes in the order of the batches
+            while tasks:
+                genomes = await tasks[0]
+                tasks.popleft()
+                schedule()
+                for genome in genomes:
+                    parser._handle_genome(genome, sink, fct, args, kwargs)
+                    if save_to is None:
+                        parsed_genomes.append(genome)
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False)
+        session.close()
+    if save_to is None:
+        return parsed_genomes
+    return None
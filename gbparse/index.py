@@ -0,0 +1,132 @@
+from __future__ import unicode_literals, absolute_import
+import io
+import os
+import json
+import mmap
+from .records import iter_record_keys, iter_buffer_record_keys
+from .compression import open_path, compression_of
+
+INDEX_SUFFIX = '.gbidx'
+
+
+class RecordIndex(object):
+    """
+    Byte offset index of the records in a GenBank flatfile.
+
+    Each record is stored as an (offset, length) pair and can be looked up by
+    its LOCUS name, its accession(s), its version and its GI number.
+    """
+    def __init__(self, path, records=None, keys=None, size=None, mtime=None):
+        self.path = path
+        self.records = records if records is not None else []
+        self.keys = keys if keys is not None else {}
+        self.size = size
+        self.mtime = mtime
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def lookup(self, key):
+        """
+        :return: (offset, length) of the record identified by key.
+        :raises: KeyError if no record is known under key.
+        """
+        return tuple(self.records[self.keys[key]])
+
+    def is_stale(self):
+        """
+        Check whether the indexed file changed since the index was built.
+        """
+        _stat = os.stat(self.path)
+        return _stat.st_size != self.size or _stat.st_mtime != self.mtime
+
+    def save(self, index_path=None):
+        with open(index_path or self.path + INDEX_SUFFIX, 'w') as f_out:
+            json.dump(
+                    {
+                        'size': self.size,
+                        'mtime': self.mtime,
+                        'records': self.records,
+                        'keys': self.keys,
+                    },
+                    f_out
+                    )
+        return None
+
+    @classmethod
+    def load(cls, path, index_path=None):
+        with open(index_path or path + INDEX_SUFFIX, 'r') as f_in:
+            content = json.load(f_in)
+        return cls(
+                path,
+                records=content['records'],
+                keys=content['keys'],
+                size=content['size'],
+                mtime=content['mtime']
+                )
+
+    @classmethod
+    def build(cls, path, genome_end='//'):
+        """
+        Scan the file at path for the records and their identifiers. For
+        compressed files the offsets refer to the uncompressed content.
+
+        Uncompressed files are memory mapped and only their LOCUS, ACCESSION,
+        VERSION and genome_end lines are read, see iter_buffer_record_keys.
+        """
+        _stat = os.stat(path)
+        index = cls(path, size=_stat.st_size, mtime=_stat.st_mtime)
+        genome_end = genome_end.encode('ascii')
+        if compression_of(path) is None and _stat.st_size:
+            with io.open(path, 'rb') as fobj:
+                buffer = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    index._add_records(
+                            iter_buffer_record_keys(buffer, genome_end)
+                            )
+                finally:
+                    buffer.close()
+        else:
+            with open_path(path) as fobj:
+                index._add_records(iter_record_keys(fobj, genome_end))
+        return index
+
+    def _add_records(self, records):
+        """
+        Add the (offset, length, keys) tuples of iter_record_keys.
+        """
+        for offset, length, keys in records:
+            for key in keys:
+                # the first record wins, as would a sequential search
+                self.keys.setdefault(key, len(self.records))
+            self.records.append([offset, length])
+        return None
+
+
+def build_index(path, index_path=None, genome_end='//'):
+    """
+    Build the record index of a GenBank flatfile and save it to a sidecar file
+    (by default path + '.gbidx').
+
+    :return: RecordIndex
+    """
+    index = RecordIndex.build(path, genome_end=genome_end)
+    index.save(index_path)
+    return index
+
+
+def load_index(path, index_path=None, genome_end='//'):
+    """
+    Load the record index of a GenBank flatfile from its sidecar file. The
+    index is (re-)built if the sidecar file is missing or outdated.
+
+    :return: RecordIndex
+    """
+    if os.path.exists(index_path or path + INDEX_SUFFIX):
+        index = RecordIndex.load(path, index_path)
+        if not index.is_stale():
+            return index
+    return build_index(path, index_path, genome_end=genome_end)
@@ -0,0 +1,363 @@
+from __future__ import unicode_literals, absolute_import
+from .content_parsers import store_section_content, call_content_parser
+from .diagnostics import default_diagnostics, set_context
+
+
+# value of the keys of a LazyGenome whose content parsers did not run yet
+_PENDING = object()
+
+
+def _overlap(path_a, path_b):
+    """
+    Check whether two key paths can refer to the same key. A None in a path
+    matches any key and the empty path matches everything.
+    """
+    for _a, _b in zip(path_a, path_b):
+        if _a is None or _b is None:
+            return True
+        if _a != _b:
+            return False
+    return True
+
+
+def deferrable(keys):
+    """
+    Check whether all the key paths a content parser writes to are known,
+    i.e. whether a LazyGenome can hold them before the parser runs.
+    """
+    return all(_k and None not in _k[:2] for _k in keys)
+
+
+class _SectionGroup(object):
+    """
+    Consecutive (sub)sections of a record whose content parsers write to the
+    same keys of a genome.
+    """
+    __slots__ = ('keys', 'sections', '_declared', '_deferrable')
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.sections = []
+        # both are checked on each access to a LazyGenome
+        self._declared = None
+        self._deferrable = None
+
+    def declared(self):
+        """
+        :return: list of the key paths of the (nested) keys the group is
+            known to write, e.g. ('content',) and ('content', 'genes') for
+            ('content', 'genes'). Only the first two levels are considered.
+        """
+        if self._declared is None:
+            paths = []
+            for _k in self.keys:
+                for i in range(1, min(len(_k), 2) + 1):
+                    if None in _k[:i]:
+                        break
+                    paths.append(_k[:i])
+            self._declared = paths
+        return self._declared
+
+    def deferrable(self):
+        """
+        Check whether all the keys the group writes to are known, i.e.
+        whether a LazyGenome can hold them before the group is parsed.
+        """
+        if self._deferrable is None:
+            self._deferrable = deferrable(self.keys)
+        return self._deferrable
+
+    def overlaps(self, other_keys):
+        for _k in self.keys:
+            for _o in other_keys:
+                if _overlap(_k, _o):
+                    return True
+        return False
+
+    def parse(self, genome_content, diagnostics):
+        for section, subsection, lines, content_parser in self.sections:
+            # warnings are issued in the context of the deferred (sub)section
+            set_context(diagnostics, section, subsection)
+            store_section_content(
+                    genome_content,
+                    section,
+                    subsection,
+                    call_content_parser(content_parser, lines, genome_content)
+                    )
+
+
+class _BlockGroup(_SectionGroup):
+    """
+    Consecutive subsections of a section kept as a single block of raw bytes
+    (see Parser.iter_parse_buffer), only split into subsections once parsed.
+    """
+    __slots__ = ('split',)
+
+    def __init__(self, keys, split):
+        _SectionGroup.__init__(self, keys)
+        self.split = split
+
+    def parse(self, genome_content, diagnostics):
+        # sections added after the block with the same keys come last
+        self.sections[:0] = self.split()
+        _SectionGroup.parse(self, genome_content, diagnostics)
+
+
+class LazyRecord(object):
+    """
+    The raw content of a record, collected section by section, together with
+    the content parsers to run on it.
+
+    The content parsers are only run once a genome key they write to is
+    accessed on the LazyGenome built from this record.
+
+    Parameter:
+    ----------
+    :param diagnostics: Diagnostics collecting the warnings of the content
+        parsers, those of the parser that read the record.
+    """
+    def __init__(self, diagnostics=default_diagnostics):
+        self.pending = []
+        self.parsing = False
+        self.diagnostics = diagnostics
+
+    def add_section(self, section, subsection, lines, content_parser, keys):
+        """
+        :param keys: list of key paths the content parser writes to, e.g.
+            [('locus',)] or [('content', 'genes')]. Use [()] if unknown.
+        """
+        if not self.pending or self.pending[-1].keys != keys:
+            self.pending.append(_SectionGroup(keys))
+        self.pending[-1].sections.append(
+                (section, subsection, lines, content_parser)
+                )
+
+    def add_block(self, keys, split):
+        """
+        Add subsections whose content is kept as a single block.
+
+        :param keys: list of key paths any of the subsections writes to, see
+            add_section.
+        :param split: callable without arguments returning the (section,
+            subsection, lines, content_parser) of the subsections to parse.
+            Called once the block is parsed.
+        """
+        self.pending.append(_BlockGroup(keys, split))
+
+    def resolve(self, genome, path):
+        """
+        Run the content parsers that might write to the key path.
+
+        All pending sections preceding a section to parse that write to the
+        same keys are parsed as well, such that keys are written in the same
+        order as when parsing eagerly.
+        """
+        if self.parsing or not self.pending:
+            return None
+        return self._parse(
+                genome, [_g.overlaps([path]) for _g in self.pending]
+                )
+
+    def parse_group(self, genome, group):
+        """
+        Run the content parsers of a pending group of sections, and those of
+        the preceding groups writing to the same keys.
+        """
+        return self._parse(genome, [_g is group for _g in self.pending])
+
+    def _parse(self, genome, selected):
+        for i in reversed(range(len(self.pending))):
+            if selected[i]:
+                for j in range(i):
+                    if not selected[j] and \
+                            self.pending[j].overlaps(self.pending[i].keys):
+                        selected[j] = True
+        to_parse = [_g for _g, _s in zip(self.pending, selected) if _s]
+        self.pending = [_g for _g, _s in zip(self.pending, selected) if not _s]
+        self.parsing = True
+        try:
+            for group in to_parse:
+                group.parse(genome, self.diagnostics)
+        finally:
+            self.parsing = False
+        # drop the keys no content parser wrote to and none will
+        declared = set(_p for _g in self.pending for _p in _g.declared())
+        parsed = set(_p for _g in to_parse for _p in _g.declared())
+        for path in sorted(parsed - declared, key=len, reverse=True):
+            genome._discard(path)
+        return None
+
+
+class LazyGenome(dict):
+    """
+    A genome (dict) whose sections are only parsed on first access.
+
+    The dict holds every key the content parsers are known to write (see
+    gbparse.content_parsers.default_parser_keys) from the start, in the order
+    of an eager parse, only their values are deferred. Sections whose keys
+    are not known (e.g. FEATURES/source or custom parsers without keys) are
+    parsed when the genome is built.
+
+    Accessing a key runs the content parsers writing to it and caches the
+    result. Nested dicts (e.g. genome['content']) are lazy as well. Methods
+    that need all keys, like keys(), items(), len() or comparisons, parse the
+    complete record first. As the dict is never empty while sections are
+    pending, json.dumps parses the remaining sections as well.
+    """
+    def __init__(self, record, path=(), root=None):
+        dict.__init__(self)
+        self._record = record
+        self._path = path
+        self._root = root if root is not None else self
+        self._nested = {}
+        # whether a content parser accessed this (nested) dict
+        self._used = False
+        if root is None:
+            for group in list(record.pending):
+                if group.deferrable():
+                    self._add_pending(group.declared())
+                else:
+                    record.parse_group(self, group)
+
+    def _add_pending(self, paths):
+        for path in paths:
+            key = path[0]
+            if len(path) == 1:
+                dict.setdefault(self, key, _PENDING)
+                continue
+            nested = self._nested.get(key)
+            if nested is None:
+                nested = self._nested[key] = LazyGenome(
+                        self._record, (key,), self
+                        )
+                if dict.get(self, key, _PENDING) is _PENDING:
+                    dict.__setitem__(self, key, nested)
+            dict.setdefault(nested, path[1], _PENDING)
+
+    def _lazy_child(self, key):
+        """
+        :return: the nested LazyGenome stored under key or None.
+        """
+        nested = self._nested.get(key)
+        if nested is not None and dict.get(self, key) is nested:
+            if self._record.parsing:  # a content parser writes to it
+                nested._used = True
+            return nested
+        return None
+
+    def _discard(self, path):
+        """
+        Remove the key path if it was not written to by the content parsers.
+        """
+        target = self
+        if len(path) > 1:
+            target = self._lazy_child(path[0])
+            if target is None:
+                return None
+        value = dict.get(target, path[-1])
+        if value is _PENDING or (
+                isinstance(value, LazyGenome) and
+                not value._used and not dict.__len__(value)
+                ):
+            dict.__delitem__(target, path[-1])
+        return None
+
+    def _resolve(self, key):
+        self._record.resolve(self._root, self._path + (key,))
+
+    def materialize(self):
+        """
+        Run all the pending content parsers writing to this dict.
+        """
+        self._record.resolve(self._root, self._path)
+        return self
+
+    def to_dict(self):
+        """
+        :return: the fully parsed genome as a (nested) plain dict.
+        """
+        self.materialize()
+        return dict(
+                (
+                    _k,
+                    _v.to_dict() if isinstance(_v, LazyGenome) else _v
+                ) for _k, _v in dict.items(self)
+                )
+
+    def __reduce__(self):
+        return (dict, (self.to_dict(),))
+
+    def __getitem__(self, key):
+        if self._lazy_child(key) is None:
+            self._resolve(key)
+        value = dict.__getitem__(self, key)
+        if value is _PENDING:  # read by a content parser before it is written
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        if self._lazy_child(key) is None:
+            self._resolve(key)
+        return dict.get(self, key, _PENDING) is not _PENDING
+
+    def __setitem__(self, key, value):
+        self._resolve(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        dict.__delitem__(self, key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            dict.__setitem__(self, key, default)
+        return dict.__getitem__(self, key)
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        return dict.pop(self, key)
+
+    def update(self, *args, **kwargs):
+        self.materialize()
+        dict.update(self, *args, **kwargs)
+
+    def keys(self):
+        return dict.keys(self.materialize())
+
+    def values(self):
+        return dict.values(self.materialize())
+
+    def items(self):
+        return dict.items(self.materialize())
+
+    def __iter__(self):
+        return dict.__iter__(self.materialize())
+
+    def __len__(self):
+        return dict.__len__(self.materialize())
+
+    def __eq__(self, other):
+        if isinstance(other, LazyGenome):
+            other.materialize()
+        return dict.__eq__(self.materialize(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return dict.__repr__(self.materialize())
+
+    def copy(self):
+        return self.to_dict()
@@ -0,0 +1,278 @@
+from __future__ import unicode_literals, absolute_import
+# Parsing of feature locations and range queries over the features of a
+# genome.
+import re
+import bisect
+
+
+class LocationParsingException(Exception):
+    pass
+
+
+class Location(object):
+    """
+    Numeric representation of a feature location like 'complement(1..20)' or
+    'join(<1..20,30..>40)'.
+
+    parts holds the (start, end, strand) of each part in the order they are
+    transcribed, i.e. reversed for complement(join(...)). Coordinates are
+    1-based and inclusive as in the flatfile. partial_start and partial_end
+    are True if the lower ('<') or upper ('>') end of the location lies
+    beyond the given coordinate. Parts located on other records (e.g.
+    'J00194.1:100..202') are skipped and counted in remote_parts.
+    """
+    __slots__ = ('parts', 'partial_start', 'partial_end', 'remote_parts')
+
+    def __init__(self, parts, partial_start=False, partial_end=False,
+                 remote_parts=0):
+        self.parts = parts
+        self.partial_start = partial_start
+        self.partial_end = partial_end
+        self.remote_parts = remote_parts
+
+    @property
+    def start(self):
+        return min(_p[0] for _p in self.parts)
+
+    @property
+    def end(self):
+        return max(_p[1] for _p in self.parts)
+
+    @property
+    def strand(self):
+        """
+        1 or -1 if all parts are on the same strand, else 0.
+        """
+        strands = set(_p[2] for _p in self.parts)
+        return strands.pop() if len(strands) == 1 else 0
+
+    def __len__(self):
+        return sum(_p[1] - _p[0] + 1 for _p in self.parts)
+
+    def __eq__(self, other):
+        if not isinstance(other, Location):
+            return NotImplemented
+        return self.parts == other.parts and \
+            self.partial_start == other.partial_start and \
+            self.partial_end == other.partial_end
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{0}({1!r}, partial_start={2}, partial_end={3})'.format(
+                self.__class__.__name__,
+                self.parts,
+                self.partial_start,
+                self.partial_end
+                )
+
+
+_OPERATORS = ('complement(', 'join(', 'order(')
+# a single range, possibly complemented, e.g. 'complement(<1..20)'
+_SIMPLE_LOCATION = re.compile(
+        r'(complement\()?([<>]?)(\d+)\.\.([<>]?)(\d+)(\)?)$'
+        )
+
+
+def parse_location(text):
+    """
+    Parse a location string of a feature (the bp_range of a gene).
+
+    :return: Location
+    :raises: LocationParsingException if the string is not a valid location.
+    """
+    _text = text.replace(' ', '').lower()
+    simple = _SIMPLE_LOCATION.match(_text)
+    if simple is not None and \
+            (simple.group(1) is None) == (not simple.group(6)):
+        _complement, _start_prefix, _start, _end_prefix, _end, _ = \
+            simple.groups()
+        return Location(
+                [(int(_start), int(_end), -1 if _complement else 1)],
+                '<' in (_start_prefix, _end_prefix),
+                '>' in (_start_prefix, _end_prefix)
+                )
+    location = Location([])
+    try:
+        parts, position = _parse(_text, 0, 1, location)
+    except (ValueError, IndexError):
+        parts, position = None, None
+    if position != len(_text) or not parts:
+        raise LocationParsingException(
+                'Could not parse the location {0!r}'.format(text)
+                )
+    location.parts = parts
+    return location
+
+
+def _parse(text, position, strand, location):
+    """
+    Recursively parse the location starting at position.
+
+    :return: list of parts and the position after the parsed location.
+    """
+    for operator in _OPERATORS:
+        if text.startswith(operator, position):
+            break
+    else:
+        end = position
+        while end < len(text) and text[end] not in ',)':
+            end += 1
+        return _parse_span(text[position:end], strand, location), end
+    position += len(operator)
+    if operator == 'complement(':
+        parts, position = _parse(text, position, -strand, location)
+        parts.reverse()
+    else:
+        parts = []
+        while True:
+            _parts, position = _parse(text, position, strand, location)
+            parts.extend(_parts)
+            if text[position] != ',':
+                break
+            position += 1
+    if text[position] != ')':
+        raise ValueError('missing closing bracket')
+    return parts, position + 1
+
+
+def _parse_span(span, strand, location):
+    if ':' in span:  # located on another record
+        location.remote_parts += 1
+        return []
+    if '..' in span:
+        _start, _end = span.split('..')
+    elif '^' in span:  # between two bases
+        _start, _end = span.split('^')
+    elif '.' in span:  # a single base within a range
+        _start, _end = span.split('.')
+    else:
+        _start = _end = span
+    if _start.startswith('<') or _end.startswith('<'):
+        location.partial_start = True
+    if _start.startswith('>') or _end.startswith('>'):
+        location.partial_end = True
+    return [(int(_start.lstrip('<>')), int(_end.lstrip('<>')), strand)]
+
+
+class FeatureIndex(object):
+    """
+    Index of the features of a genome for range queries.
+
+    Each part of a feature location is stored as an interval in an implicit
+    interval tree (intervals sorted by start, each node storing the largest
+    end of its subtree), thus overlap queries take O(log n + k) time.
+
+    Parameter:
+    ----------
+    :param features: list of features, e.g. genome['content']['genes'].
+    :param location_key: key holding the location string of a feature.
+    :param skip_invalid: Ignore features without a (valid) location instead of
+        raising a LocationParsingException.
+    """
+    def __init__(self, features, location_key='bp_range', skip_invalid=True):
+        self.features = []
+        self.locations = []
+        intervals = []
+        for feature in features:
+            try:
+                location = parse_location(feature[location_key])
+            except (KeyError, LocationParsingException):
+                if skip_invalid:
+                    continue
+                raise
+            for start, end, _ in location.parts:
+                intervals.append((start, end, len(self.features)))
+            self.features.append(feature)
+            self.locations.append(location)
+        intervals.sort()
+        self._starts = [_i[0] for _i in intervals]
+        self._ends = [_i[1] for _i in intervals]
+        self._feature_ids = [_i[2] for _i in intervals]
+        self._max_ends = [0] * len(intervals)
+        self._build(0, len(intervals))
+        by_end = sorted(range(len(intervals)), key=self._ends.__getitem__)
+        self._sorted_ends = [self._ends[_i] for _i in by_end]
+        self._by_end = by_end
+
+    @classmethod
+    def from_genome(cls, genome, **kwargs):
+        return cls(genome['content'].get('genes', []), **kwargs)
+
+    def _build(self, low, high):
+        """
+        Store the largest end of the subtree [low, high) at its root.
+        """
+        if low >= high:
+            return 0
+        mid = (low + high) // 2
+        self._max_ends[mid] = max(
+                self._ends[mid],
+                self._build(low, mid),
+                self._build(mid + 1, high)
+                )
+        return self._max_ends[mid]
+
+    def __len__(self):
+        return len(self.features)
+
+    def _overlapping_ids(self, start, end):
+        found = set()
+        stack = [(0, len(self._starts))]
+        while stack:
+            low, high = stack.pop()
+            if low >= high:
+                continue
+            mid = (low + high) // 2
+            if self._max_ends[mid] < start:  # nothing reaches start
+                continue
+            stack.append((low, mid))
+            if self._starts[mid] <= end:
+                if self._ends[mid] >= start:
+                    found.add(self._feature_ids[mid])
+                stack.append((mid + 1, high))
+        return sorted(found)
+
+    def overlaps(self, start, end):
+        """
+        :return: list of the features overlapping the (1-based, inclusive)
+            range [start, end], in the order they were given.
+        """
+        return [self.features[_i] for _i in self._overlapping_ids(start, end)]
+
+    def nearest(self, position):
+        """
+        :return: list of the features closest to position: all features
+            covering it or else the closest feature(s) up- and downstream.
+        """
+        overlapping = self._overlapping_ids(position, position)
+        if overlapping:
+            return [self.features[_i] for _i in overlapping]
+        candidates = []
+        # the intervals ending last before position
+        i = bisect.bisect_left(self._sorted_ends, position)
+        if i > 0:
+            end = self._sorted_ends[i - 1]
+            for j in range(bisect.bisect_left(self._sorted_ends, end), i):
+                candidates.append((
+                    position - end,
+                    self._feature_ids[self._by_end[j]]
+                    ))
+        # the intervals starting first after position
+        i = bisect.bisect_right(self._starts, position)
+        if i < len(self._starts):
+            start = self._starts[i]
+            for j in range(i, bisect.bisect_right(self._starts, start)):
+                candidates.append((start - position, self._feature_ids[j]))
+        if not candidates:
+            return []
+        distance = min(_c[0] for _c in candidates)
+        return [
+                self.features[_i]
+                for _i in sorted(set(
+                    _i for _d, _i in candidates if _d == distance
+                    ))
+                ]
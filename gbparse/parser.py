@@ -1,57 +1,102 @@
 from __future__ import unicode_literals, absolute_import, print_function
 import os
 import io
-import json
-import configparser
-import requests
-from .content_parsers import default_parser as content_parser
+import re
+import mmap
+import functools
+import collections
+from .config import load_config
+from .content_parsers import store_section_content
+from .content_parsers import SectionSpan, call_content_parser
+from .content_parsers.registry import ContentParsers
+from .content_parsers.default_parsers import unpaired_parser
+from .records import iter_record_spans, group_spans, iter_record_batches
+from .records import iter_record_keys
+from .compression import open_path, open_text, random_access, compression_of
+from .index import load_index
+from .lazy import LazyRecord, LazyGenome, deferrable
+from .projection import Projection
+from .sinks import open_sink
+from .stats import ParseStats, timer
+from .diagnostics import Diagnostics, set_context
+from .sync import sync as _sync
+from .resilient import parse_resilient as _parse_resilient
+
+# dispatch entry of a (sub)section without content parser
+_no_parser = (None, None)
+_missing_parser = (
+        'There is no parser defined for the following section/subsection: '
+        '%s/%s'
+        )
 
 
 class Parser(object):
-    def __init__(self):
+    """
+    Parser of GenBank flatfiles.
+
+    Parameter:
+    ----------
+    :param config: Configuration of the parser, by default
+        gbparse/config.cfg, see gbparse.config.load_config for the other
+        options (e.g. a dict holding the configuration in memory).
+    """
+    def __init__(self, config=None):
         self._section = None
         self._subsection = None
         self._section_content = None
         self._section_content_lines = []
         self._genome_content = {}
-        config = configparser.ConfigParser()
-        config.read(
-                os.path.join(
-                    os.path.abspath(
-                        os.path.dirname(__file__)
-                        ),
-                    'config.cfg'
-                    )
-                )
-        self._val_indent_long = config.getint(
-                'Default',
-                'val_indent_long'
-                )
-        self._val_indent_short = config.getint(
-                'Default',
-                'val_indent_short'
-                )
-        self._val_sep_short = config.getint('Default', 'val_sep_short')
-        self._val_sep_long = config.getint('Default', 'val_sep_long')
-        self._genome_end = config.get('Default', 'val_genome_end')
-        self.ncbi_nuccore_url = config.get(
-                'GenBank',
-                'ncbi_nuccore_url',
-                fallback=None
-                )
+        self._lazy_record = None
+        self._projection = None
+        self._skip_section = False
+        # content parser (and its genome keys) per (section, subsection),
+        # compiled from self.content_parser at the start of each parse
+        self._dispatch = {}
+        # settings shared by the Parsers of the process, see gbparse.config
+        self._config = config
+        settings = load_config(config)
+        self._val_indent_long = settings['val_indent_long']
+        self._val_indent_short = settings['val_indent_short']
+        self._val_sep_short = settings['val_sep_short']
+        self._val_sep_long = settings['val_sep_long']
+        self._genome_end = settings['val_genome_end']
+        self.ncbi_nuccore_url = settings['ncbi_nuccore_url']
+        self.fetch_retries = settings['fetch_retries']
+        self.fetch_backoff = settings['fetch_backoff']
+        self.fetch_timeout = settings['fetch_timeout']
         self._section_sep = {"FEATURE".lower(): self._val_sep_long}
         self._known_sections = []
         self._known_subsections = {}
-        # This attribute holds all conversion functions in form of a dict
-        self.content_parser = content_parser
+        self._indices = {}
+        # optional gbparse.cache.FetchCache used by self.fetch
+        self.fetch_cache = None
+        # optional gbparse.stats.ParseStats collecting timings of the parses
+        self.stats = None
+        # warnings issued while parsing (logged, counted or raised if strict)
+        self.diagnostics = Diagnostics()
+        # This attribute holds all conversion functions in form of a dict,
+        # see gbparse.content_parsers.registry.ContentParsers
+        self.content_parser = None
         return None
 
+    @property
+    def content_parser(self):
+        return self._content_parser
+
+    @content_parser.setter
+    def content_parser(self, parsers):
+        # always a copy, such that no other Parser shares the content parsers
+        self._content_parser = ContentParsers(parsers)
+
     class MissingSectionExeption(Exception):
         pass
 
     class SectionContentParsingException(Exception):
         pass
 
+    class FetchException(Exception):
+        pass
+
     @property
     def _val_sep(self,):
         # TODO: this info should be loaded from a json config file
@@ -89,8 +134,8 @@ class Parser(object):
         ----------
         :param fileobject: Opened file that contains the output of
             <some request>.
-        :param save_to: string or None determining what to do with the parsed
-        genome(s).
+        :param save_to: string, gbparse.sinks.Sink or None determining what to
+        do with the parsed genome(s).
             - save_to=None: a list of genomes is generated and returned
                 once the parser ran through the file. This mode is not
                 recommended if you parse a large list of genomes, as all
@@ -98,81 +143,613 @@ class Parser(object):
             - save_to='some/path/to/existing/folder': each genome is saved to
                 as a separate json-file in the specified folder. The files are
                 named after the LOCUS entry
+            - save_to='some/file.jsonl' (or .jsonl.gz, .parquet, .sqlite,
+                .db): all genomes are written to a single file, see
+                gbparse.sinks.
+            - save_to=Sink(...): the genomes are written to the sink which
+                is flushed, but not closed, once the file is parsed.
         :param fct: callable taking a genome as a mandatory first argument.
             This attribute can be used to directly perform a task with each
             genome that is read from the fileobject.
         :param args: Unnamed attributes that will be passed to the callable
             provided in fct.
         :param kwargs: Named attributes that will be passed to the callable
-            provided in fct.
+            provided in fct. The options of self.iter_parse (lazy) are
+            taken from kwargs and not passed to fct.
 
         :return: list of parsed genomes
         """
-        self._genome_content = {}
+        options = self._pop_parse_options(kwargs)
+        return self._collect(
+                self.iter_parse(fileobject, **options),
+                save_to, fct, args, kwargs
+                )
+
+    def _collect(self, genomes, save_to, fct, args, kwargs):
+        """
+        Handle the genomes of one of the iter_parse methods as described in
+        self.parse.
+        """
         if save_to is None:
             parsed_genomes = []
-        for line in fileobject:
-            if line.startswith(' '):  # we are in a subsection or content
-                if self._subsection_possible and \
-                        line[self._val_indent_subs].isalnum():  # new subsect
-                    assert(self.parse_section())
-                    self._section_content_lines = []
-                    assert (self._section is not None)  # subsection must be in
-                    # a section
-                    # get subsection
-                    self._subsection = line[:self._val_sep].strip().lower()
+        with open_sink(save_to) as sink:
+            for genome in genomes:
+                self._handle_genome(genome, sink, fct, args, kwargs)
+                if save_to is None:
+                    parsed_genomes.append(genome)
+        if save_to is None:
+            return parsed_genomes
+        else:
+            return None
+
+    # keyword arguments of parse that are options of iter_parse
+    _parse_options = ('lazy', 'include', 'exclude')
+
+    def _pop_parse_options(self, kwargs):
+        return dict(
+                (_k, kwargs.pop(_k))
+                for _k in self._parse_options if _k in kwargs
+                )
+
+    def iter_parse(self, fileobject, lazy=False, include=None, exclude=None):
+        """
+        Generator version of the parse method.
+
+        Each genome is yielded as soon as its end is reached in the fileobject.
+        Only the content of the current genome is held in memory and closing
+        the generator stops the reading of the fileobject.
+
+        Parameter:
+        ----------
+        :param fileobject: Opened file that contains the output of
+            <some request>.
+        :param lazy: If True, the content parsers are not run while reading
+            the file. Instead each genome is a gbparse.lazy.LazyGenome that
+            runs the content parsers of a section only once a key it writes to
+            is accessed.
+        :param include: List of the sections and subsections to parse, e.g.
+            ['locus', 'features.gene', 'features.cds']. The lines of any other
+            (sub)section are dropped while reading the file.
+        :param exclude: List of the sections and subsections to drop while
+            reading the file, e.g. ['origin'].
+
+        :return: generator of parsed genomes
+        """
+        self._start_parse(lazy, include, exclude)
+        # The scanner is a state machine: the layout of the current section
+        # (column of the values, indentation of subsections) is looked up
+        # once per section and kept in local variables.
+        layouts = {}
+        genome_end = self._genome_end
+        sep, indent_subs, subsection_possible = self._layout(layouts)
+        lines = self._section_content_lines
+        skip = False
+        stats = self.stats
+        if stats is not None:
+            stats.resume()
+        mark = self.diagnostics.mark()
+        try:
+            for line in fileobject:
+                if line.startswith(' '):  # we are in a subsection or content
+                    if self._section is None:
+                        raise self.__class__.MissingSectionExeption(
+                                'Content outside of a section: {0!r}'.format(
+                                    line
+                                    )
+                                )
+                    if subsection_possible and \
+                            line[indent_subs].isalnum():  # new subsection
+                        self.parse_section()
+                        self._subsection = line[:sep].strip().lower()
+                        self._section_content = []
+                        self._update_skip_section()
+                        skip = self._skip_section
+                        lines = self._section_content_lines = []
+                elif line.startswith(genome_end):  # genome ended
+                    self.parse_section()
+                    lines = self._section_content_lines = []
+                    skip = False
+                    genome = self.parse_genome()
+                    if stats is None:
+                        yield genome
+                    else:
+                        stats.record_end(genome)
+                        stats.pause()
+                        yield genome
+                        stats.resume()
+                    continue
+                else:  # new section
+                    self.parse_section()
+                    if stats is not None and self._section is None:
+                        stats.record_start()
+                    self._subsection = None
+                    self._section_content = None
+                    self._section = line[:line.find(' ')].lower()
+                    sep, indent_subs, subsection_possible = \
+                        self._layout(layouts)
+                    self._update_skip_section()
+                    skip = self._skip_section
+                    lines = self._section_content_lines = []
+                # reading out the content
+                if not skip:
+                    lines.append(line[sep:].strip())
+        finally:
+            if stats is not None:
+                stats.pause()
+            self.diagnostics.log_summary(mark)
+
+    def _start_parse(self, lazy, include, exclude):
+        """
+        Reset the state of the parser at the start of a parse.
+        """
+        self._lazy_record = LazyRecord(self.diagnostics) if lazy else None
+        if include is None and not exclude:
+            self._projection = None
+        else:
+            self._projection = Projection(include, exclude)
+        self._skip_section = False
+        self._section = None
+        self._subsection = None
+        self._section_content = None
+        self._section_content_lines = []
+        self._genome_content = {}
+        self._dispatch = self._content_parser.compile()
+        if self._projection is not None and \
+                not self._projection.wants('features', 'gene'):
+            # nothing to pair the CDS and RNA features with
+            self._dispatch = dict(
+                    (_key, (unpaired_parser.get(_parser, _parser), _keys))
+                    for _key, (_parser, _keys) in self._dispatch.items()
+                    )
+        return None
+
+    def iter_parse_buffer(self, buffer, lazy=False, include=None,
+                          exclude=None):
+        """
+        Version of iter_parse scanning the content of a file as bytes, e.g. a
+        memory mapped file (see parse_path), instead of a text file object.
+
+        Instead of decoding and storing each line, the scanner jumps from one
+        (sub)section start to the next using a regular expression and only
+        copies and decodes the (sub)sections that are parsed. Content parsers
+        with a from_bytes attribute (like the ORIGIN parsers) are handed the
+        raw bytes of their section. The genomes are the same as with
+        iter_parse.
+
+        Parameter:
+        ----------
+        :param buffer: bytes or mmap.mmap holding the content of a file.
+        :param lazy, include, exclude: See self.iter_parse.
+
+        :return: generator of parsed genomes
+        """
+        self._start_parse(lazy, include, exclude)
+        layouts = {}
+        # see _add_block, only used in lazy mode
+        blocks = {}
+        add_blocks = self._lazy_record is not None and \
+            self._projection is None
+        genome_end = self._genome_end.encode('ascii')
+        sep, indent_subs, subsection_possible = self._layout(layouts)
+        boundary = _boundary_pattern(subsection_possible, indent_subs)
+        block_from = 0
+        stats = self.stats
+        if stats is not None:
+            stats.resume()
+        mark = self.diagnostics.mark()
+        position = 0
+        size = len(buffer)
+        try:
+            while position < size:
+                line_end = buffer.find(b'\n', position)
+                line_end = size if line_end < 0 else line_end + 1
+                first = buffer[position:position + 1]
+                if first == b' ':  # a subsection
+                    if self._section is None:
+                        raise self.__class__.MissingSectionExeption(
+                                'Content outside of a section: {0!r}'.format(
+                                    buffer[position:line_end]
+                                    )
+                                )
+                    self.parse_section()
+                    self._subsection = buffer[
+                            position:min(position + sep, line_end)
+                            ].decode('utf-8').strip().lower()
                     self._section_content = []
-                else:  # in content block
-                    # make sure we know where to put content
-                    assert (self._section is not None)
-                    assert (self._section_content_lines)
-            else:  # we are in a new section or at the end
-                if line.startswith(self._genome_end):  # genome ended
-                    assert (self.parse_section())  # make sure previous section
-                    # is correctly parsed
+                    if add_blocks and position >= block_from:
+                        end, block_from = self._add_block(
+                                buffer, position, line_end, blocks
+                                )
+                        if end is not None:
+                            position = end
+                            continue
+                elif buffer[position:position + len(genome_end)] == \
+                        genome_end:  # genome ended
+                    self.parse_section()
+                    self._section_content_lines = []
+                    position = line_end
                     genome = self.parse_genome()
-                    if fct is not None:
-                        fct(genome, *args, **kwargs)
-                    if save_to is None:
-                        parsed_genomes.append(genome)
+                    if stats is None:
+                        yield genome
                     else:
-                        with open(
-                                os.path.join(
-                                    save_to,
-                                    '{0}.json'.format(genome['locus'][None])
-                                ),
-                                'w'
-                                ) as f_out:
-                            json.dump(genome, f_out)
+                        stats.record_end(genome)
+                        stats.pause()
+                        yield genome
+                        stats.resume()
+                    continue
                 else:  # new section
-                    assert (self.parse_section())  # make sure previous section
-                    # is correctly parsed
+                    self.parse_section()
+                    if stats is not None and self._section is None:
+                        stats.record_start()
                     self._subsection = None
                     self._section_content = None
+                    line = buffer[position:line_end].decode('utf-8')
+                    if line.endswith('\r\n'):
+                        line = line[:-2] + '\n'
+                    self._section = line[:line.find(' ')].lower()
+                    sep, indent_subs, subsection_possible = \
+                        self._layout(layouts)
+                    boundary = _boundary_pattern(
+                            subsection_possible, indent_subs
+                            )
+                    block_from = 0
+                self._update_skip_section()
+                # the (sub)section ends before the next line starting a
+                # section or subsection
+                match = boundary.search(buffer, line_end - 1)
+                end = size if match is None else match.start() + 1
+                if self._skip_section:
                     self._section_content_lines = []
-                    self._section = line[
-                            :line.find(' ')
-                            ].lower()  # get section
-            # # just checking that section (and subsection) are correct
-            # assert (self._section in self._known_sections) \
-            #         'The current section is not known.'
-            # assert (
-            #           self._subsection in self._known_subsections[
-            #               self._section
-            #               ] \
-            #         if self._subsection is not None \
-            #         else True) \
-            #         'The current subsection is not a known subsection for ' \
-            #         'the current section'
-            # reading out the content
-            self._section_content_lines.append(
-                    line[self._val_sep:].strip()
+                else:
+                    self._section_content_lines = SectionSpan(
+                            buffer[position:end], sep
+                            )
+                position = end
+        finally:
+            if stats is not None:
+                stats.pause()
+            self.diagnostics.log_summary(mark)
+
+    def _layout(self, layouts):
+        """
+        Get (and cache in layouts) the column at which the values of the
+        current section start, the indentation of its subsections and whether
+        it can have subsections at all.
+        """
+        try:
+            return layouts[self._section]
+        except KeyError:
+            layouts[self._section] = (
+                    self._val_sep,
+                    self._val_indent_subs,
+                    self._subsection_possible
+                    )
+            return layouts[self._section]
+
+    def _add_block(self, buffer, position, line_end, blocks):
+        """
+        In lazy mode, keep the current subsection and the following ones up
+        to the end of the section as a single block of raw bytes, which is
+        only split into subsections once a key their content parsers write
+        to is accessed (see gbparse.lazy.LazyRecord.add_block). Accessing
+        the metadata of a genome thus never scans its FEATURES.
+
+        This requires all the content parsers of the subsections in the
+        block to be deferrable, the subsections without content parser are
+        reported once the block is parsed.
+
+        :return: (end, block_from), end being the end of the block or None
+            if no block was added, block_from the position from which on a
+            block can be added to the current section.
+        """
+        try:
+            layout = blocks[self._section]
+        except KeyError:
+            layout = blocks[self._section] = self._block_layout()
+        if layout is None:
+            return None, len(buffer)
+        keys, eager, end_pattern = layout
+        if self._subsection in eager:
+            return None, line_end
+        match = end_pattern.search(buffer, line_end - 1)
+        end = len(buffer) if match is None else match.start() + 1
+        if end < len(buffer) and buffer[end:end + 1] == b' ':
+            # parse up to that subsection as usual
+            return None, end
+        self._lazy_record.add_block(keys, functools.partial(
+            _split_block,
+            buffer[position:end],
+            self._section,
+            self._val_sep,
+            self._val_indent_subs,
+            self._dispatch,
+            self.diagnostics
+            ))
+        # the content is kept by the block
+        self._skip_section = True
+        return end, end
+
+    def _block_layout(self):
+        """
+        :return: None if the subsections of the current section are never
+            kept as a block (see _add_block), else the key paths their
+            content parsers write to, the names of the subsections whose
+            content parsers are not deferrable and a regular expression
+            finding the end of the section or the next of these
+            subsections, whichever comes first.
+        """
+        if not self._subsection_possible:
+            return None
+        keys = []
+        eager = set()
+        for (section, subsection), (content_parser, _keys) in \
+                self._dispatch.items():
+            if section != self._section or subsection is None:
+                continue
+            if content_parser is None or not deferrable(_keys):
+                eager.add(subsection)
+            else:
+                keys.extend(_k for _k in _keys if _k not in keys)
+        if not keys:
+            return None
+        if not eager:
+            return keys, eager, _boundary_pattern(False, None)
+        end_pattern = re.compile(
+                '\\n(?:[^ ]| {{{0}}}(?:{1})(?:[ \\r\\n]|$))'.format(
+                    self._val_indent_subs,
+                    '|'.join(re.escape(_s) for _s in sorted(eager))
+                    ).encode('utf-8'),
+                re.IGNORECASE
+                )
+        return keys, eager, end_pattern
+
+    def _update_skip_section(self):
+        """
+        Check whether the lines of the current (sub)section are dropped.
+        """
+        self._skip_section = self._projection is not None and \
+            not self._projection.wants(self._section, self._subsection)
+
+    def _handle_genome(self, genome, sink, fct, args, kwargs):
+        """
+        Pass a freshly parsed genome to the callable fct and/or write it to
+        the sink (see gbparse.sinks.open_sink).
+        """
+        if fct is not None:
+            fct(genome, *args, **kwargs)
+        if sink is not None:
+            sink.write(genome)
+        return None
+
+    def parse_parallel(
+            self, path, workers=None, batch_bytes=1 << 22, save_to=None,
+            fct=None, *args, **kwargs):
+        """
+        Parse a (large) GenBank file using a pool of worker processes.
+
+        The file is first scanned for record boundaries (LOCUS lines and the
+        genome end marker). Batches of complete records are then handed as
+        byte ranges to the worker processes which parse them independently.
+        The genomes are collected in file order, thus the result is the same
+        as with the parse method.
+
+        Compressed files are supported as well (see self.parse_path). Unless
+        the file is BGZF compressed, which allows the workers to seek into it,
+        the main process decompresses the file and sends the batches of
+        records to the workers.
+
+        Parameter:
+        ----------
+        :param path: Path to a (possibly compressed) GenBank file.
+        :param workers: Number of worker processes. Defaults to the number of
+            available cpus.
+        :param batch_bytes: Approximate size in bytes of the record batches
+            handed to a worker.
+        :param save_to: see self.parse.
+        :param fct: see self.parse. The callable is run in the main process.
+        :param args: see self.parse.
+        :param kwargs: see self.parse. The options of self.iter_parse are
+            passed on to the worker processes.
+
+        :return: list of parsed genomes if save_to is None, else None.
+        """
+        import multiprocessing
+        options = self._pop_parse_options(kwargs)
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        genome_end = self._genome_end.encode('ascii')
+        if save_to is None:
+            parsed_genomes = []
+        pool = multiprocessing.Pool(
+                workers,
+                initializer=_init_worker,
+                initargs=(
+                    self._config,
+                    self.content_parser,
+                    self.stats is not None,
+                    self.diagnostics.strict
                     )
+                )
+        mark = self.diagnostics.mark()
+        fobj = open_path(path)
+        try:
+            if random_access(path):
+                tasks = (
+                        (_parse_byte_range, (path, offset, length, options))
+                        for offset, length in group_spans(
+                            iter_record_spans(fobj, genome_end=genome_end),
+                            batch_bytes
+                            )
+                        )
+            else:
+                tasks = (
+                        (_parse_data, (data, options))
+                        for data in iter_record_batches(
+                            fobj, batch_bytes, genome_end=genome_end
+                            )
+                        )
+            if self.stats is not None:
+                self.stats.resume()
+            with open_sink(save_to) as sink:
+                for genomes, sections, warnings in _imap_ordered(
+                        pool, tasks, 2 * workers):
+                    self.diagnostics.merge(warnings)
+                    if sections is not None:
+                        self.stats.merge_sections(sections)
+                    for genome in genomes:
+                        if self.stats is not None:
+                            self.stats.record_end(genome)
+                        self._handle_genome(genome, sink, fct, args, kwargs)
+                        if save_to is None:
+                            parsed_genomes.append(genome)
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            fobj.close()
+            if self.stats is not None:
+                self.stats.pause()
+        self.diagnostics.log_summary(mark)
         if save_to is None:
             return parsed_genomes
         else:
             return None
 
+    def parse_path(self, path, save_to=None, fct=None, *args, **kwargs):
+        """
+        Open and parse a GenBank file that might be compressed.
+
+        gzip (.gz, including BGZF), bz2 (.bz2), xz (.xz) and zstandard (.zst,
+        requires the zstandard package) compressed files are decompressed
+        while being parsed, in a separate thread. The compression is detected
+        from the content of the file.
+
+        Uncompressed files are memory mapped and scanned as bytes with
+        self.iter_parse_buffer.
+
+        Parameter:
+        ----------
+        :param path: Path to a (possibly compressed) GenBank file.
+
+        For additional parameters refer to the self.parse method.
+        """
+        if compression_of(path) is None and os.path.getsize(path):
+            options = self._pop_parse_options(kwargs)
+            with io.open(path, 'rb') as fobj:
+                buffer = mmap.mmap(
+                        fobj.fileno(), 0, access=mmap.ACCESS_READ
+                        )
+                try:
+                    return self._collect(
+                            self.iter_parse_buffer(buffer, **options),
+                            save_to, fct, args, kwargs
+                            )
+                finally:
+                    buffer.close()
+        with open_text(path) as fobj:
+            return self.parse(fobj, save_to, fct, *args, **kwargs)
+
+    def _parse_bytes(self, data, **options):
+        """
+        Parse the genome(s) contained in the byte string data.
+        """
+        return list(self.iter_parse_buffer(data, **options))
+
+    def get(self, path, accession):
+        """
+        Parse a single genome of a GenBank file using a record index.
+
+        On first access the file is scanned for record boundaries and the
+        resulting index is saved next to the file (path + '.gbidx'). Further
+        lookups only read the requested record. The index is rebuilt if the
+        size or modification time of the file changed.
+
+        Compressed files are supported, but only uncompressed and BGZF
+        compressed files (e.g. created with bgzip) allow to seek to a record
+        without decompressing the preceding content.
+
+        Parameter:
+        ----------
+        :param path: Path to a (possibly compressed) GenBank file.
+        :param accession: LOCUS name, accession, version or GI number of the
+            genome.
+
+        :return: parsed genome
+        :raises: KeyError if the file contains no such genome.
+        """
+        index = self._indices.get(path)
+        # like the sidecar file, the cached index is valid for the size and
+        # modification time of the file it was built from
+        if index is None or index.is_stale():
+            index = load_index(path, genome_end=self._genome_end)
+            self._indices[path] = index
+        offset, length = index.lookup(accession)
+        with open_path(path, seekable=True) as fobj:
+            fobj.seek(offset)
+            data = fobj.read(length)
+        return self._parse_bytes(data)[0]
+
+    def sync(self, store, update_files=(), deletions=(), batch_size=500,
+             **options):
+        """
+        Update a store of parsed genomes (e.g. a gbparse.sinks.SQLiteSink)
+        with GenBank update files and deletion lists, parsing only the records
+        that are new or have a higher version than the stored genome.
+
+        See gbparse.sync.sync for the arguments.
+
+        :return: gbparse.sync.SyncReport listing the changes.
+        """
+        return _sync(
+                self, store, update_files, deletions, batch_size, **options
+                )
+
+    def parse_resilient(
+            self, path, rejects=None, checkpoint=None, resume=False,
+            save_to=None, fct=None, *args, **kwargs):
+        """
+        Parse a (large) GenBank file, skipping malformed records instead of
+        aborting.
+
+        Each record is parsed on its own and a record that fails to parse is
+        rejected, the parse continues at the next LOCUS line. With a
+        checkpoint, an interrupted parse can be resumed where it stopped.
+
+        Parameter:
+        ----------
+        :param path: Path to a (possibly compressed) GenBank file.
+        :param rejects: Path of a JSON Lines file listing the byte offset and
+            the error of each rejected record.
+        :param checkpoint: Path of a json file the progress is saved to.
+        :param resume: Continue from the progress saved in checkpoint.
+        :param save_to: see self.parse.
+        :param fct: see self.parse.
+        :param args: see self.parse.
+        :param kwargs: see self.parse. checkpoint_every (number of records
+            between checkpoints, default 1000) is taken from kwargs as well.
+
+        See gbparse.resilient.parse_resilient for the details.
+
+        :return: list of parsed genomes if save_to is None, else None.
+        """
+        checkpoint_every = kwargs.pop('checkpoint_every', 1000)
+        return _parse_resilient(
+                self, path, rejects, checkpoint, checkpoint_every, resume,
+                save_to, fct, args, kwargs
+                )
+
+    def _spawn(self):
+        """
+        Create a new Parser using the same content parsers, e.g. to parse in a
+        separate thread.
+        """
+        parser = self.__class__(self._config)
+        parser.content_parser = self.content_parser
+        parser.diagnostics = self.diagnostics
+        return parser
+
     def _fallback_parser(self, *args):
         missing_parser = False
         if self._section is not None and \
@@ -184,10 +761,9 @@ class Parser(object):
                         self._section].keys():
             missing_parser = True
         if missing_parser:
-            print(
-                    'There is no parser defined for the following '
-                    'section/subsection:\nSection:\t{0}\nSubsection:'
-                    '\t{1}'.format(self._section, self._subsection)
+            self.diagnostics.warn(
+                    'missing_parser', _missing_parser, self._section,
+                    self._subsection
                     )
         return None
 
@@ -200,44 +776,48 @@ class Parser(object):
         If there is an error during the conversion, this method raises a custom
         Exception.
         """
-        # print(self._section, self._subsection, self._section_content_lines)
-        if self._section_content_lines:
-            # call the appropriate conversion function
-            _section_content = self.content_parser.get(
-                    self._section,
-                    {}
-                    ).get(
+        if self._skip_section:  # the content was dropped on purpose
+            self._skip_section = False
+            self._section_content_lines = []
+            return True
+        elif self._section_content_lines:
+            # get the appropriate conversion function (compiled per parse)
+            _content_parser, _keys = self._dispatch.get(
+                    (self._section, self._subsection),
+                    _no_parser
+                    )
+            set_context(self.diagnostics, self._section, self._subsection)
+            if _content_parser is None:
+                self._fallback_parser()
+            elif self._lazy_record is not None:  # keep the content for later
+                self._lazy_record.add_section(
+                        self._section,
+                        self._subsection,
+                        self._section_content_lines,
+                        _content_parser,
+                        _keys
+                        )
+            else:
+                if self.stats is not None:
+                    _start = timer()
+                self._section_content = call_content_parser(
+                        _content_parser,
+                        self._section_content_lines,
+                        self._genome_content
+                        )
+                if self.stats is not None:
+                    self.stats.section(
+                            self._section,
                             self._subsection,
-                            # if self._section is not present, i.e. this boils
-                            # down to {}.get(self._subsection)
-                            self._fallback_parser
-                            )(
-                                self._section_content_lines,
-                                self._genome_content
-                                )
-            if _section_content is not None:  # if the content parser did not
-                # modify an existing object.
-                self._section_content = _section_content
-                if self._subsection is not None:  # make sure a section with
-                    # subsections is a dictionary.
-                    if not isinstance(
-                            self._genome_content[self._section],
-                            dict
-                            ):
-                        # need to make this section a dict
-                        self._genome_content[self._section] = {
-                                None: self._genome_content[self._section]
-                                }
-                    # add the subsection to the dict of the section
-                    self._genome_content[
-                            self._section
-                            ][
-                                    self._subsection
-                                    ] = self._section_content
-                else:  # dealing with a section
-                    self._genome_content[self._section] = {
-                        None: self._section_content
-                        }
+                            timer() - _start,
+                            self._section_content_lines
+                            )
+                store_section_content(
+                        self._genome_content,
+                        self._section,
+                        self._subsection,
+                        self._section_content
+                        )
             self._section_content = None  # reset the section content
             self._section_content_lines = []  # reset the content lines
             return True
@@ -252,13 +832,53 @@ class Parser(object):
                 )
 
     def parse_genome(self,):
-        genome = dict(self._genome_content)
+        if self._lazy_record is not None:
+            genome = LazyGenome(self._lazy_record)
+            self._lazy_record = LazyRecord(self.diagnostics)
+        else:
+            genome = dict(self._genome_content)
         self._section = None
         self._subsection = None
         self._sction_content = None
         self._genome_content = {}
         return genome
 
+    @staticmethod
+    def _valid_genome_id(gen_id):
+        # a number or an accession with an optional version, e.g. CP12345.1
+        accession, _, version = gen_id.partition('.')
+        return (accession.isdigit() or accession[2:].isdigit()) and \
+            (version.isdigit() or not _)
+
+    @staticmethod
+    def _genome_id_list(genome_id):
+        """
+        Validate the genome id(s) passed to one of the fetch methods and
+        convert them to a list.
+        """
+        assert isinstance(genome_id, (int, str, list)), \
+            'genome_id must either be an integer, string or list.'
+        if isinstance(genome_id, int):
+            genome_id = [genome_id]
+        elif isinstance(genome_id, (str)):
+            genome_id = genome_id.replace(' ', '').split(',')
+            assert all(
+                    [
+                        Parser._valid_genome_id(gen_id)
+                        for gen_id in genome_id]
+                    ), 'Not all provided genome_ids are numbers.'
+        else:
+            assert all(
+                    [
+                        Parser._valid_genome_id(gen_id)
+                        if isinstance(gen_id, (str))
+                        else isinstance(gen_id, int)
+                        for gen_id in genome_id
+                        ]
+                    ), 'All elements in the genome_id list must either be '\
+                        'a string or an integer'
+        return genome_id
+
     def fetch(self, genome_id, *args, **kwargs):
         """
         Method to directly fetch a genome from ncbi GenBank.
@@ -277,32 +897,21 @@ class Parser(object):
             genome_id = '12345,23456'
             genome_id = [12345, 23456]
             genome_id = ['CP12345', '23456', 34567]
+            genome_id = ['CP12345.1', 23456]
         :type genome_id: int, list
 
         For additional parameters refer to the self.parser method.
-        """
 
-        assert isinstance(genome_id, (int, str, list)), \
-            'genome_id must either be an integer, string or list.'
-        if isinstance(genome_id, int):
-            genome_id = [genome_id]
-        elif isinstance(genome_id, (str)):
-            genome_id = genome_id.replace(' ', '').split(',')
-            assert all(
-                    [
-                        gen_id.isdigit() or gen_id[2:].isdigit()
-                        for gen_id in genome_id]
-                    ), 'Not all provided genome_ids are numbers.'
-        else:
-            assert all(
-                    [
-                        (gen_id.isdigit() or gen_id[2:].isdigit())
-                        if isinstance(gen_id, (str))
-                        else isinstance(gen_id, int)
-                        for gen_id in genome_id
-                        ]
-                    ), 'All elements in the genome_id list must either be '\
-                        'a string or an integer'
+        If self.fetch_cache is set to a gbparse.cache.FetchCache, cached
+        genomes are served from it and only the missing ones are fetched (in a
+        single request) and added to the cache. The genomes are handled in the
+        order of the ids, fetched records matching none of the ids (by LOCUS
+        name, accession, version or GI number) come last.
+        """
+        import requests  # only imported when fetching
+        genome_id = self._genome_id_list(genome_id)
+        if self.fetch_cache is not None:
+            return self._fetch_cached(genome_id, *args, **kwargs)
         response = requests.get(
                 self.ncbi_nuccore_url.format(','.join(map(str, genome_id)))
                 )
@@ -313,3 +922,216 @@ class Parser(object):
                 encoding=response.encoding
                 )
         return self.parse(response_obj, *args, **kwargs)
+
+    def _fetch_cached(
+            self, genome_id, save_to=None, fct=None, *args, **kwargs):
+        cache = self.fetch_cache
+        options = self._pop_parse_options(kwargs)
+        # parsed genomes are only cached for complete, eager parses
+        use_parsed = cache.store_parsed and not options
+        # per id: the cached genome, the flatfile of its record or None
+        entries = []
+        missing = []
+        for _id in map(str, genome_id):
+            cached = cache.get(_id, parsed=use_parsed)
+            if cached is None:
+                missing.append(_id)
+            entries.append(cached)
+        if missing:
+            import requests
+            response = requests.get(
+                    self.ncbi_nuccore_url.format(','.join(missing))
+                    )
+            assert response.status_code == 200, 'The provided genome id(s) '\
+                'is/are not valid. No content could be fetched from ncbi.'
+            cache.put(response.content)
+            fetched = []
+            fetched_index = {}
+            for offset, length, aliases in iter_record_keys(
+                    io.BytesIO(response.content)):
+                for alias in aliases:
+                    fetched_index.setdefault(alias, len(fetched))
+                fetched.append(response.content[offset:offset + length])
+            # place the fetched records at the position of their id
+            used = set()
+            for i, _id in enumerate(map(str, genome_id)):
+                index = fetched_index.get(_id)
+                if entries[i] is None and index is not None and \
+                        index not in used:
+                    entries[i] = fetched[index]
+                    used.add(index)
+            entries.extend(
+                    _r for _i, _r in enumerate(fetched) if _i not in used
+                    )
+        if save_to is None:
+            parsed_genomes = []
+        with open_sink(save_to) as sink:
+            for entry in entries:
+                if entry is None:  # not fetched
+                    continue
+                if isinstance(entry, bytes):
+                    genomes = list(self.iter_parse(
+                        io.TextIOWrapper(io.BytesIO(entry), encoding='utf-8'),
+                        **options
+                        ))
+                    if use_parsed:
+                        for genome in genomes:
+                            cache.put_parsed(genome)
+                else:
+                    genomes = [entry]
+                for genome in genomes:
+                    self._handle_genome(genome, sink, fct, args, kwargs)
+                    if save_to is None:
+                        parsed_genomes.append(genome)
+        if save_to is None:
+            return parsed_genomes
+        else:
+            return None
+
+    def fetch_many(
+            self, genome_id, batch_size=200, concurrency=3, rate=3.0,
+            save_to=None, fct=None, *args, **kwargs):
+        """
+        Fetch a large number of genomes from ncbi GenBank concurrently.
+
+        The ids are split into batches that are fetched in parallel by a
+        pool of concurrency threads over reused HTTP connections, while never
+        sending more than rate requests per second. Failed requests
+        (connection errors, timeouts, HTTP 429 and 5xx) are retried with
+        exponential backoff. Each response is parsed while it is downloaded.
+        At most 2 * concurrency batches are fetched or wait to be handled at
+        a time, see gbparse.fetching.fetch_many.
+
+        Parameter:
+        ----------
+        :param genome_id: Id(s) of the genomes to fetch, see self.fetch.
+        :param batch_size: Maximal number of ids per request.
+        :param concurrency: Maximal number of simultaneous requests.
+        :param rate: Maximal number of requests per second (ncbi allows 3
+            without an API key).
+        :param save_to: see self.parse.
+        :param fct: see self.parse.
+        :param args: see self.parse.
+        :param kwargs: see self.parse.
+
+        The number of retries, the backoff and the timeout of the requests are
+        set in the GenBank section of the config file. The genomes are handled
+        in the order of the batches.
+
+        :return: list of parsed genomes if save_to is None, else None.
+        """
+        import asyncio
+        from .fetching import fetch_many
+        return asyncio.run(fetch_many(
+            self, genome_id, batch_size, concurrency, rate, save_to, fct,
+            *args, **kwargs
+            ))
+
+
+# Parser instance used by the worker processes of Parser.parse_parallel
+_worker_parser = None
+
+
+def _init_worker(config, content_parsers, stats=False, strict=False):
+    global _worker_parser
+    _worker_parser = Parser(config)
+    _worker_parser.content_parser = content_parsers
+    # the summary is logged by the main process
+    _worker_parser.diagnostics = Diagnostics(strict=strict, summary=False)
+    if stats:
+        _worker_parser.stats = ParseStats()
+
+
+def _worker_result(genomes):
+    """
+    :return: the genomes, the section statistics (None if disabled) and the
+        warning counts collected since the last task.
+    """
+    warnings, _worker_parser.diagnostics.counts = \
+        _worker_parser.diagnostics.counts, {}
+    stats = _worker_parser.stats
+    if stats is None:
+        return genomes, None, warnings
+    sections, stats.sections = stats.sections, {}
+    return genomes, sections, warnings
+
+
+def _parse_byte_range(path, offset, length, options):
+    with open_path(path, seekable=True) as fobj:
+        fobj.seek(offset)
+        data = fobj.read(length)
+    return _worker_result(_worker_parser._parse_bytes(data, **options))
+
+
+def _parse_data(data, options):
+    return _worker_result(_worker_parser._parse_bytes(data, **options))
+
+
+def _imap_ordered(pool, tasks, max_pending):
+    """
+    Run (function, arguments) tasks on the pool and yield their results in
+    order, with at most max_pending tasks submitted at a time such that the
+    tasks are only generated as fast as they are processed.
+    """
+    pending = collections.deque()
+    for fct, args in tasks:
+        pending.append(pool.apply_async(fct, args))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _split_block(data, section, sep, indent_subs, dispatch, diagnostics):
+    """
+    Split a block of subsections (see Parser._add_block).
+
+    :return: list of the (section, subsection, SectionSpan, content parser)
+        of the subsections with a content parser, the others are reported.
+    """
+    boundary = _boundary_pattern(True, indent_subs)
+    sections = []
+    position = 0
+    size = len(data)
+    while position < size:
+        line_end = data.find(b'\n', position)
+        line_end = size if line_end < 0 else line_end + 1
+        subsection = data[
+                position:min(position + sep, line_end)
+                ].decode('utf-8').strip().lower()
+        match = boundary.search(data, line_end - 1)
+        end = size if match is None else match.start() + 1
+        content_parser = dispatch.get((section, subsection), _no_parser)[0]
+        if content_parser is None:
+            set_context(diagnostics, section, subsection)
+            diagnostics.warn(
+                    'missing_parser', _missing_parser, section, subsection
+                    )
+        else:
+            sections.append((
+                section, subsection, SectionSpan(data[position:end], sep),
+                content_parser
+                ))
+        position = end
+    return sections
+
+
+_boundary_patterns = {}
+
+
+def _boundary_pattern(subsection_possible, indent_subs):
+    """
+    Regular expression matching the newline before a line that starts a
+    section (any line not starting with a space) or, if subsection_possible,
+    a subsection (a line with an alphanumeric character at indent_subs).
+    """
+    key = indent_subs if subsection_possible else None
+    if key not in _boundary_patterns:
+        if key is None:
+            pattern = b'\n[^ ]'
+        else:
+            pattern = '\\n(?:[^ ]| .{{{0}}}[^\\W_])'.format(
+                    indent_subs - 1
+                    ).encode('ascii')
+        _boundary_patterns[key] = re.compile(pattern)
+    return _boundary_patterns[key]
@@ -0,0 +1,51 @@
+from __future__ import unicode_literals, absolute_import
+
+
+class Projection(object):
+    """
+    Decide which sections and subsections of a record to keep.
+
+    Sections are referred to by their lowercase name ('locus', 'origin') and
+    subsections by 'section.subsection' (e.g. 'features.cds',
+    'reference.authors'). Including a subsection implicitly includes the
+    content of its section itself (e.g. the REFERENCE line for
+    'reference.authors') as subsection parsers might depend on it.
+
+    Parameter:
+    ----------
+    :param include: list of (sub)sections to keep, None keeps all.
+    :param exclude: list of (sub)sections to drop.
+    """
+    def __init__(self, include=None, exclude=None):
+        self._include = self._split(include) if include is not None else None
+        self._exclude = self._split(exclude or [])
+        self._wanted = {}
+
+    @staticmethod
+    def _split(names):
+        _split_names = set()
+        for name in names:
+            section, _, subsection = name.lower().partition('.')
+            _split_names.add((section, subsection or None))
+        return _split_names
+
+    def _is_wanted(self, section, subsection):
+        if (section, None) in self._exclude or \
+                (section, subsection) in self._exclude:
+            return False
+        if self._include is None or (section, None) in self._include:
+            return True
+        if subsection is None:
+            return any(_s == section for _s, _ in self._include)
+        return (section, subsection) in self._include
+
+    def wants(self, section, subsection=None):
+        """
+        :return: True if the content of the (sub)section should be parsed.
+        """
+        try:
+            return self._wanted[(section, subsection)]
+        except KeyError:
+            wanted = self._is_wanted(section, subsection)
+            self._wanted[(section, subsection)] = wanted
+            return wanted
@@ -0,0 +1,288 @@
+from __future__ import unicode_literals, absolute_import
+# Helpers to locate complete records in a GenBank flatfile without running
+# any of the content parsers.
+import io
+import re
+
+# lines of the record header holding identifiers besides the LOCUS line
+_HEADER_KEYS = re.compile(b'\n(ACCESSION|VERSION)')
+
+
+def _tell(fileobject):
+    try:
+        return fileobject.tell()
+    except (io.UnsupportedOperation, IOError, OSError):  # a stream
+        return 0
+
+
+def iter_record_spans(fileobject, genome_end=b'//', record_start=b'LOCUS'):
+    """
+    Scan a binary file object for record boundaries.
+
+    A record starts with a line beginning with record_start and ends with the
+    first following line beginning with genome_end. Lines outside of a record
+    (e.g. the header of a GenBank division file) are skipped.
+
+    Parameter:
+    ----------
+    :param fileobject: File object opened in binary mode.
+    :param genome_end: Byte string marking the end of a record.
+    :param record_start: Byte string marking the start of a record.
+
+    :return: generator of (offset, length) tuples, the offset being relative
+        to the start of the file.
+    """
+    offset = _tell(fileobject)
+    start = None
+    for line in fileobject:
+        if start is None:
+            if line.startswith(record_start):
+                start = offset
+        elif line.startswith(genome_end):
+            yield start, offset + len(line) - start
+            start = None
+        offset += len(line)
+
+
+def iter_records(fileobject, offset=0, genome_end=b'//',
+                 record_start=b'LOCUS'):
+    """
+    Read the records of a binary file object one at a time. Works on streams,
+    e.g. of compressed files.
+
+    Unlike iter_record_spans, a line beginning with record_start always
+    starts a new record, such that a record lacking its genome_end line does
+    not swallow the next one.
+
+    Parameter:
+    ----------
+    :param fileobject: File object opened in binary mode.
+    :param offset: Offset of the current position of fileobject in the file.
+    :param genome_end: Byte string marking the end of a record.
+    :param record_start: Byte string marking the start of a record.
+
+    :return: generator of (offset, data, complete) tuples, data being the
+        record as bytes and complete False if the record is not terminated by
+        a genome_end line.
+    """
+    start = None
+    lines = []
+    for line in fileobject:
+        if line.startswith(record_start):
+            if start is not None:  # the previous record has no end
+                yield start, b''.join(lines), False
+            start = offset
+            lines = [line]
+        elif start is not None:
+            lines.append(line)
+            if line.startswith(genome_end):
+                yield start, b''.join(lines), True
+                start = None
+                lines = []
+        offset += len(line)
+    if start is not None:
+        yield start, b''.join(lines), False
+
+
+def _record_keys(line):
+    """
+    Extract the identifiers of a record from its LOCUS, ACCESSION or VERSION
+    line.
+    """
+    tokens = line.split()
+    if not tokens:
+        return []
+    if tokens[0] == b'LOCUS':
+        return tokens[1:2]
+    elif tokens[0] == b'ACCESSION':
+        # skip qualifications like 'REGION: 1..1000'
+        return [
+                _t for _t in tokens[1:]
+                if _t.replace(b'_', b'').isalnum()
+                ]
+    elif tokens[0] == b'VERSION':
+        return [
+                _t[3:] if _t.startswith(b'GI:') else _t
+                for _t in tokens[1:]
+                ]
+    return []
+
+
+def iter_record_keys(fileobject, genome_end=b'//'):
+    """
+    Scan a binary file object for records and their identifiers.
+
+    Only the LOCUS, ACCESSION and VERSION lines of a record are inspected,
+    the content parsers are not run.
+
+    :return: generator of (offset, length, keys) tuples with keys being a
+        list of the LOCUS name, the accession(s), the version and the GI
+        number (if present) of the record, decoded as strings.
+    """
+    offset = _tell(fileobject)
+    start = None
+    keys = []
+    for line in fileobject:
+        if start is None:
+            if line.startswith(b'LOCUS'):
+                start = offset
+                keys = _record_keys(line)
+        elif line.startswith(genome_end):
+            yield (
+                    start,
+                    offset + len(line) - start,
+                    [_k.decode('ascii') for _k in keys]
+                    )
+            start = None
+        elif line.startswith((b'ACCESSION', b'VERSION')):
+            keys.extend(_record_keys(line))
+        offset += len(line)
+
+
+def iter_buffer_record_keys(buffer, genome_end=b'//'):
+    """
+    Same as iter_record_keys for the content of a file as bytes, e.g. a
+    memory mapped file.
+
+    Like Parser.iter_parse_buffer, the scanner jumps from one record start
+    (LOCUS line) to its end (genome_end line) without splitting the lines
+    in between. Only the ACCESSION and VERSION lines of the header (before
+    the FEATURES) are searched with a regular expression and split.
+
+    :return: generator of (offset, length, keys) tuples, see
+        iter_record_keys.
+    """
+    size = len(buffer)
+    record_end = b'\n' + genome_end
+    start = 0 if buffer[:5] == b'LOCUS' else buffer.find(b'\nLOCUS') + 1
+    if not start and buffer[:5] != b'LOCUS':
+        return
+    while True:
+        end = buffer.find(record_end, start)
+        if end < 0:  # unterminated record
+            return
+        header_end = buffer.find(b'\nFEATURES', start, end)
+        keys = _record_keys(buffer[start:buffer.find(b'\n', start)])
+        for match in _HEADER_KEYS.finditer(
+                buffer, start, end if header_end < 0 else header_end
+                ):
+            keys.extend(_record_keys(
+                buffer[match.start(1):buffer.find(b'\n', match.start(1))]
+                ))
+        end = buffer.find(b'\n', end + 1)
+        end = size if end < 0 else end + 1
+        yield start, end - start, [_k.decode('ascii') for _k in keys]
+        start = buffer.find(b'\nLOCUS', end - 1)
+        if start < 0:
+            return
+        start += 1
+
+
+def split_version(version):
+    """
+    Split a version like 'CP012345.2' into the accession and the version
+    number. A missing version number is returned as 0.
+    """
+    accession, _, number = version.partition('.')
+    return accession, int(number) if number.isdigit() else 0
+
+
+def iter_selected_records(fileobject, select, genome_end=b'//'):
+    """
+    Read the records of a binary file object, keeping only the content of
+    the records selected by their identity. Works on streams, e.g. of
+    compressed files.
+
+    Parameter:
+    ----------
+    :param fileobject: File object opened in binary mode.
+    :param select: callable taking the accession and version number (see
+        split_version) of a record and returning whether to keep it. It is
+        called once the VERSION line (or else the end of the record) is
+        reached, the lines of records that are not kept are not stored.
+    :param genome_end: Byte string marking the end of a record.
+
+    :return: generator of (accession, version number, data) tuples, data
+        being the record as bytes or None if it was not selected.
+    """
+    lines = None
+    accession = None
+    version = None
+    keep = None
+    for line in fileobject:
+        if lines is None:  # outside of a record
+            if line.startswith(b'LOCUS'):
+                lines = [line]
+                accession, version, keep = None, None, None
+            continue
+        if keep is not False:
+            lines.append(line)
+        if line.startswith(genome_end):
+            if keep is None:  # record without VERSION line
+                accession = accession or lines[0].split()[1].decode('ascii')
+                keep = select(accession, 0)
+                version = 0
+            yield accession, version, b''.join(lines) if keep else None
+            lines = None
+        elif keep is None:
+            if line.startswith(b'ACCESSION') and accession is None:
+                tokens = _record_keys(line)
+                accession = tokens[0].decode('ascii') if tokens else None
+            elif line.startswith(b'VERSION'):
+                tokens = line.split()
+                if len(tokens) > 1:
+                    accession, version = split_version(
+                            tokens[1].decode('ascii')
+                            )
+                    keep = select(accession, version)
+                    if not keep:
+                        del lines[:]
+
+
+def group_spans(spans, batch_bytes):
+    """
+    Group consecutive record spans into batches covering a contiguous byte
+    range of roughly batch_bytes.
+
+    :return: generator of (offset, length) tuples, each covering one or more
+        complete records.
+    """
+    batch_start = None
+    batch_end = None
+    for offset, length in spans:
+        if batch_start is None:
+            batch_start = offset
+        batch_end = offset + length
+        if batch_end - batch_start >= batch_bytes:
+            yield batch_start, batch_end - batch_start
+            batch_start = None
+    if batch_start is not None:
+        yield batch_start, batch_end - batch_start
+
+
+def iter_record_batches(fileobject, batch_bytes, genome_end=b'//',
+                        record_start=b'LOCUS'):
+    """
+    Read complete records from a binary file object in batches of roughly
+    batch_bytes. Unlike group_spans this does not require a seekable file.
+
+    :return: generator of byte strings, each holding one or more records.
+    """
+    batch = []
+    batch_size = 0
+    in_record = False
+    for line in fileobject:
+        if not in_record:
+            if not line.startswith(record_start):
+                continue
+            in_record = True
+        batch.append(line)
+        batch_size += len(line)
+        if line.startswith(genome_end):
+            in_record = False
+            if batch_size >= batch_bytes:
+                yield b''.join(batch)
+                batch = []
+                batch_size = 0
+    if batch_size:
+        yield b''.join(batch)
@@ -0,0 +1,280 @@
+from __future__ import unicode_literals, absolute_import
+# Parsing of large files that skips malformed records instead of aborting,
+# see Parser.parse_resilient.
+import io
+import os
+import json
+from .records import iter_records
+from .compression import open_path, random_access
+from .sinks import Sink, open_sink
+from .diagnostics import set_context
+
+
+class IncompleteRecordException(Exception):
+    """
+    A record is not terminated by the genome end marker (//).
+    """
+    pass
+
+
+class Checkpoint(object):
+    """
+    Progress of a resilient parse, saved as json such that an interrupted
+    parse can be resumed.
+
+    path: Absolute path of the parsed file.
+    size: Size of the parsed file in bytes, a resumed parse fails if the
+        file changed.
+    offset: Byte offset (in the uncompressed data) up to which all records
+        are handled, i.e. their genomes were written or they were rejected.
+    records: Number of genomes handled up to offset.
+    rejected: Number of records rejected up to offset.
+    complete: Whether the whole file was parsed.
+    output_size: Size in bytes of the output (a JSON Lines file) holding the
+        genomes up to offset, None if the output cannot be truncated.
+    rejects_size: Size in bytes of the reject file holding the records
+        rejected up to offset.
+    """
+    def __init__(self, path, size, offset=0, records=0, rejected=0,
+                 complete=False, output_size=None, rejects_size=None):
+        self.path = path
+        self.size = size
+        self.offset = offset
+        self.records = records
+        self.rejected = rejected
+        self.complete = complete
+        self.output_size = output_size
+        self.rejects_size = rejects_size
+
+    @classmethod
+    def start(cls, path):
+        path = os.path.abspath(path)
+        return cls(path, os.path.getsize(path))
+
+    @classmethod
+    def load(cls, checkpoint_path):
+        """
+        :return: the Checkpoint saved at checkpoint_path or None if there is
+            no such file.
+        """
+        if not os.path.exists(checkpoint_path):
+            return None
+        with io.open(checkpoint_path, 'r', encoding='utf-8') as f_in:
+            return cls(**json.load(f_in))
+
+    def save(self, checkpoint_path):
+        """
+        Write the checkpoint to a temporary file first, such that an
+        interruption never leaves a truncated checkpoint behind.
+        """
+        tmp_path = checkpoint_path + '.tmp'
+        with io.open(tmp_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(json.dumps(self.__dict__, sort_keys=True))
+        os.replace(tmp_path, checkpoint_path)
+        return None
+
+    def matches(self, path):
+        path = os.path.abspath(path)
+        return self.path == path and self.size == os.path.getsize(path)
+
+    def __repr__(self):
+        return 'Checkpoint({0})'.format(', '.join(
+            '{0}={1!r}'.format(_k, _v) for _k, _v in sorted(
+                self.__dict__.items()
+                )
+            ))
+
+
+def _open_at(path, offset):
+    """
+    Open a (possibly compressed) file positioned at offset (relative to the
+    uncompressed data).
+    """
+    if not offset:
+        return open_path(path)
+    if random_access(path):
+        fobj = open_path(path, seekable=True)
+        fobj.seek(offset)
+        return fobj
+    # a stream: skip the decompressed data preceding offset
+    fobj = open_path(path)
+    remaining = offset
+    while remaining:
+        data = fobj.read(min(remaining, 1 << 22))
+        if not data:
+            break
+        remaining -= len(data)
+    return fobj
+
+
+def _locus_name(data):
+    tokens = data[:data.find(b'\n')].split()
+    return tokens[1].decode('utf-8', 'replace') if len(tokens) > 1 else None
+
+
+def parse_resilient(parser, path, rejects=None, checkpoint=None,
+                    checkpoint_every=1000, resume=False, save_to=None,
+                    fct=None, args=(), kwargs=None):
+    """
+    Parse a GenBank file one record at a time, skipping records that fail to
+    parse.
+
+    Each record is parsed on its own: if a content parser (or the parser)
+    raises, the record is rejected and parsing continues with the next LOCUS
+    line. Rejected records are written to the reject file and counted as
+    'rejected_record' warnings (see Parser.diagnostics).
+
+    Parameter:
+    ----------
+    :param parser: gbparse.Parser
+    :param path: Path to a (possibly compressed) GenBank file.
+    :param rejects: Path of a JSON Lines file listing the rejected records
+        (offset and length in the uncompressed data, LOCUS name, the
+        (sub)section being parsed, the type of the error and its message).
+    :param checkpoint: Path of a json file to save the progress to (see
+        Checkpoint), every checkpoint_every records and at the end.
+    :param checkpoint_every: Number of records between checkpoints. The sink
+        is flushed before each checkpoint.
+    :param resume: Continue the parse from the offset saved in checkpoint (if
+        it exists). JSON Lines files and the reject file are truncated to
+        their size at the last checkpoint of the interrupted parse and
+        appended to. Other outputs get the genomes written after that
+        checkpoint a second time (SQLite files and folders replace them).
+    :param save_to, fct, args, kwargs: see Parser.parse, kwargs may hold the
+        include and exclude options of Parser.iter_parse.
+
+    :return: list of parsed genomes if save_to is None, else None.
+    """
+    kwargs = dict(kwargs or {})
+    options = parser._pop_parse_options(kwargs)
+    if options.get('lazy'):
+        raise ValueError(
+                'A resilient parse cannot be lazy, the content parsers of a '
+                'lazy genome run after the record was parsed'
+                )
+    state = Checkpoint.load(checkpoint) if resume and checkpoint else None
+    if state is not None and not state.matches(path):
+        raise ValueError(
+                'The checkpoint {0} belongs to {1} (of {2} bytes)'.format(
+                    checkpoint, state.path, state.size
+                    )
+                )
+    append = state is not None
+    if state is None:
+        state = Checkpoint.start(path)
+    if save_to is None:
+        parsed_genomes = []
+    if state.complete:
+        return parsed_genomes if save_to is None else None
+    diagnostics = parser.diagnostics
+    mark = diagnostics.mark()
+    # the summary is logged once for the file, not for each record
+    summary, diagnostics.summary = diagnostics.summary, False
+    genome_end = parser._genome_end.encode('ascii')
+    if append:
+        # drop what the interrupted parse wrote after its last checkpoint
+        if rejects is not None:
+            _truncate(rejects, state.rejects_size)
+        if not isinstance(save_to, Sink):
+            _truncate(save_to, state.output_size)
+    reject_file = None if rejects is None else \
+        io.open(rejects, 'ab' if append else 'wb')
+    fobj = _open_at(path, state.offset)
+    try:
+        with open_sink(save_to, append=append) as sink:
+            for offset, data, complete in iter_records(
+                    fobj, state.offset, genome_end=genome_end):
+                try:
+                    if not complete:
+                        raise IncompleteRecordException(
+                                'The record is not terminated by {0}'.format(
+                                    parser._genome_end
+                                    )
+                                )
+                    genomes = parser._parse_bytes(data, **options)
+                except Exception as e:
+                    _reject(
+                            parser, reject_file, path, offset, data, e
+                            )
+                    state.rejected += 1
+                else:
+                    for genome in genomes:
+                        parser._handle_genome(genome, sink, fct, args, kwargs)
+                        if save_to is None:
+                            parsed_genomes.append(genome)
+                    state.records += len(genomes)
+                state.offset = offset + len(data)
+                if checkpoint is not None and \
+                        (state.records + state.rejected) % \
+                        checkpoint_every == 0:
+                    _save(state, checkpoint, sink, reject_file)
+            state.complete = True
+            if checkpoint is not None:
+                _save(state, checkpoint, sink, reject_file)
+    finally:
+        fobj.close()
+        if reject_file is not None:
+            reject_file.close()
+        diagnostics.summary = summary
+        diagnostics.log_summary(mark)
+    if save_to is None:
+        return parsed_genomes
+    else:
+        return None
+
+
+def _reject(parser, reject_file, path, offset, data, error):
+    """
+    Record a rejected record in the reject file and the diagnostics.
+    """
+    section, subsection = parser._section, parser._subsection
+    if isinstance(error, IncompleteRecordException):
+        section, subsection = None, None
+    entry = {
+            'path': path,
+            'offset': offset,
+            'length': len(data),
+            'locus': _locus_name(data),
+            'section': section,
+            'subsection': subsection,
+            'error': error.__class__.__name__,
+            'message': str(error),
+            }
+    if reject_file is not None:
+        reject_file.write(json.dumps(entry).encode('utf-8') + b'\n')
+    diagnostics = parser.diagnostics
+    set_context(diagnostics, section, subsection)
+    if diagnostics.strict:  # the rejection itself must not abort the parse
+        diagnostics.merge({('rejected_record', section, subsection): 1})
+    else:
+        diagnostics.warn(
+                'rejected_record',
+                'Skipped the record %s at byte %d: %s: %s',
+                entry['locus'], offset, entry['error'], entry['message']
+                )
+    return None
+
+
+def _save(state, checkpoint, sink, reject_file):
+    """
+    Save the checkpoint once everything before it is written.
+    """
+    if sink is not None:
+        state.output_size = sink.sync()
+    if reject_file is not None:
+        reject_file.flush()
+        state.rejects_size = reject_file.tell()
+    state.save(checkpoint)
+    return None
+
+
+def _truncate(path, size):
+    """
+    Truncate the file at path to size bytes, if both are given and the file
+    exists.
+    """
+    if path is None or size is None or not os.path.exists(path):
+        return None
+    with io.open(path, 'r+b') as f_out:
+        f_out.truncate(size)
+    return None
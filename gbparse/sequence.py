@@ -0,0 +1,93 @@
+from __future__ import unicode_literals, absolute_import
+import re
+
+# 2-bit codes of the nucleotides, any other symbol is stored separately
+_PACK_TABLE = bytes(bytearray(
+        {97: 0, 99: 1, 103: 2, 116: 3}.get(_b, 0) for _b in range(256)
+        ))
+_UNPACK_TABLE = bytes(bytearray(
+        [97, 99, 103, 116] + list(range(4, 256))
+        ))
+_NOT_ACGT = re.compile(b'[^acgt]+')
+# (index of the base within a byte, bit shift)
+_LANES = ((0, 6), (1, 4), (2, 2), (3, 0))
+
+
+class PackedSequence(object):
+    """
+    Nucleotide sequence stored with 2 bits per base.
+
+    Only the (lowercase) bases a, c, g and t are packed. Runs of any other
+    symbol (e.g. 'n' or ambiguity codes) are kept as (position, bytes) pairs
+    in exceptions and restored on unpacking.
+
+    Packing and unpacking require python 3.
+    """
+    __slots__ = ('data', 'length', 'exceptions')
+
+    def __init__(self, data, length, exceptions=None):
+        self.data = data
+        self.length = length
+        self.exceptions = exceptions or []
+
+    @classmethod
+    def pack(cls, sequence):
+        """
+        :param sequence: bytes of a lowercase nucleotide sequence.
+        """
+        if sequence.translate(None, b'acgt'):  # any other symbols present
+            exceptions = [
+                    (_m.start(), _m.group())
+                    for _m in _NOT_ACGT.finditer(sequence)
+                    ]
+        else:
+            exceptions = []
+        codes = sequence.translate(_PACK_TABLE)
+        codes += b'\x00' * (-len(codes) % 4)
+        n_bytes = len(codes) // 4
+        # shifting the integer value of every 4th code keeps the codes
+        # within their byte, thus the bytes can be combined in one go.
+        value = 0
+        for _lane, _shift in _LANES:
+            value |= int.from_bytes(codes[_lane::4], 'big') << _shift
+        return cls(value.to_bytes(n_bytes, 'big'), len(sequence), exceptions)
+
+    def unpack(self):
+        """
+        :return: the sequence as bytes.
+        """
+        n_bytes = len(self.data)
+        value = int.from_bytes(self.data, 'big')
+        mask = int.from_bytes(b'\x03' * n_bytes, 'big')
+        codes = bytearray(4 * n_bytes)
+        for _lane, _shift in _LANES:
+            codes[_lane::4] = ((value >> _shift) & mask).to_bytes(
+                    n_bytes, 'big'
+                    )
+        sequence = bytearray(
+                bytes(codes[:self.length]).translate(_UNPACK_TABLE)
+                )
+        for position, symbols in self.exceptions:
+            sequence[position:position + len(symbols)] = symbols
+        return bytes(sequence)
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return self.unpack().decode('ascii')
+
+    def __eq__(self, other):
+        if isinstance(other, PackedSequence):
+            return self.length == other.length and \
+                self.data == other.data and \
+                self.exceptions == other.exceptions
+        return NotImplemented
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{0}(length={1})'.format(self.__class__.__name__, self.length)
@@ -0,0 +1,451 @@
+from __future__ import unicode_literals, absolute_import
+# Destinations for the parsed genomes (the save_to argument of the Parser).
+import os
+import io
+import abc
+import gzip
+import json
+import sqlite3
+import warnings
+import functools
+import contextlib
+from .lazy import LazyGenome
+from .columnar import FeatureTable
+from .cache import genome_key
+from .records import split_version
+
+# encoder of genomes used by dumps, set on first use such that orjson is only
+# imported when genomes are written
+_encode = None
+
+
+def dumps(genome):
+    """
+    Encode a genome as compact json (utf-8 bytes).
+
+    orjson is used if it is installed, else the json module. Both write the
+    None keys of the genome (e.g. genome['locus'][None]) as "null" and a
+    gbparse.columnar.FeatureTable as its dict of columns (see
+    FeatureTable.to_dict).
+    """
+    global _encode
+    if _encode is None:
+        try:
+            import orjson
+        except ImportError:
+            _encode = _json_dumps
+        else:
+            _encode = functools.partial(
+                    orjson.dumps,
+                    default=_default,
+                    option=orjson.OPT_NON_STR_KEYS
+                    )
+    return _encode(genome)
+
+
+def _default(obj):
+    """
+    Encode the objects of a genome json does not know.
+    """
+    if isinstance(obj, FeatureTable):
+        return obj.to_dict()
+    raise TypeError(
+            'Type is not JSON serializable: {0}'.format(type(obj).__name__)
+            )
+
+
+def _json_dumps(genome):
+    return json.dumps(
+            genome, separators=(',', ':'), default=_default
+            ).encode('utf-8')
+
+
+def _genome_columns(genome):
+    """
+    :return: the locus, accession, version and definition of a genome.
+    """
+    return (
+            genome.get('locus', {}).get(None),
+            genome['accession'].split()[0] if 'accession' in genome
+            else None,
+            genome['version'][None] if 'version' in genome else None,
+            genome.get('definition')
+            )
+
+
+def _latest_versions(genomes):
+    """
+    :return: the genomes as plain dicts, keeping only the highest version of
+        each accession (the last one of equal versions), in their order.
+    """
+    genomes = [
+            _g.to_dict() if isinstance(_g, LazyGenome) else _g
+            for _g in genomes
+            ]
+    accessions = [_genome_columns(_g)[1:3] for _g in genomes]
+    latest = {}
+    for index, (accession, version) in enumerate(accessions):
+        if accession is None:
+            continue
+        number = split_version(version)[1] if version else 0
+        if number >= latest.get(accession, (-1, None))[0]:
+            latest[accession] = (number, index)
+    kept = set(_i for _n, _i in latest.values())
+    return [
+            _g for _i, (_g, (_a, _v)) in enumerate(zip(genomes, accessions))
+            if _a is None or _i in kept
+            ]
+
+
+# base class of abstract classes in python 2 and 3 (abc.ABC in python 3)
+_ABC = abc.ABCMeta(str('_ABC'), (object,), {})
+
+
+class Sink(_ABC):
+    """
+    Abstract base class of the sinks: collects the genomes passed to write
+    and stores them batch_size at a time with _write_batch, which each sink
+    implements.
+
+    Sinks can be used as context manager, the remaining genomes are written
+    and the output is closed on exit.
+    """
+    def __init__(self, batch_size=1000, encoder=dumps):
+        self.batch_size = batch_size
+        self.encoder = encoder
+        self.written = 0
+        self._batch = []
+
+    def write(self, genome):
+        if isinstance(genome, LazyGenome):
+            genome = genome.to_dict()
+        self._batch.append(genome)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        return None
+
+    def flush(self):
+        if self._batch:
+            self._write_batch(self._batch)
+            self.written += len(self._batch)
+            self._batch = []
+        return None
+
+    @abc.abstractmethod
+    def _write_batch(self, genomes):
+        """
+        Store a list of genomes (plain dicts).
+        """
+
+    def sync(self):
+        """
+        Write the collected genomes, e.g. before saving a checkpoint of a
+        resilient parse (see gbparse.resilient.Checkpoint).
+
+        :return: size in bytes of the complete output written so far, to
+            truncate the output to on resume, or None if the output cannot be
+            truncated.
+        """
+        self.flush()
+        return None
+
+    def close(self):
+        self.flush()
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class JsonDirSink(Sink):
+    """
+    Save each genome as a separate json-file named after its LOCUS entry to
+    the folder path (the original behaviour of save_to='some/folder').
+
+    A warning is issued if a genome overwrites the file of a genome written
+    before by the same sink.
+    """
+    def __init__(self, path, encoder=dumps):
+        Sink.__init__(self, batch_size=1, encoder=encoder)
+        self.path = path
+        self._names = set()
+
+    def _write_batch(self, genomes):
+        for genome in genomes:
+            name = genome['locus'][None]
+            if name in self._names:
+                warnings.warn(
+                        'Several genomes with LOCUS {0}, the file {0}.json is '
+                        'overwritten.'.format(name)
+                        )
+            self._names.add(name)
+            with open(
+                    os.path.join(self.path, '{0}.json'.format(name)), 'wb'
+                    ) as f_out:
+                f_out.write(self.encoder(genome))
+
+
+class JsonLinesSink(Sink):
+    """
+    Write the genomes to a single JSON Lines file, one genome per line.
+
+    Parameter:
+    ----------
+    :param path: Output file, gzip compressed if it ends with '.gz'.
+    :param batch_size: Number of genomes encoded and written at once.
+    :param encoder: callable encoding a genome as bytes (without newline).
+    :param append: Append to an existing file instead of overwriting it.
+    """
+    def __init__(self, path, batch_size=1000, encoder=dumps, append=False):
+        Sink.__init__(self, batch_size=batch_size, encoder=encoder)
+        self.path = path
+        mode = 'ab' if append else 'wb'
+        if path.endswith('.gz'):
+            self._fobj = gzip.open(path, mode, compresslevel=6)
+        else:
+            self._fobj = io.open(path, mode)
+
+    def _write_batch(self, genomes):
+        self._fobj.write(
+                b''.join(self.encoder(_g) + b'\n' for _g in genomes)
+                )
+
+    def sync(self):
+        self.flush()
+        if self.path.endswith('.gz'):
+            # end the gzip member, a file truncated after it stays readable
+            self._fobj.close()
+            size = os.path.getsize(self.path)
+            self._fobj = gzip.open(self.path, 'ab', compresslevel=6)
+            return size
+        self._fobj.flush()
+        return self._fobj.tell()
+
+    def close(self):
+        if not self._fobj.closed:
+            self.flush()
+            self._fobj.close()
+        return None
+
+
+class ParquetSink(Sink):
+    """
+    Write the genomes to a Parquet file, each batch as a row group.
+
+    The columns locus, accession, version and definition allow filtering
+    without decoding the genomes, the genome column holds the complete
+    genome as json. Requires pyarrow.
+
+    Parameter:
+    ----------
+    :param path: Output file.
+    :param batch_size: Number of genomes per row group.
+    :param compression: Parquet compression codec.
+    :param encoder: callable encoding a genome as bytes.
+    """
+    def __init__(self, path, batch_size=1000, compression='zstd',
+                 encoder=dumps):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(
+                    'Writing parquet files requires the pyarrow package: '
+                    'pip install pyarrow'
+                    )
+        Sink.__init__(self, batch_size=batch_size, encoder=encoder)
+        self.path = path
+        self._pa = pa
+        self._schema = pa.schema([
+            ('locus', pa.string()),
+            ('accession', pa.string()),
+            ('version', pa.string()),
+            ('definition', pa.string()),
+            ('genome', pa.string()),
+            ])
+        self._writer = pq.ParquetWriter(
+                path, self._schema, compression=compression
+                )
+
+    def _write_batch(self, genomes):
+        rows = [
+                _genome_columns(_g) + (self.encoder(_g).decode('utf-8'),)
+                for _g in genomes
+                ]
+        self._writer.write_table(self._pa.Table.from_arrays(
+            [self._pa.array(_c, type=self._pa.string()) for _c in zip(*rows)],
+            schema=self._schema
+            ))
+
+    def close(self):
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+        return None
+
+
+class SQLiteSink(Sink):
+    """
+    Write the genomes to a table of a SQLite database, one transaction per
+    batch.
+
+    Genomes are keyed by their version (accession.version), see
+    gbparse.cache.genome_key, a genome with the same key replaces the stored
+    one. The genome column holds the complete genome as json.
+
+    Parameter:
+    ----------
+    :param path: Database file.
+    :param batch_size: Number of genomes inserted per transaction.
+    :param table: Name of the table (created if missing).
+    :param encoder: callable encoding a genome as bytes.
+    """
+    def __init__(self, path, batch_size=1000, table='genomes', encoder=dumps):
+        Sink.__init__(self, batch_size=batch_size, encoder=encoder)
+        self.path = path
+        self.table = table
+        self._db = sqlite3.connect(path)
+        self._db.execute('PRAGMA journal_mode = WAL')
+        self._db.execute('PRAGMA synchronous = NORMAL')
+        with self._db:
+            self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS {0} ('
+                    'key TEXT PRIMARY KEY, locus TEXT, accession TEXT, '
+                    'version TEXT, definition TEXT, genome TEXT)'.format(table)
+                    )
+            self._db.execute(
+                    'CREATE INDEX IF NOT EXISTS {0}_accession '
+                    'ON {0} (accession)'.format(table)
+                    )
+
+    def _write_batch(self, genomes, replaced=()):
+        """
+        Insert the genomes in one transaction, after removing all versions of
+        the accessions in replaced (see upsert).
+        """
+        with self._db:
+            self._db.executemany(
+                    'DELETE FROM {0} WHERE accession = ?'.format(self.table),
+                    [(_a,) for _a in replaced]
+                    )
+            self._db.executemany(
+                    'INSERT OR REPLACE INTO {0} VALUES '
+                    '(?, ?, ?, ?, ?, ?)'.format(self.table),
+                    [
+                        (genome_key(_g),) + _genome_columns(_g) +
+                        (self.encoder(_g).decode('utf-8'),)
+                        for _g in genomes
+                    ]
+                    )
+
+    # The methods below let the sink serve as store for gbparse.sync.
+
+    def versions(self):
+        """
+        :return: dict mapping the accession of each stored genome to its
+            version number.
+        """
+        self.flush()
+        versions = {}
+        for accession, version in self._db.execute(
+                'SELECT accession, version FROM {0}'.format(self.table)
+                ):
+            number = split_version(version)[1] if version else 0
+            if number >= versions.get(accession, -1):
+                versions[accession] = number
+        return versions
+
+    def upsert(self, genomes):
+        """
+        Store the genomes, replacing any stored version of their accessions.
+        Of several versions of an accession among the genomes, only the
+        highest is stored.
+        """
+        self.flush()
+        genomes = _latest_versions(genomes)
+        # a single transaction: readers never see the accessions removed
+        # but not yet inserted again
+        self._write_batch(genomes, [_genome_columns(_g)[1] for _g in genomes])
+        self.written += len(genomes)
+        return None
+
+    def delete(self, accessions):
+        """
+        Remove all versions of the accessions.
+        """
+        self.flush()
+        with self._db:
+            self._db.executemany(
+                    'DELETE FROM {0} WHERE accession = ?'.format(self.table),
+                    [(_a,) for _a in accessions]
+                    )
+        return None
+
+    def close(self):
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+        return None
+
+
+# sinks used for the file extensions of a save_to path
+_SINK_EXTENSIONS = (
+        ('.jsonl', JsonLinesSink),
+        ('.jsonl.gz', JsonLinesSink),
+        ('.parquet', ParquetSink),
+        ('.sqlite', SQLiteSink),
+        ('.db', SQLiteSink),
+        )
+
+
+def sink_for(save_to, append=False):
+    """
+    :return: the Sink for the save_to argument of a Parser method: a Sink is
+        returned as is, an existing folder gets a JsonDirSink (whatever its
+        name), a path ending with .jsonl(.gz), .parquet, .sqlite or .db the
+        matching sink and any other path a JsonDirSink.
+
+    With append=True, the genomes are added to an existing JSON Lines file
+    instead of overwriting it (SQLite databases and folders are always added
+    to); Parquet files cannot be appended to.
+    """
+    if save_to is None or isinstance(save_to, Sink):
+        return save_to
+    if os.path.isdir(save_to):
+        return JsonDirSink(save_to)
+    for extension, sink_class in _SINK_EXTENSIONS:
+        if save_to.endswith(extension):
+            if not append:
+                return sink_class(save_to)
+            if sink_class is ParquetSink:
+                raise ValueError(
+                        'Cannot append to the Parquet file {0}'.format(save_to)
+                        )
+            if sink_class is JsonLinesSink:
+                return sink_class(save_to, append=True)
+            return sink_class(save_to)
+    return JsonDirSink(save_to)
+
+
+@contextlib.contextmanager
+def open_sink(save_to, append=False):
+    """
+    Context manager providing the sink for save_to (see sink_for). Sinks
+    created from a path are closed on exit, sinks passed by the caller are
+    only flushed.
+    """
+    sink = sink_for(save_to, append)
+    try:
+        yield sink
+    finally:
+        if sink is not None:
+            if sink is save_to:
+                sink.flush()
+            else:
+                sink.close()
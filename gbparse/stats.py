@@ -0,0 +1,238 @@
+from __future__ import unicode_literals, absolute_import, division
+# Opt-in instrumentation of the Parser, see Parser.stats.
+import sys
+import timeit
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+timer = timeit.default_timer
+
+
+class SectionStats(object):
+    """
+    Number of calls, cumulative run time (in seconds) and number of lines and
+    characters handed to the content parser of a (sub)section.
+    """
+    __slots__ = ('calls', 'seconds', 'lines', 'bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.
+        self.lines = 0
+        self.bytes = 0
+
+    def merge(self, other):
+        self.calls += other.calls
+        self.seconds += other.seconds
+        self.lines += other.lines
+        self.bytes += other.bytes
+        return self
+
+    def to_dict(self):
+        return dict((_k, getattr(self, _k)) for _k in self.__slots__)
+
+    def __getstate__(self):
+        return self.calls, self.seconds, self.lines, self.bytes
+
+    def __setstate__(self, state):
+        self.calls, self.seconds, self.lines, self.bytes = state
+
+    def __repr__(self):
+        return 'SectionStats({0})'.format(', '.join(
+            '{0}={1!r}'.format(_k, getattr(self, _k)) for _k in self.__slots__
+            ))
+
+
+def peak_memory():
+    """
+    :return: peak resident memory of the process in bytes or None if it
+        cannot be determined.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+class ParseStats(object):
+    """
+    Statistics of the parses run by a Parser, collected if assigned to
+    Parser.stats:
+
+        parser.stats = ParseStats()
+        parser.parse_path('file.gb')
+        print(parser.stats.report())
+
+    sections maps (section, subsection) to the SectionStats of its content
+    parser. seconds is the time spent in the parse methods (not counting the
+    time the caller spends between two genomes of iter_parse), records the
+    number of parsed genomes.
+
+    In lazy mode the content parsers run on access and are not timed. With
+    parse_parallel the section times are summed over the worker processes.
+    The bytes of a section are its stripped content lines with iter_parse and
+    its raw bytes with iter_parse_buffer (e.g. parse_path of an uncompressed
+    file).
+
+    Parameter:
+    ----------
+    :param on_record_start: callable without arguments, called when a new
+        record starts.
+    :param on_record_end: callable taking the genome and the seconds spent
+        parsing it, called once a genome is parsed.
+    :param on_section: callable taking the section, subsection, the seconds
+        spent in its content parser and its number of lines and characters,
+        called after each content parser call.
+    """
+    def __init__(self, on_record_start=None, on_record_end=None,
+                 on_section=None):
+        self.on_record_start = on_record_start
+        self.on_record_end = on_record_end
+        self.on_section = on_section
+        self.reset()
+
+    def reset(self):
+        self.sections = {}
+        self.records = 0
+        self.seconds = 0.
+        self._started = None
+        self._record_started = None
+        return None
+
+    # methods called by the Parser
+    def resume(self):
+        if self._started is None:
+            self._started = timer()
+        return None
+
+    def pause(self):
+        if self._started is not None:
+            self.seconds += timer() - self._started
+            self._started = None
+        return None
+
+    def record_start(self):
+        self._record_started = timer()
+        if self.on_record_start is not None:
+            self.on_record_start()
+        return None
+
+    def record_end(self, genome):
+        self.records += 1
+        if self._record_started is None:
+            seconds = None
+        else:
+            seconds = timer() - self._record_started
+            self._record_started = None
+        if self.on_record_end is not None:
+            self.on_record_end(genome, seconds)
+        return None
+
+    def section(self, section, subsection, seconds, content_lines):
+        key = (section, subsection)
+        try:
+            stats = self.sections[key]
+        except KeyError:
+            stats = self.sections[key] = SectionStats()
+        n_bytes = getattr(content_lines, 'n_bytes', None)
+        if n_bytes is None:
+            n_bytes = sum(map(len, content_lines))
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.lines += len(content_lines)
+        stats.bytes += n_bytes
+        if self.on_section is not None:
+            self.on_section(
+                    section, subsection, seconds, len(content_lines), n_bytes
+                    )
+        return None
+
+    def merge_sections(self, sections):
+        """
+        Add the SectionStats of another parser (e.g. a worker process).
+        """
+        for key, stats in sections.items():
+            if key in self.sections:
+                self.sections[key].merge(stats)
+            else:
+                self.sections[key] = SectionStats().merge(stats)
+        return None
+
+    @property
+    def parser_seconds(self):
+        """
+        Time spent in the content parsers.
+        """
+        return sum(_s.seconds for _s in self.sections.values())
+
+    @property
+    def scanner_seconds(self):
+        """
+        Time spent outside of the content parsers, i.e. reading and splitting
+        the file into sections.
+        """
+        return max(self.seconds - self.parser_seconds, 0.)
+
+    @property
+    def records_per_second(self):
+        return self.records / self.seconds if self.seconds else None
+
+    @property
+    def peak_memory(self):
+        return peak_memory()
+
+    def summary(self):
+        """
+        :return: dict of the statistics, e.g. to be dumped as json. Sections
+            are named 'section' or 'section.subsection'.
+        """
+        return {
+                'records': self.records,
+                'seconds': self.seconds,
+                'records_per_second': self.records_per_second,
+                'parser_seconds': self.parser_seconds,
+                'scanner_seconds': self.scanner_seconds,
+                'peak_memory': self.peak_memory,
+                'sections': dict(
+                    (_section_name(*_k), _s.to_dict())
+                    for _k, _s in self.sections.items()
+                    ),
+                }
+
+    def report(self):
+        """
+        :return: table of the sections sorted by time, as string.
+        """
+        lines = [
+                '{0} records in {1:.3f} s ({2} records/s), scanner {3:.3f} s'
+                ''.format(
+                    self.records,
+                    self.seconds,
+                    '-' if self.records_per_second is None
+                    else '{0:.1f}'.format(self.records_per_second),
+                    self.scanner_seconds
+                    ),
+                '{0:<28}{1:>10}{2:>12}{3:>12}{4:>14}'.format(
+                    'section', 'calls', 'seconds', 'lines', 'bytes'
+                    ),
+                ]
+        for key, stats in sorted(
+                self.sections.items(), key=lambda _i: -_i[1].seconds
+                ):
+            lines.append('{0:<28}{1:>10}{2:>12.4f}{3:>12}{4:>14}'.format(
+                _section_name(*key),
+                stats.calls,
+                stats.seconds,
+                stats.lines,
+                stats.bytes
+                ))
+        return '\n'.join(lines)
+
+
+def _section_name(section, subsection):
+    if subsection is None:
+        return section
+    return '{0}.{1}'.format(section, subsection)
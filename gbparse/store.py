@@ -0,0 +1,649 @@
+from __future__ import unicode_literals, absolute_import
+# Persistent store of parsed genomes with indexed queries over their records
+# and features.
+import json
+import sqlite3
+from .sinks import Sink, dumps, _genome_columns, _latest_versions
+from .cache import genome_key
+from .records import split_version
+from .columnar import FeatureTable
+from .locations import parse_location, LocationParsingException
+from .sequence import PackedSequence
+from .parser import Parser
+from .content_parsers import call_content_parser
+from .content_parsers.registry import resolve
+from .content_parsers.default_parsers import source_organism, _lineage
+
+_SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS records ('
+        'id INTEGER PRIMARY KEY, key TEXT UNIQUE, locus TEXT, '
+        'accession TEXT, version TEXT, version_number INTEGER, '
+        'definition TEXT, organism TEXT COLLATE NOCASE, length INTEGER, '
+        'columnar INTEGER, metadata TEXT)',
+        'CREATE INDEX IF NOT EXISTS records_accession ON records (accession)',
+        'CREATE INDEX IF NOT EXISTS records_organism ON records (organism)',
+        'CREATE TABLE IF NOT EXISTS taxa ('
+        'record INTEGER, rank INTEGER, taxon TEXT COLLATE NOCASE)',
+        'CREATE INDEX IF NOT EXISTS taxa_taxon ON taxa (taxon)',
+        'CREATE INDEX IF NOT EXISTS taxa_record ON taxa (record)',
+        'CREATE TABLE IF NOT EXISTS dblinks ('
+        'record INTEGER, database TEXT, identifier TEXT)',
+        'CREATE INDEX IF NOT EXISTS dblinks_identifier '
+        'ON dblinks (identifier)',
+        'CREATE INDEX IF NOT EXISTS dblinks_record ON dblinks (record)',
+        'CREATE TABLE IF NOT EXISTS features ('
+        'record INTEGER, position INTEGER, type TEXT, start INTEGER, '
+        '"end" INTEGER, strand INTEGER, location TEXT, '
+        'gene TEXT COLLATE NOCASE, locus_tag TEXT COLLATE NOCASE, '
+        'product TEXT COLLATE NOCASE, protein_id TEXT COLLATE NOCASE, '
+        'data TEXT)',
+        'CREATE INDEX IF NOT EXISTS features_record '
+        'ON features (record, start)',
+        'CREATE INDEX IF NOT EXISTS features_start ON features (start)',
+        'CREATE INDEX IF NOT EXISTS features_gene ON features (gene)',
+        'CREATE INDEX IF NOT EXISTS features_locus_tag '
+        'ON features (locus_tag)',
+        'CREATE INDEX IF NOT EXISTS features_product ON features (product)',
+        'CREATE INDEX IF NOT EXISTS features_protein_id '
+        'ON features (protein_id)',
+        'CREATE TABLE IF NOT EXISTS sequences ('
+        'record INTEGER PRIMARY KEY, type TEXT, data BLOB)',
+        'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)',
+        )
+
+# tables referring to a record and their column holding its id
+_RECORD_TABLES = (
+        ('features', 'record'),
+        ('taxa', 'record'),
+        ('dblinks', 'record'),
+        ('sequences', 'record'),
+        ('records', 'id'),
+        )
+# qualifiers stored in an indexed column of the features table
+_FEATURE_COLUMNS = ('gene', 'locus_tag', 'product', 'protein_id')
+_RECORD_FIELDS = (
+        'key', 'locus', 'accession', 'version', 'definition', 'organism',
+        'length',
+        )
+
+
+def _none_keys(pairs):
+    """
+    Restore the None keys of a genome (e.g. genome['locus'][None]) written
+    as "null" by gbparse.sinks.dumps.
+    """
+    return dict((None if _k == 'null' else _k, _v) for _k, _v in pairs)
+
+
+def _loads(text):
+    return json.loads(text, object_pairs_hook=_none_keys)
+
+
+def _text(value):
+    """
+    :return: a qualifier value as stored in the indexed columns, the values
+        of repeated qualifiers joined by '; '.
+    """
+    if isinstance(value, list):
+        return '; '.join(value)
+    return value
+
+
+def _genome_features(content):
+    """
+    :return: list of (feature type, feature dict) of a genome and whether it
+        was parsed into a gbparse.columnar.FeatureTable.
+    """
+    table = content.get('features')
+    if isinstance(table, FeatureTable):
+        features = []
+        for i in range(len(table)):
+            row = table.row(i)
+            feature = dict(
+                    (_k, _v) for _k, _v in row.items()
+                    if _k not in ('record', 'type', 'start', 'end', 'strand')
+                    )
+            feature['bp_range'] = feature.pop('location')
+            features.append((row['type'], feature))
+        return features, True
+    features = []
+    for feature in content.get('genes', []):
+        if feature.get('cds_included'):
+            feature_type = 'cds'
+        elif feature.get('rna_included'):
+            feature_type = 'rna'
+        else:
+            feature_type = 'gene'
+        features.append((feature_type, feature))
+    return features, False
+
+
+def _condition(column, value, parameters):
+    """
+    :return: SQL condition matching column to value: a list matches any of
+        its elements, a string containing '%' is a LIKE pattern.
+    """
+    if isinstance(value, (list, tuple, set, frozenset)):
+        parameters.extend(value)
+        return '{0} IN ({1})'.format(column, ', '.join('?' * len(value)))
+    parameters.append(value)
+    if hasattr(value, 'lower') and '%' in value:
+        return '{0} LIKE ?'.format(column)
+    return '{0} = ?'.format(column)
+
+
+class _LineageParser(object):
+    """
+    Content parser of SOURCE/ORGANISM running the content parser it wraps and
+    keeping the lineage of the organism in genome_content['content']
+    ['lineage'], see GenomeStore.ingest_parser.
+    """
+    def __init__(self, content_parser):
+        self.content_parser = content_parser
+
+    def __call__(self, content_lines, genome_content):
+        organism = {}
+        source_organism(content_lines, organism)
+        content = None
+        if self.content_parser is not None:
+            content = call_content_parser(
+                    resolve(self.content_parser), content_lines,
+                    genome_content
+                    )
+        if 'content' not in genome_content:
+            genome_content['content'] = {}
+        genome_content['content']['lineage'] = _lineage(
+                organism['content']['organism']
+                )
+        return content
+
+
+class GenomeStore(Sink):
+    """
+    SQLite database of parsed genomes that can be queried without loading
+    the genomes, e.g.:
+
+        store = GenomeStore('genomes.db')
+        store.ingest('gbbct1.seq')
+        store.features(type='cds', product='dnaa', taxon='proteobacteria')
+
+    The metadata of each record (LOCUS, accession, version, definition,
+    organism and length) is kept in the indexed records table, together with
+    the remaining sections as json, the lineage of its organism in the taxa
+    and its DBLINK entries in the dblinks table. Features are stored one per
+    row with their coordinates and the qualifiers gene, locus_tag, product
+    and protein_id in indexed columns (compared case insensitively), the
+    complete feature as json. Sequences are kept as blobs in a separate
+    table, such that neither queries nor metadata lookups read them.
+
+    The lineage is read from SOURCE/ORGANISM, which the /organism of a source
+    feature replaces in the parsed genome. Genomes parsed by ingest (or by
+    the Parser returned by ingest_parser) keep it in content['lineage'],
+    whatever the content parsers of the Parser. Genomes written to the store
+    by any other Parser only have a lineage if they kept content['lineage']
+    (see gbparse.content_parsers.default_parsers.source_organism_lineage) or
+    if they have no source feature.
+
+    SQLite is a row store: the features are not stored column-wise. Instead
+    features selects the rows with the indexes and returns them as a
+    gbparse.columnar.FeatureTable, which serves as the columnar query layer.
+
+    Genomes are keyed by their version (accession.version), see
+    gbparse.cache.genome_key, a genome with the same key replaces the stored
+    one. The store also provides versions, upsert and delete to be updated
+    by gbparse.sync.sync.
+
+    Parameter:
+    ----------
+    :param path: Database file.
+    :param batch_size: Number of genomes stored per transaction.
+    :param encoder: callable encoding a genome (or feature) as json bytes.
+    """
+    def __init__(self, path, batch_size=100, encoder=dumps):
+        Sink.__init__(self, batch_size=batch_size, encoder=encoder)
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute('PRAGMA journal_mode = WAL')
+        self._db.execute('PRAGMA synchronous = NORMAL')
+        with self._db:
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+        row = self._db.execute(
+                "SELECT value FROM meta WHERE key = 'max_feature_length'"
+                ).fetchone()
+        self._max_feature_length = row[0] if row else 0
+
+    def ingest_parser(self, parser=None):
+        """
+        :param parser: gbparse.Parser whose configuration, content parsers,
+            stats and diagnostics to use, a new Parser by default.
+        :return: a Parser whose content parser of SOURCE/ORGANISM keeps the
+            lineage of the organism in content['lineage'] (besides running
+            the content parser of parser), to write genomes to the store,
+            e.g. with Parser.sync or Parser.fetch. parser is not changed.
+        """
+        if parser is None:
+            parser = Parser()
+        ingest_parser = parser._spawn()
+        ingest_parser.stats = parser.stats
+        ingest_parser.fetch_cache = parser.fetch_cache
+        content_parser = parser.content_parser.copy()
+        organism = content_parser.get('source', {}).get('organism')
+        if not isinstance(organism, _LineageParser):
+            content_parser.register(
+                    'source', 'organism', _LineageParser(organism)
+                    )
+        ingest_parser.content_parser = content_parser
+        return ingest_parser
+
+    def ingest(self, path, parser=None, **kwargs):
+        """
+        Parse a (possibly compressed) GenBank file into the store, keeping
+        the lineage of the organisms to query them by taxon, see
+        ingest_parser.
+
+        Parameter:
+        ----------
+        :param path: Path to the GenBank file.
+        :param parser: gbparse.Parser to parse the file with, see
+            ingest_parser.
+        :param kwargs: Options of Parser.parse_path, e.g. exclude.
+        """
+        self.ingest_parser(parser).parse_path(path, save_to=self, **kwargs)
+        return None
+
+    def _remove(self, column, values):
+        """
+        Delete the records with one of the values in column, including their
+        features, lineage, DBLINK entries and sequence.
+        """
+        ids = []
+        for value in values:
+            ids.extend(_r[0] for _r in self._db.execute(
+                'SELECT id FROM records WHERE {0} = ?'.format(column),
+                (value,)
+                ))
+        for table, id_column in _RECORD_TABLES:
+            self._db.executemany(
+                    'DELETE FROM {0} WHERE {1} = ?'.format(table, id_column),
+                    [(_i,) for _i in ids]
+                    )
+        return None
+
+    def _insert(self, genome):
+        key = genome_key(genome)
+        self._remove('key', [key])
+        content = genome.get('content', {})
+        features, columnar = _genome_features(content)
+        sequence = content.get('sequence')
+        if isinstance(sequence, PackedSequence):
+            sequence_type, sequence = '2bit', sequence.unpack()
+        elif isinstance(sequence, bytes):
+            sequence_type = 'bytes'
+        else:
+            sequence_type = 'str'
+            sequence = sequence.encode('ascii') if sequence else None
+        metadata = dict(genome)
+        metadata['content'] = dict(
+                (_k, _v) for _k, _v in content.items()
+                if _k not in ('genes', 'features', 'sequence')
+                )
+        organism = content.get('organism')
+        lineage = content.get('lineage')
+        if isinstance(organism, list):  # not replaced by the source feature
+            if lineage is None:
+                lineage = _lineage(organism)
+            organism = organism[0] if organism else None
+        locus, accession, version, definition = _genome_columns(genome)
+        if sequence is not None:
+            length = len(sequence)
+        else:
+            length = genome.get('locus', {}).get('size [bp]')
+            length = int(length) if length and length.isdigit() else None
+        record = self._db.execute(
+                'INSERT INTO records (key, locus, accession, version, '
+                'version_number, definition, organism, length, columnar, '
+                'metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    key,
+                    locus,
+                    accession,
+                    version,
+                    split_version(version)[1] if version else 0,
+                    definition,
+                    organism,
+                    length,
+                    int(columnar),
+                    self.encoder(metadata).decode('utf-8'),
+                    )
+                ).lastrowid
+        self._db.executemany(
+                'INSERT INTO taxa VALUES (?, ?, ?)',
+                [(record, _i, _t) for _i, _t in enumerate(lineage or [])]
+                )
+        self._db.executemany(
+                'INSERT INTO dblinks VALUES (?, ?, ?)',
+                [
+                    (record, _d, _i)
+                    for _d, _i in genome.get('dblink', {}).items()
+                    if _d is not None
+                    ]
+                )
+        rows = []
+        for position, (feature_type, feature) in enumerate(features):
+            location = feature.get('bp_range')
+            try:
+                _location = parse_location(location)
+                start, end, strand = \
+                    _location.start, _location.end, _location.strand
+            except (LocationParsingException, AttributeError):
+                start = end = strand = None
+            else:
+                self._max_feature_length = max(
+                        self._max_feature_length, end - start + 1
+                        )
+            rows.append((record, position, feature_type, start, end, strand,
+                         location) + tuple(
+                             _text(feature.get(_c)) for _c in _FEATURE_COLUMNS
+                             ) + (self.encoder(feature).decode('utf-8'),))
+        self._db.executemany(
+                'INSERT INTO features VALUES '
+                '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+                )
+        if sequence is not None:
+            self._db.execute(
+                    'INSERT INTO sequences VALUES (?, ?, ?)',
+                    (record, sequence_type, sqlite3.Binary(sequence))
+                    )
+        return None
+
+    def _write_batch(self, genomes, replaced=()):
+        """
+        Insert the genomes in one transaction, after removing all versions of
+        the accessions in replaced (see upsert).
+        """
+        with self._db:
+            if replaced:
+                self._remove('accession', replaced)
+            for genome in genomes:
+                self._insert(genome)
+            self._db.execute(
+                    'INSERT OR REPLACE INTO meta VALUES '
+                    "('max_feature_length', ?)",
+                    (self._max_feature_length,)
+                    )
+
+    # queries
+
+    def __len__(self):
+        self.flush()
+        return self._db.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def keys(self):
+        """
+        :return: list of the keys (versions) of the stored genomes.
+        """
+        self.flush()
+        return [_r[0] for _r in self._db.execute(
+            'SELECT key FROM records ORDER BY id'
+            )]
+
+    def _record_conditions(self, conditions, parameters, record=None,
+                           organism=None, taxon=None, dblink=None,
+                           id_column='records.id'):
+        if record is not None:
+            conditions.append('({0} OR {1})'.format(
+                _condition('records.key', record, parameters),
+                _condition('records.accession', record, parameters)
+                ))
+        if organism is not None:
+            conditions.append(
+                    _condition('records.organism', organism, parameters)
+                    )
+        if taxon is not None:
+            conditions.append('{0} IN (SELECT record FROM taxa WHERE {1})'
+                              ''.format(
+                                  id_column,
+                                  _condition('taxon', taxon, parameters)
+                                  ))
+        if dblink is not None:
+            conditions.append(
+                    '{0} IN (SELECT record FROM dblinks WHERE {1})'.format(
+                        id_column,
+                        _condition('identifier', dblink, parameters)
+                        )
+                    )
+        return conditions
+
+    def records(self, record=None, organism=None, taxon=None, dblink=None):
+        """
+        Select records by their metadata. All conditions have to match, a
+        condition given as list matches any of its values and strings
+        containing '%' are matched as LIKE pattern.
+
+        Parameter:
+        ----------
+        :param record: key (accession.version) or accession.
+        :param organism: name of the organism (case insensitive).
+        :param taxon: any rank of the lineage of the organism, e.g.
+            'proteobacteria' (case insensitive).
+        :param dblink: identifier listed in DBLINK, e.g. a BioProject.
+
+        :return: list of dicts with the key, locus, accession, version,
+            definition, organism and length of the records.
+        """
+        self.flush()
+        parameters = []
+        conditions = self._record_conditions(
+                [], parameters, record, organism, taxon, dblink
+                )
+        return [
+                dict(zip(_RECORD_FIELDS, _r))
+                for _r in self._db.execute(
+                    'SELECT {0} FROM records {1} ORDER BY id'.format(
+                        ', '.join(_RECORD_FIELDS),
+                        'WHERE ' + ' AND '.join(conditions)
+                        if conditions else ''
+                        ),
+                    parameters
+                    )
+                ]
+
+    def features(self, type=None, gene=None, product=None, locus_tag=None,
+                 protein_id=None, start=None, end=None, record=None,
+                 organism=None, taxon=None, dblink=None, limit=None):
+        """
+        Select features by their qualifiers, position and record, see
+        records for the format of the conditions and the record conditions.
+
+        Parameter:
+        ----------
+        :param type: feature type, 'gene', 'cds' or 'rna' (or the feature key
+            of genomes parsed with the columnar parser).
+        :param gene: /gene (case insensitive).
+        :param product: /product (case insensitive).
+        :param locus_tag: /locus_tag (case insensitive).
+        :param protein_id: /protein_id (case insensitive).
+        :param start: Select the features overlapping the (1-based,
+            inclusive) range [start, end] of their record.
+        :param end: see start.
+        :param limit: maximal number of features.
+
+        :return: gbparse.columnar.FeatureTable of the features, the record
+            column holding the key of their record.
+        """
+        self.flush()
+        parameters = []
+        conditions = []
+        for column, value in (
+                ('features.type', type),
+                ('features.gene', gene),
+                ('features.product', product),
+                ('features.locus_tag', locus_tag),
+                ('features.protein_id', protein_id),
+                ):
+            if value is not None:
+                conditions.append(_condition(column, value, parameters))
+        if start is not None or end is not None:
+            # a feature starting more than the length of the longest feature
+            # before start cannot reach it, which bounds the index range
+            _start = 1 if start is None else start
+            conditions.append('features.start >= ? AND features."end" >= ?')
+            parameters.extend([_start - self._max_feature_length, _start])
+            if end is not None:
+                conditions.append('features.start <= ?')
+                parameters.append(end)
+        self._record_conditions(
+                conditions, parameters, record, organism, taxon, dblink,
+                id_column='features.record'
+                )
+        query = (
+                'SELECT records.key, features.type, features.location, '
+                'features.data FROM features JOIN records '
+                'ON records.id = features.record {0} '
+                'ORDER BY features.record, features.position'.format(
+                    'WHERE ' + ' AND '.join(conditions) if conditions else ''
+                    )
+                )
+        if limit is not None:
+            query += ' LIMIT {0:d}'.format(limit)
+        table = FeatureTable()
+        for key, feature_type, location, data in self._db.execute(
+                query, parameters):
+            table.append(key, feature_type, location, dict(
+                (_k, _text(_v)) for _k, _v in _loads(data).items()
+                if _k != 'bp_range' and not _k.startswith('_') and
+                not isinstance(_v, bool)
+                ))
+        return table
+
+    def _record_id(self, key):
+        self.flush()
+        row = self._db.execute(
+                'SELECT id FROM records WHERE key = ? OR accession = ? '
+                'ORDER BY version_number DESC LIMIT 1',
+                (key, key)
+                ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return row[0]
+
+    def sequence(self, key, start=None, end=None):
+        """
+        Read the sequence of a record or a part of it from the blob.
+
+        Parameter:
+        ----------
+        :param key: key (accession.version) or accession of the record.
+        :param start: first base (1-based) to read.
+        :param end: last base (inclusive) to read.
+
+        :return: the sequence as bytes, None if the record has no sequence.
+        :raises: KeyError if there is no such record.
+        """
+        record = self._record_id(key)
+        _start = 1 if start is None else start
+        if end is None:
+            row = self._db.execute(
+                    'SELECT substr(data, ?) FROM sequences WHERE record = ?',
+                    (_start, record)
+                    ).fetchone()
+        else:
+            row = self._db.execute(
+                    'SELECT substr(data, ?, ?) FROM sequences '
+                    'WHERE record = ?',
+                    (_start, max(end - _start + 1, 0), record)
+                    ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def genome(self, key):
+        """
+        :param key: key (accession.version) or accession of the record, the
+            latest version of an accession is returned.
+        :return: the stored genome as returned by the parser.
+        :raises: KeyError if there is no such genome.
+        """
+        record = self._record_id(key)
+        columnar, metadata = self._db.execute(
+                'SELECT columnar, metadata FROM records WHERE id = ?',
+                (record,)
+                ).fetchone()
+        genome = _loads(metadata)
+        content = genome['content']
+        features = [
+                (_t, _loads(_d)) for _t, _d in self._db.execute(
+                    'SELECT type, data FROM features WHERE record = ? '
+                    'ORDER BY position',
+                    (record,)
+                    )
+                ]
+        if columnar:
+            content['features'] = FeatureTable()
+            for feature_type, feature in features:
+                location = feature.pop('bp_range')
+                content['features'].append(
+                        genome.get('locus', {}).get(None), feature_type,
+                        location, feature
+                        )
+        elif features:
+            content['genes'] = [_f for _, _f in features]
+        row = self._db.execute(
+                'SELECT type, data FROM sequences WHERE record = ?',
+                (record,)
+                ).fetchone()
+        if row is not None:
+            sequence_type, sequence = row[0], bytes(row[1])
+            if sequence_type == '2bit':
+                sequence = PackedSequence.pack(sequence)
+            elif sequence_type == 'str':
+                sequence = sequence.decode('ascii')
+            content['sequence'] = sequence
+        return genome
+
+    # The methods below let the store serve as store for gbparse.sync.
+
+    def versions(self):
+        """
+        :return: dict mapping the accession of each stored genome to its
+            version number.
+        """
+        self.flush()
+        versions = {}
+        for accession, number in self._db.execute(
+                'SELECT accession, version_number FROM records'):
+            if number >= versions.get(accession, -1):
+                versions[accession] = number
+        return versions
+
+    def upsert(self, genomes):
+        """
+        Store the genomes, replacing any stored version of their accessions.
+        Of several versions of an accession among the genomes, only the
+        highest is stored.
+        """
+        self.flush()
+        genomes = _latest_versions(genomes)
+        # a single transaction: readers never see the accessions removed
+        # but not yet inserted again
+        self._write_batch(
+                genomes, set(_genome_columns(_g)[1] for _g in genomes)
+                )
+        self.written += len(genomes)
+        return None
+
+    def delete(self, accessions):
+        """
+        Remove all versions of the accessions.
+        """
+        self.flush()
+        with self._db:
+            self._remove('accession', accessions)
+        return None
+
+    def close(self):
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+        return None
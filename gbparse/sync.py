@@ -0,0 +1,139 @@
+from __future__ import unicode_literals, absolute_import
+# Incremental update of a store of parsed genomes from GenBank update files.
+import io
+from .records import iter_selected_records, split_version
+from .compression import open_path
+from .stats import timer
+
+
+class SyncReport(object):
+    """
+    Changes applied by a sync.
+
+    added: versions (accession.version) of the genomes new to the store.
+    updated: (old version, new version) of the genomes replaced by a newer
+        version.
+    deleted: accessions removed by the deletion lists.
+    unchanged: number of records of the update files that were skipped as the
+        store holds the same or a newer version.
+    """
+    def __init__(self):
+        self.added = []
+        self.updated = []
+        self.deleted = []
+        self.unchanged = 0
+        self.seconds = 0.
+
+    def summary(self):
+        return {
+                'added': len(self.added),
+                'updated': len(self.updated),
+                'deleted': len(self.deleted),
+                'unchanged': self.unchanged,
+                'seconds': self.seconds,
+                }
+
+    def __repr__(self):
+        return 'SyncReport({0})'.format(', '.join(
+            '{0}={1}'.format(_k, _v)
+            for _k, _v in sorted(self.summary().items())
+            ))
+
+
+def read_deletions(path):
+    """
+    Read a deletion list: one accession or accession.version per line as
+    first column, empty lines and lines starting with '#' are ignored.
+
+    :return: list of (accession, version number or None) tuples.
+    """
+    deletions = []
+    with io.TextIOWrapper(open_path(path), encoding='utf-8') as f_in:
+        for line in f_in:
+            tokens = line.split()
+            if not tokens or tokens[0].startswith('#'):
+                continue
+            if '.' in tokens[0]:
+                deletions.append(split_version(tokens[0]))
+            else:
+                deletions.append((tokens[0], None))
+    return deletions
+
+
+def _format_version(accession, number):
+    return '{0}.{1}'.format(accession, number) if number else accession
+
+
+def sync(parser, store, update_files=(), deletions=(), batch_size=500,
+         **options):
+    """
+    Bring a store of parsed genomes up to date with GenBank update files
+    (e.g. the daily nc*.flat files) and deletion lists.
+
+    Only the header (LOCUS to VERSION) of each record is read to decide
+    whether it is needed; records whose accession is not in the store or
+    which have a higher version than the stored genome are parsed and
+    upserted in batches, all others are skipped without running any content
+    parser.
+
+    Parameter:
+    ----------
+    :param parser: The gbparse.Parser used to parse the records.
+    :param store: Store of the genomes providing versions() (dict mapping
+        each accession to its stored version number), upsert(genomes) and
+        delete(accessions), e.g. a gbparse.sinks.SQLiteSink or a
+        gbparse.store.GenomeStore.
+    :param update_files: List of paths of (possibly compressed) flatfiles.
+    :param deletions: List of paths of deletion lists (see read_deletions).
+        A listed accession.version only deletes the stored genome if its
+        version is not newer.
+    :param batch_size: Number of genomes parsed and upserted at once.
+    :param options: Options of Parser.iter_parse (lazy, include, exclude).
+
+    :return: SyncReport
+    """
+    report = SyncReport()
+    start = timer()
+    versions = store.versions()
+    genome_end = parser._genome_end.encode('ascii')
+
+    def select(accession, number):
+        return number > versions.get(accession, -1)
+
+    def upsert(batch):
+        store.upsert(parser._parse_bytes(b''.join(batch), **options))
+        del batch[:]
+
+    for path in update_files:
+        batch = []
+        with open_path(path) as fobj:
+            for accession, number, data in iter_selected_records(
+                    fobj, select, genome_end=genome_end):
+                if data is None:
+                    report.unchanged += 1
+                    continue
+                version = _format_version(accession, number)
+                if accession in versions:
+                    report.updated.append((
+                        _format_version(accession, versions[accession]),
+                        version
+                        ))
+                else:
+                    report.added.append(version)
+                versions[accession] = number
+                batch.append(data)
+                if len(batch) >= batch_size:
+                    upsert(batch)
+        if batch:
+            upsert(batch)
+    for path in deletions:
+        to_delete = [
+                _a for _a, _n in read_deletions(path)
+                if _a in versions and (_n is None or versions[_a] <= _n)
+                ]
+        store.delete(to_delete)
+        for accession in to_delete:
+            del versions[accession]
+        report.deleted.extend(to_delete)
+    report.seconds = timer() - start
+    return report
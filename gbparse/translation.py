@@ -0,0 +1,625 @@
+from __future__ import unicode_literals, absolute_import
+# Extraction of the sequences of features and their translation with the
+# genetic codes of the NCBI.
+import re
+import itertools
+from .locations import Location, parse_location, LocationParsingException
+from .sequence import PackedSequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TranslationException(Exception):
+    pass
+
+
+class ExtractionException(Exception):
+    pass
+
+
+# bases in the order of the NCBI tables (first base varies slowest)
+_BASES = 'tcag'
+# IUPAC nucleotide codes and the bases they stand for
+_AMBIGUITY = {
+        't': 't', 'c': 'c', 'a': 'a', 'g': 'g', 'u': 't',
+        'r': 'ag', 'y': 'ct', 's': 'cg', 'w': 'at', 'k': 'gt', 'm': 'ac',
+        'b': 'cgt', 'd': 'agt', 'h': 'act', 'v': 'acg', 'n': 'tcag',
+        }
+_COMPLEMENT_BASES = dict(zip('tcaguryswkmbdhvn', 'agtcayrswmkvhdbn'))
+_COMPLEMENT_BASES.update(
+        (_b.upper(), _c.upper()) for _b, _c in list(_COMPLEMENT_BASES.items())
+        )
+_COMPLEMENT = bytes(bytearray(
+        ord(_COMPLEMENT_BASES.get(chr(_b), chr(_b))) for _b in range(256)
+        ))
+# codes of the bases for the vectorized translation, 4 is any other symbol
+_CODES = bytes(bytearray(
+        {'t': 0, 'u': 0, 'c': 1, 'a': 2, 'g': 3}.get(chr(_b).lower(), 4)
+        for _b in range(256)
+        ))
+_CODE_COMPLEMENT = (2, 3, 0, 1, 4)
+
+# single letter codes of the amino acids in /transl_except
+_AMINO_ACIDS = {
+        'ala': 'A', 'arg': 'R', 'asn': 'N', 'asp': 'D', 'cys': 'C',
+        'gln': 'Q', 'glu': 'E', 'gly': 'G', 'his': 'H', 'ile': 'I',
+        'leu': 'L', 'lys': 'K', 'met': 'M', 'phe': 'F', 'pro': 'P',
+        'ser': 'S', 'thr': 'T', 'trp': 'W', 'tyr': 'Y', 'val': 'V',
+        'sec': 'U', 'pyl': 'O', 'asx': 'B', 'glx': 'Z', 'xle': 'J',
+        'term': '*', 'other': 'X',
+        }
+_TRANSL_EXCEPT = re.compile(r'\(pos:(.+),aa:(\w+)\)', re.IGNORECASE)
+
+
+class CodonTable(object):
+    """
+    A genetic code as listed by the NCBI
+    (https://www.ncbi.nlm.nih.gov/Taxonomy/Utils/wprintgc.cgi).
+
+    amino_acids and starts hold one letter per codon, the codons ordered
+    TTT, TTC, TTA, TTG, TCT, ... GGG. Start codons are marked with 'M' in
+    starts.
+
+    Codons with ambiguous bases (e.g. 'ctn') are translated if all bases
+    they stand for give the same amino acid, else as 'X'.
+    """
+    __slots__ = ('id', 'name', 'amino_acids', 'starts', '_codons',
+                 '_start_codons', '_lookup')
+
+    def __init__(self, id, name, amino_acids, starts):
+        self.id = id
+        self.name = name
+        self.amino_acids = amino_acids
+        self.starts = starts
+        self._codons = None
+        self._start_codons = None
+        self._lookup = None
+
+    def _translate_codon(self, codon):
+        translations = set(
+                self.amino_acids[
+                    16 * _BASES.index(_b0) + 4 * _BASES.index(_b1) +
+                    _BASES.index(_b2)
+                    ]
+                for _b0, _b1, _b2 in itertools.product(
+                    *(_AMBIGUITY[_s] for _s in codon)
+                    )
+                )
+        return translations.pop() if len(translations) == 1 else 'X'
+
+    @property
+    def codons(self):
+        """
+        dict mapping each (lowercase) codon as bytes, including those with
+        ambiguous bases, to its amino acid.
+        """
+        if self._codons is None:
+            self._codons = dict(
+                    (''.join(_c).encode('ascii'), self._translate_codon(_c))
+                    for _c in itertools.product(sorted(_AMBIGUITY), repeat=3)
+                    )
+        return self._codons
+
+    @property
+    def start_codons(self):
+        if self._start_codons is None:
+            self._start_codons = frozenset(
+                    ''.join(_c).encode('ascii')
+                    for _c, _s in zip(
+                        itertools.product(_BASES, repeat=3), self.starts
+                        )
+                    if _s == 'M'
+                    )
+        return self._start_codons
+
+    def _vectorized(self, reverse=False):
+        """
+        Lookup tables of the vectorized translation, indexed by the codon
+        code 25 * code0 + 5 * code1 + code2 of three consecutive bases (see
+        _CODES). With reverse, the codon is read backwards on the
+        complementary strand (i.e. the complement of code2, code1, code0).
+
+        :return: the numpy lookup table of the amino acids, 0 for ambiguous
+            codons that cannot be resolved from their codes, and the boolean
+            table of the start codons.
+        """
+        if self._lookup is None:
+            self._lookup = {}
+            for _reverse in (False, True):
+                lookup = bytearray(125)
+                starts = np.zeros(125, dtype=bool)
+                for codes in itertools.product(range(5), repeat=3):
+                    if _reverse:
+                        codon = [_CODE_COMPLEMENT[_c] for _c in codes[::-1]]
+                    else:
+                        codon = codes
+                    codon = ''.join(_BASES[_c] if _c < 4 else 'n'
+                                    for _c in codon)
+                    amino_acid = self._translate_codon(codon)
+                    index = 25 * codes[0] + 5 * codes[1] + codes[2]
+                    if amino_acid != 'X':
+                        lookup[index] = ord(amino_acid)
+                    starts[index] = \
+                        codon.encode('ascii') in self.start_codons
+                self._lookup[_reverse] = (
+                        np.frombuffer(bytes(lookup), dtype=np.uint8), starts
+                        )
+        return self._lookup[reverse]
+
+    def __repr__(self):
+        return '{0}({1!r}, {2!r})'.format(
+                self.__class__.__name__, self.id, self.name
+                )
+
+
+CODON_TABLES = dict((_t.id, _t) for _t in (
+    CodonTable(
+        1, 'Standard',
+        'FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '---M------**--*----M---------------M----------------------------'),
+    CodonTable(
+        2, 'Vertebrate Mitochondrial',
+        'FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIMMTTTTNNKKSS**VVVVAAAADDEEGGGG',
+        '----------**--------------------MMMM----------**---M------------'),
+    CodonTable(
+        3, 'Yeast Mitochondrial',
+        'FFLLSSSSYY**CCWWTTTTPPPPHHQQRRRRIIMMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '----------**----------------------MM---------------M------------'),
+    CodonTable(
+        4, 'Mold, Protozoan, Coelenterate Mitochondrial and Mycoplasma',
+        'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '--MM------**-------M------------MMMM---------------M------------'),
+    CodonTable(
+        5, 'Invertebrate Mitochondrial',
+        'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSSSVVVVAAAADDEEGGGG',
+        '---M------**--------------------MMMM---------------M------------'),
+    CodonTable(
+        6, 'Ciliate, Dasycladacean and Hexamita Nuclear',
+        'FFLLSSSSYYQQCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '--------------*--------------------M----------------------------'),
+    CodonTable(
+        9, 'Echinoderm and Flatworm Mitochondrial',
+        'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG',
+        '-----------------------------------M---------------M------------'),
+    CodonTable(
+        10, 'Euplotid Nuclear',
+        'FFLLSSSSYY**CCCWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '-----------------------------------M----------------------------'),
+    CodonTable(
+        11, 'Bacterial, Archaeal and Plant Plastid',
+        'FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '---M------**--*----M------------MMMM---------------M------------'),
+    CodonTable(
+        12, 'Alternative Yeast Nuclear',
+        'FFLLSSSSYY**CC*WLLLSPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '-------------------M---------------M----------------------------'),
+    CodonTable(
+        13, 'Ascidian Mitochondrial',
+        'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSGGVVVVAAAADDEEGGGG',
+        '---M------------------------------MM---------------M------------'),
+    CodonTable(
+        14, 'Alternative Flatworm Mitochondrial',
+        'FFLLSSSSYYY*CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG',
+        '-----------------------------------M----------------------------'),
+    CodonTable(
+        16, 'Chlorophycean Mitochondrial',
+        'FFLLSSSSYY*LCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '-----------------------------------M----------------------------'),
+    CodonTable(
+        21, 'Trematode Mitochondrial',
+        'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNNKSSSSVVVVAAAADDEEGGGG',
+        '-----------------------------------M---------------M------------'),
+    CodonTable(
+        22, 'Scenedesmus obliquus Mitochondrial',
+        'FFLLSS*SYY*LCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '-----------------------------------M----------------------------'),
+    CodonTable(
+        23, 'Thraustochytrium Mitochondrial',
+        'FF*LSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '--------------------------------M--M---------------M------------'),
+    CodonTable(
+        24, 'Rhabdopleuridae Mitochondrial',
+        'FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSSKVVVVAAAADDEEGGGG',
+        '---M------**-------M---------------M---------------M------------'),
+    CodonTable(
+        25, 'Candidate Division SR1 and Gracilibacteria',
+        'FFLLSSSSYY**CCGWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '---M-------------------------------M---------------M------------'),
+    CodonTable(
+        26, 'Pachysolen tannophilus Nuclear',
+        'FFLLSSSSYY**CC*WLLLAPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '-------------------M---------------M----------------------------'),
+    CodonTable(
+        27, 'Karyorelict Nuclear',
+        'FFLLSSSSYYQQCCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '--------------*--------------------M----------------------------'),
+    CodonTable(
+        28, 'Condylostoma Nuclear',
+        'FFLLSSSSYYQQCCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '----------**--*--------------------M----------------------------'),
+    CodonTable(
+        29, 'Mesodinium Nuclear',
+        'FFLLSSSSYYYYCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '--------------*--------------------M----------------------------'),
+    CodonTable(
+        30, 'Peritrich Nuclear',
+        'FFLLSSSSYYEECC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '--------------*--------------------M----------------------------'),
+    CodonTable(
+        31, 'Blastocrithidia Nuclear',
+        'FFLLSSSSYYEECCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG',
+        '----------**-----------------------M----------------------------'),
+    CodonTable(
+        33, 'Cephalodiscidae Mitochondrial',
+        'FFLLSSSSYYY*CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSSKVVVVAAAADDEEGGGG',
+        '---M-------*-------M---------------M---------------M------------'),
+    ))
+
+
+def codon_table(table):
+    """
+    :param table: id of a genetic code (e.g. 11 or '11' as in /transl_table)
+        or a CodonTable.
+    :return: CodonTable
+    :raises: TranslationException if there is no such genetic code.
+    """
+    if isinstance(table, CodonTable):
+        return table
+    try:
+        return CODON_TABLES[int(table)]
+    except (KeyError, ValueError, TypeError):
+        raise TranslationException(
+                'Unknown genetic code {0!r}'.format(table)
+                )
+
+
+def _as_bytes(sequence):
+    if isinstance(sequence, PackedSequence):
+        return sequence.unpack()
+    if isinstance(sequence, bytes):
+        return sequence
+    return sequence.encode('ascii')
+
+
+def reverse_complement(sequence):
+    """
+    :param sequence: bytes of a nucleotide sequence (IUPAC codes are
+        complemented as well).
+    :return: the reverse complement as bytes.
+    """
+    return sequence.translate(_COMPLEMENT)[::-1]
+
+
+def _location(location):
+    if isinstance(location, Location):
+        return location
+    return parse_location(location)
+
+
+def extract(sequence, location):
+    """
+    Cut the sequence of a feature out of the sequence of its genome: the
+    parts are joined in the order they are transcribed and the parts on the
+    complementary strand are reverse complemented.
+
+    Parameter:
+    ----------
+    :param sequence: The sequence of the genome (str, bytes or
+        gbparse.sequence.PackedSequence, e.g. genome['content']['sequence']).
+    :param location: The location string of the feature (e.g. its bp_range)
+        or a gbparse.locations.Location.
+
+    :return: the sequence of the feature as bytes.
+    :raises: ExtractionException if the location has parts on other records
+        or beyond the end of the sequence.
+    """
+    return _extract(_as_bytes(sequence), _location(location))
+
+
+def _extract(sequence, location):
+    if location.remote_parts:
+        raise ExtractionException(
+                'The location {0!r} has parts on other records'.format(
+                    location
+                    )
+                )
+    parts = []
+    for start, end, strand in location.parts:
+        if start < 1 or end > len(sequence) or start > end:
+            raise ExtractionException(
+                    'The part {0}..{1} is out of the sequence of length '
+                    '{2}'.format(start, end, len(sequence))
+                    )
+        if strand < 0:
+            parts.append(reverse_complement(sequence[start - 1:end]))
+        else:
+            parts.append(sequence[start - 1:end])
+    return b''.join(parts)
+
+
+def translate(nucleotides, table=1):
+    """
+    Translate every complete codon of a nucleotide sequence, stop codons are
+    translated as '*'.
+
+    Parameter:
+    ----------
+    :param nucleotides: str or bytes of the nucleotide sequence.
+    :param table: The genetic code, see codon_table.
+
+    :return: the protein sequence as (upper case) str.
+    """
+    codons = codon_table(table).codons
+    nucleotides = _as_bytes(nucleotides).lower()
+    return ''.join([
+        codons.get(nucleotides[_i:_i + 3], 'X')
+        for _i in range(0, len(nucleotides) - 2, 3)
+        ])
+
+
+class _Job(object):
+    """
+    The translation of a coding feature as in its /translation qualifier:
+    translation starts at codon_start, an alternative start codon is
+    translated as 'M' if the 5' end is complete, the exceptions of
+    /transl_except (protein positions mapped to amino acids) are applied and
+    a final stop codon is removed.
+    """
+    __slots__ = ('location', 'table', 'offset', 'complete_start',
+                 'exceptions')
+
+    def __init__(self, location, table, codon_start=1, transl_except=None):
+        self.location = location
+        self.table = table
+        self.offset = int(codon_start) - 1
+        if location.parts[0][2] < 0:
+            partial = location.partial_end
+        else:
+            partial = location.partial_start
+        self.complete_start = not partial and not self.offset
+        self.exceptions = {}
+        if transl_except:
+            if not isinstance(transl_except, list):
+                transl_except = [transl_except]
+            for value in transl_except:
+                self._add_exception(value)
+
+    def _add_exception(self, value):
+        match = _TRANSL_EXCEPT.match(value)
+        if match is None:
+            return None
+        try:
+            position = parse_location(match.group(1)).parts[0]
+        except LocationParsingException:
+            return None
+        offset = 0
+        for start, end, strand in self.location.parts:
+            if strand > 0 and start <= position[0] <= end:
+                offset += position[0] - start
+                break
+            elif strand < 0 and start <= position[1] <= end:
+                offset += end - position[1]
+                break
+            offset += end - start + 1
+        else:  # not within the feature
+            return None
+        self.exceptions[(offset - self.offset) // 3] = _AMINO_ACIDS.get(
+                match.group(2).lower(), 'X'
+                )
+        return None
+
+    def finish(self, protein, starts_with_start_codon):
+        if self.complete_start and starts_with_start_codon:
+            protein = 'M' + protein[1:]
+        if self.exceptions:
+            protein = list(protein)
+            for position, amino_acid in self.exceptions.items():
+                if 0 <= position < len(protein):
+                    protein[position] = amino_acid
+            protein = ''.join(protein)
+        if protein.endswith('*'):
+            protein = protein[:-1]
+        return protein
+
+    def translate(self, sequence):
+        """
+        :param sequence: The genome sequence as bytes.
+        """
+        nucleotides = _extract(sequence, self.location)[self.offset:].lower()
+        return self.finish(
+                translate(nucleotides, self.table),
+                nucleotides[:3] in self.table.start_codons
+                )
+
+
+def _translate_vectorized(sequence, jobs):
+    """
+    Translate the jobs over the genome sequence with numpy: the codon code
+    at each position of the genome is computed once, the codons of a single
+    part feature are then a strided slice of these (read backwards for the
+    complementary strand) and the features are translated with one lookup
+    per genetic code and strand.
+
+    :return: list of the proteins.
+    """
+    codes = np.frombuffer(sequence.translate(_CODES), dtype=np.uint8)
+    # the codon starting at each position, on the complementary strand it is
+    # the (reversed) codon ending there
+    codons = codes[:-2] * 25 + codes[1:-1] * 5 + codes[2:]
+    complement = np.array(_CODE_COMPLEMENT, dtype=np.uint8)
+    groups = {}
+    for i, job in enumerate(jobs):
+        parts = job.location.parts
+        reverse = len(parts) == 1 and parts[0][2] < 0
+        if len(parts) > 1:
+            spliced = np.concatenate([
+                codes[_s - 1:_e] if _strand > 0
+                else complement[codes[_s - 1:_e][::-1]]
+                for _s, _e, _strand in parts
+                ])[job.offset:]
+            spliced = spliced[:len(spliced) - len(spliced) % 3]
+            selected = spliced[0::3] * 25 + spliced[1::3] * 5 + \
+                spliced[2::3]
+        elif reverse:
+            start, end, _ = parts[0]
+            first = end - 3 - job.offset
+            selected = codons[first:start - 2 if start > 1 else None:-3] \
+                if first >= 0 else codons[:0]
+        else:
+            start, end, _ = parts[0]
+            selected = codons[start - 1 + job.offset:end - 2:3]
+        group = groups.setdefault((job.table.id, reverse), ([], []))
+        group[0].append(i)
+        group[1].append(selected)
+    proteins = [None] * len(jobs)
+    for (_, reverse), (indices, selections) in groups.items():
+        lookup, starts = jobs[indices[0]].table._vectorized(reverse)
+        selected = np.concatenate(selections)
+        translated = lookup[selected].tobytes().decode('latin-1')
+        lengths = np.array([len(_s) for _s in selections])
+        firsts = np.cumsum(lengths) - lengths
+        if len(selected):
+            first_is_start = starts[
+                    selected[np.minimum(firsts, len(selected) - 1)]
+                    ] & (lengths > 0)
+        else:
+            first_is_start = lengths > 0
+        ambiguous = '\x00' in translated
+        for i, first, length, is_start in zip(
+                indices, firsts.tolist(), lengths.tolist(),
+                first_is_start.tolist()):
+            protein = translated[first:first + length]
+            if ambiguous and '\x00' in protein:  # e.g. codons with 'y'
+                proteins[i] = jobs[i].translate(sequence)
+            else:
+                proteins[i] = jobs[i].finish(protein, is_start)
+    return proteins
+
+
+def translate_features(sequence, features, table=1, location_key='bp_range',
+                       vectorized=True):
+    """
+    Translate the coding features (e.g. the CDS) of a genome.
+
+    Each feature is translated as in its /translation qualifier, using the
+    genetic code of its /transl_table, starting at its /codon_start and
+    applying its /transl_except: an alternative start codon (e.g. 'gtg') is
+    translated as 'M' if the 5' end of the feature is complete and a final
+    stop codon is removed.
+
+    With numpy installed all features are translated at once using vectorized
+    lookup tables, else codon by codon.
+
+    Parameter:
+    ----------
+    :param sequence: The sequence of the genome (str, bytes or
+        gbparse.sequence.PackedSequence).
+    :param features: list of features, e.g. the cds of
+        genome['content']['genes'].
+    :param table: The genetic code of features without /transl_table, see
+        codon_table.
+    :param location_key: key holding the location string of a feature.
+    :param vectorized: Use numpy if it is available.
+
+    :return: list of the proteins (str), None for features whose location
+        cannot be parsed or extracted.
+    """
+    sequence = _as_bytes(sequence)
+    length = len(sequence)
+    tables = {}
+    jobs = []
+    for feature in features:
+        try:
+            location = parse_location(feature[location_key])
+        except (KeyError, LocationParsingException):
+            jobs.append(None)
+            continue
+        if location.remote_parts or not all(
+                1 <= _s <= _e <= length for _s, _e, _ in location.parts):
+            jobs.append(None)
+            continue
+        transl_table = feature.get('transl_table', table)
+        if transl_table not in tables:
+            tables[transl_table] = codon_table(transl_table)
+        jobs.append(_Job(
+            location,
+            tables[transl_table],
+            feature.get('codon_start', 1),
+            feature.get('transl_except')
+            ))
+    valid = [_j for _j in jobs if _j is not None]
+    if np is not None and vectorized and len(sequence) >= 3:
+        proteins = iter(_translate_vectorized(sequence, valid))
+    else:
+        proteins = iter([_j.translate(sequence) for _j in valid])
+    return [None if _j is None else next(proteins) for _j in jobs]
+
+
+class Translation(object):
+    """
+    The translation of a coding feature. expected is its /translation
+    qualifier (in upper case, None if it has none) and matches tells if
+    protein equals expected (None if either is missing).
+    """
+    __slots__ = ('feature', 'protein', 'expected')
+
+    def __init__(self, feature, protein, expected=None):
+        self.feature = feature
+        self.protein = protein
+        self.expected = expected
+
+    @property
+    def matches(self):
+        if self.protein is None or self.expected is None:
+            return None
+        return self.protein == self.expected
+
+    def __repr__(self):
+        return '{0}({1!r}, matches={2})'.format(
+                self.__class__.__name__,
+                self.feature.get('locus_tag', self.feature.get('bp_range')),
+                self.matches
+                )
+
+
+def translate_genome(genome, table=1, vectorized=True):
+    """
+    Translate all CDS of a parsed genome, see translate_features.
+
+    :return: list of Translation, one per gene with cds_included.
+    :raises: ExtractionException if the genome has no sequence (e.g. if the
+        ORIGIN section was excluded).
+    """
+    sequence = genome['content'].get('sequence')
+    if not sequence:
+        raise ExtractionException('The genome has no sequence')
+    features = [
+            _g for _g in genome['content'].get('genes', [])
+            if _g.get('cds_included')
+            ]
+    proteins = translate_features(
+            sequence, features, table=table, vectorized=vectorized
+            )
+    translations = []
+    for feature, protein in zip(features, proteins):
+        expected = feature.get('translation')
+        translations.append(Translation(
+            feature,
+            protein,
+            expected.upper() if hasattr(expected, 'upper') else None
+            ))
+    return translations
+
+
+def check_translations(genome, table=1):
+    """
+    :return: list of the Translation of the CDS of the genome whose
+        translation differs from their /translation qualifier.
+    """
+    return [
+            _t for _t in translate_genome(genome, table=table)
+            if _t.matches is False
+            ]
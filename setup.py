@@ -8,7 +8,7 @@ setup(
     version='0.1-alpha',
     description='Unofficial parser for ncbi GenBank data.',
     author='Jonas I. Liechti',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*', 'tests']),
     install_requires=['configparser', 'requests'],
     data_files=[
         ('gbparse', ['gbparse/config.cfg']),
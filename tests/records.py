@@ -0,0 +1,124 @@
+from __future__ import unicode_literals, absolute_import
+# Small GenBank records shared by the tests.
+import gzip
+import zlib
+import struct
+
+RECORD_A = '''\
+LOCUS       XX0001                   120 bp    DNA     linear   BCT 01-JAN-2018
+DEFINITION  Completely made up XX0001.
+ACCESSION   XX0001
+VERSION     XX0001.1  GI:1111111111
+DBLINK      BioProject: PRJNA111111
+            BioSample: SAMN111111
+KEYWORDS    .
+SOURCE      Completely made up
+  ORGANISM  Completely made up
+            Bacteria; Proteobacteria; Gammaproteobacteria;
+            Enterobacterales.
+REFERENCE   1  (bases 1 to 120)
+  AUTHORS   Doe,J. and Roe,R.
+  TITLE     Direct Submission
+  JOURNAL   Submitted (01-JAN-2018) Nowhere
+COMMENT     Made up record.
+FEATURES             Location/Qualifiers
+     source          1..120
+                     /organism="Completely made up"
+                     /mol_type="genomic DNA"
+     gene            1..60
+                     /gene="gen0"
+                     /locus_tag="XX0001_00000"
+     CDS             1..60
+                     /gene="gen0"
+                     /locus_tag="XX0001_00000"
+                     /product="hypothetical protein"
+                     /note="a note that spans
+                     two lines"
+                     /translation="MKKLLLAAAAAAAAAAAAQ"
+     gene            complement(70..110)
+                     /gene="gen1"
+     tRNA            complement(70..110)
+                     /gene="gen1"
+                     /product="tRNA-Ala"
+ORIGIN
+        1 atgaaaaaac tgctgctggc ggcggcggcg gcggcggcgg cggcggcggc gcagtaatcg
+       61 tacgtacgta cgtacgtacg tacgtacgta cgtacgtacg tacgtacgta ggccttaacc
+//
+'''
+
+RECORD_B = '''\
+LOCUS       XX0002                    60 bp    DNA     circular BCT 02-JAN-2018
+DEFINITION  Completely made up XX0002.
+ACCESSION   XX0002 XX0003
+VERSION     XX0002.3
+KEYWORDS    .
+SOURCE      Completely made up
+  ORGANISM  Completely made up
+            Bacteria.
+REFERENCE   1  (bases 1 to 60)
+  AUTHORS   Doe,J.
+  TITLE     Direct Submission
+  JOURNAL   Submitted (02-JAN-2018) Nowhere
+FEATURES             Location/Qualifiers
+     source          1..60
+                     /organism="Completely made up"
+                     /mol_type="genomic DNA"
+     gene            10..40
+                     /gene="gen2"
+     CDS             10..40
+                     /gene="gen2"
+                     /product="putative protein"
+ORIGIN
+        1 cagattttca tattatgcag aaaatctact tcgcctgata cgagtcggtt atcttcggat
+//
+'''
+
+RECORDS = RECORD_A + RECORD_B
+
+
+def write(path, text=RECORDS):
+    """
+    Write the records to path (as bytes, with unix line endings).
+    """
+    with open(path, 'wb') as fobj:
+        fobj.write(text.encode('utf-8'))
+    return path
+
+
+def write_gzip(path, text=RECORDS):
+    """
+    Write the records gzip compressed to path.
+    """
+    with gzip.open(path, 'wb') as fobj:
+        fobj.write(text.encode('utf-8'))
+    return path
+
+
+def write_bgzf(path, text=RECORDS, block_size=512):
+    """
+    Write the records BGZF compressed (as with bgzip) to path, in blocks of
+    block_size uncompressed bytes such that records span several blocks.
+    """
+    data = text.encode('utf-8')
+    with open(path, 'wb') as fobj:
+        for start in list(range(0, len(data), block_size)) + [None]:
+            block = b'' if start is None else \
+                data[start:start + block_size]
+            compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+            deflated = compressor.compress(block) + compressor.flush()
+            fobj.write(
+                    b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC'
+                    b'\x02\x00' + struct.pack('<H', len(deflated) + 25)
+                    )
+            fobj.write(deflated)
+            fobj.write(struct.pack(
+                '<II', zlib.crc32(block) & 0xffffffff, len(block)
+                ))
+    return path
+
+
+def upper_comment(content_lines, genome_content):
+    """
+    Content parser of COMMENT referred to as 'records:upper_comment'.
+    """
+    return ' '.join(content_lines).upper()
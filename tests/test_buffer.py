@@ -0,0 +1,77 @@
+from __future__ import unicode_literals, absolute_import
+# Scanning files as bytes (memory mapped) gives the genomes of a serial parse.
+import io
+import os
+import mmap
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+from gbparse.records import iter_buffer_record_keys, iter_record_keys
+
+from records import RECORDS, write
+
+
+class BufferTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.expected = Parser().parse(io.StringIO(RECORDS))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def parse(self, text, **kwargs):
+        return list(Parser().iter_parse_buffer(text.encode('utf-8'), **kwargs))
+
+    def test_bytes(self):
+        self.assertEqual(self.parse(RECORDS), self.expected)
+
+    def test_mmap(self):
+        path = write(os.path.join(self.folder, 'records.gb'))
+        with open(path, 'rb') as fobj:
+            buffer = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                genomes = list(Parser().iter_parse_buffer(buffer))
+            finally:
+                buffer.close()
+        self.assertEqual(genomes, self.expected)
+        # parse_path memory maps uncompressed files
+        self.assertEqual(Parser().parse_path(path), self.expected)
+
+    def test_options(self):
+        for options in ({'lazy': True}, {'exclude': ['origin']},
+                        {'include': ['locus', 'features.trna']}):
+            self.assertEqual(
+                    self.parse(RECORDS, **options),
+                    Parser().parse(io.StringIO(RECORDS), **options)
+                    )
+
+    def test_surroundings(self):
+        # text before the first record, windows line endings, no final line
+        # break
+        self.assertEqual(self.parse('header\n\n' + RECORDS), self.expected)
+        self.assertEqual(
+                self.parse(RECORDS.replace('\n', '\r\n')), self.expected
+                )
+        self.assertEqual(self.parse(RECORDS[:-1]), self.expected)
+        self.assertEqual(self.parse(''), [])
+
+    def test_record_keys(self):
+        data = ('header\n' + RECORDS).encode('utf-8')
+        keys = list(iter_buffer_record_keys(data))
+        self.assertEqual(keys, list(iter_record_keys(io.BytesIO(data))))
+        self.assertEqual(
+                [sorted(set(_k)) for _, _, _k in keys],
+                [
+                    ['1111111111', 'XX0001', 'XX0001.1'],
+                    ['XX0002', 'XX0002.3', 'XX0003'],
+                    ]
+                )
+        offset, length, _ = keys[1]
+        self.assertTrue(data[offset:offset + length].startswith(b'LOCUS'))
+        self.assertTrue(data[offset:offset + length].endswith(b'//\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
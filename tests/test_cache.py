@@ -0,0 +1,200 @@
+from __future__ import unicode_literals, absolute_import
+# Entries of the FetchCache and Parser.fetch served partly from it.
+import io
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:  # python 2
+    BaseHTTPRequestHandler = HTTPServer = None
+
+from gbparse import Parser
+from gbparse.cache import FetchCache
+
+from records import RECORD_A, RECORD_B
+
+
+OTHER_A = RECORD_A.replace('XX0001', 'XX0004').replace(
+        'GI:1111111111', 'GI:4444444444'
+        )
+
+
+class FetchCacheEntriesTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.folder)
+
+    def open(self, **kwargs):
+        self.cache = FetchCache(self.folder, **kwargs)
+        return self.cache
+
+    def set_times(self, key, **times):
+        with self.cache._db:
+            for column, value in times.items():
+                self.cache._db.execute(
+                        'UPDATE entries SET {0} = ? WHERE key = ?'.format(
+                            column
+                            ),
+                        (value, key)
+                        )
+
+    def test_hits_and_misses(self):
+        cache = self.open()
+        self.assertEqual(
+                cache.put((RECORD_A + RECORD_B).encode('utf-8')),
+                ['XX0001.1', 'XX0002.3']
+                )
+        for genome_id in ('XX0001', 'XX0001.1', '1111111111', 1111111111):
+            self.assertEqual(cache.get(genome_id), RECORD_A.encode('utf-8'))
+        # the secondary accession of RECORD_B
+        self.assertEqual(cache.get('XX0003'), RECORD_B.encode('utf-8'))
+        self.assertIsNone(cache.get('XX0009'))
+        self.assertEqual(cache.stats(), {
+            'hits': 5, 'misses': 1, 'entries': 2,
+            'bytes': len((RECORD_A + RECORD_B).encode('utf-8')),
+            })
+
+    def test_parsed(self):
+        cache = self.open(store_parsed=True)
+        cache.put(RECORD_A.encode('utf-8'))
+        genome = Parser().parse(io.StringIO(RECORD_A))[0]
+        self.assertEqual(cache.get('XX0001', parsed=True),
+                         RECORD_A.encode('utf-8'))
+        cache.put_parsed(genome)
+        self.assertEqual(cache.get('XX0001', parsed=True), genome)
+        self.assertEqual(cache.get('XX0001'), RECORD_A.encode('utf-8'))
+        # genomes whose flatfile is not cached are not stored
+        cache.put_parsed(Parser().parse(io.StringIO(RECORD_B))[0])
+        self.assertIsNone(cache.get('XX0002', parsed=True))
+
+    def test_ttl(self):
+        cache = self.open(ttl=60)
+        cache.put((RECORD_A + RECORD_B).encode('utf-8'))
+        self.set_times('XX0001.1', created=time.time() - 120)
+        self.assertIsNone(cache.get('XX0001'))
+        self.assertFalse(os.path.exists(cache._file('XX0001.1', '.gb')))
+        self.assertEqual(cache.get('XX0002'), RECORD_B.encode('utf-8'))
+        # expired entries are removed when records are added
+        self.set_times('XX0002.3', created=time.time() - 120)
+        cache.put(OTHER_A.encode('utf-8'))
+        self.assertEqual(cache.stats()['entries'], 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru(self):
+        # RECORD_B is shorter than RECORD_A, evicting it makes room for a
+        # third record
+        size_a = len(RECORD_A.encode('utf-8'))
+        cache = self.open(max_bytes=2 * size_a)
+        cache.put((RECORD_A + RECORD_B).encode('utf-8'))
+        self.set_times('XX0001.1', accessed=1.)
+        self.set_times('XX0002.3', accessed=2.)
+        # reading XX0001 makes XX0002 the least recently used entry
+        self.assertIsNotNone(cache.get('XX0001'))
+        cache.put(OTHER_A.encode('utf-8'))
+        self.assertIsNone(cache.get('XX0002'))
+        self.assertIsNotNone(cache.get('XX0001'))
+        self.assertIsNotNone(cache.get('XX0004'))
+        self.assertEqual(cache.size(), 2 * size_a)
+        # a record larger than the cache is not kept
+        cache.max_bytes = size_a - 1
+        cache.evict()
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_checksum(self):
+        cache = self.open()
+        cache.put((RECORD_A + RECORD_B).encode('utf-8'))
+        with open(cache._file('XX0001.1', '.gb'), 'wb') as f_out:
+            f_out.write(RECORD_A.replace('gen0', 'gen9').encode('utf-8'))
+        self.assertIsNone(cache.get('XX0001'))
+        # the corrupted entry is removed
+        self.assertFalse(os.path.exists(cache._file('XX0001.1', '.gb')))
+        self.assertIsNone(cache.get('XX0001.1'))
+        os.remove(cache._file('XX0002.3', '.gb'))
+        self.assertIsNone(cache.get('XX0002'))
+        self.assertEqual(cache.stats()['entries'], 0)
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+        # the records are cached again once fetched
+        cache.put(RECORD_A.encode('utf-8'))
+        self.assertEqual(cache.get('XX0001'), RECORD_A.encode('utf-8'))
+
+
+class _Handler(BaseHTTPRequestHandler if BaseHTTPRequestHandler else object):
+    """
+    Answers each request with the records of the requested ids.
+    """
+    def do_GET(self):
+        ids = self.path.split('id=', 1)[1].split(',')
+        self.server.requested.append(ids)
+        body = ''.join(
+                self.server.records[_id] for _id in ids
+                ).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return None
+
+    def log_message(self, *args):
+        return None
+
+
+@unittest.skipIf(HTTPServer is None, 'the mock server requires python 3')
+class FetchCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.records = {'XX0001': RECORD_A, 'XX0002': RECORD_B}
+        self.server.requested = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.folder = tempfile.mkdtemp()
+        self.parser = Parser()
+        self.parser.ncbi_nuccore_url = \
+            'http://127.0.0.1:{0}/nuccore?id={{0}}'.format(
+                self.server.server_address[1]
+                )
+        self.eager = dict(
+                (_g['locus'][None], _g)
+                for _g in Parser().parse(io.StringIO(RECORD_A + RECORD_B))
+                )
+
+    def tearDown(self):
+        if self.parser.fetch_cache is not None:
+            self.parser.fetch_cache.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.folder)
+
+    def check_order(self, store_parsed):
+        self.parser.fetch_cache = FetchCache(
+                self.folder, store_parsed=store_parsed
+                )
+        self.parser.fetch_cache.put(RECORD_B.encode('utf-8'))
+        # the cached genome is requested last, by its secondary accession
+        genomes = self.parser.fetch(['XX0001', 'XX0003'])
+        self.assertEqual(self.server.requested, [['XX0001']])
+        self.assertEqual(genomes, [self.eager['XX0001'], self.eager['XX0002']])
+        # both are cached now, the order still follows the ids
+        genomes = self.parser.fetch(['XX0002', 'XX0001'])
+        self.assertEqual(len(self.server.requested), 1)
+        self.assertEqual(genomes, [self.eager['XX0002'], self.eager['XX0001']])
+
+    def test_order(self):
+        self.check_order(False)
+
+    def test_order_parsed(self):
+        self.check_order(True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+from __future__ import unicode_literals, absolute_import
+# Feature tables collected by the columnar parser.
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+from gbparse.columnar import FeatureTable
+from gbparse.content_parsers import columnar_parser
+
+from records import RECORDS
+
+
+class FeatureTableTest(unittest.TestCase):
+    def setUp(self):
+        self.parser = Parser()
+        self.parser.content_parser = dict(
+                self.parser.content_parser, features=columnar_parser
+                )
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_rows(self):
+        table = self.parser.parse(io.StringIO(RECORDS))[0][
+                'content']['features']
+        self.assertEqual(table.rows(type='trna'), [3])
+        self.assertEqual(
+                table.row(3),
+                {
+                    'record': 'XX0001', 'type': 'trna',
+                    'location': 'complement(70..110)', 'start': 70,
+                    'end': 110, 'strand': -1, 'gene': 'gen1',
+                    'product': 'trna-ala',
+                    }
+                )
+
+    def test_dict_round_trip(self):
+        table = self.parser.parse(io.StringIO(RECORDS))[0][
+                'content']['features']
+        restored = FeatureTable.from_dict(table.to_dict())
+        self.assertEqual(restored.to_dict(), table.to_dict())
+        self.assertEqual(restored.row(2), table.row(2))
+
+    def test_save_to(self):
+        genomes = self.parser.parse(io.StringIO(RECORDS))
+        path = os.path.join(self.directory, 'genomes.jsonl')
+        self.parser.parse(io.StringIO(RECORDS), save_to=path)
+        with io.open(path, encoding='utf-8') as fobj:
+            saved = [json.loads(_line) for _line in fobj]
+        self.assertEqual(len(saved), len(genomes))
+        for genome, _saved in zip(genomes, saved):
+            self.assertEqual(
+                    _saved['content']['features'],
+                    genome['content']['features'].to_dict()
+                    )
+        # the other sinks use the same encoder
+        self.parser.parse(
+                io.StringIO(RECORDS),
+                save_to=os.path.join(self.directory, 'genomes.sqlite')
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
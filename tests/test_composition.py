@@ -0,0 +1,176 @@
+from __future__ import unicode_literals, absolute_import, division
+# Base composition, GC skew and k-mer counts of sequences and genomes.
+import io
+import random
+import pickle
+import unittest
+import collections
+
+from gbparse import Parser
+from gbparse import composition
+from gbparse.composition import SequenceStats, gc_skew
+from gbparse.content_parsers.composition_parsers import SequenceStatsParser
+from gbparse.sequence import PackedSequence
+
+from records import RECORD_A, RECORDS
+
+
+def _counts(sequence, k):
+    """
+    :return: the composition and the k-mer counts of a sequence counted
+        naively.
+    """
+    sequence = sequence.lower()
+    counts = collections.Counter(
+            _s if _s in 'acgtn' else 'other' for _s in sequence
+            )
+    kmers = collections.Counter(
+            sequence[_i:_i + k] for _i in range(len(sequence) - k + 1)
+            if all(_s in 'acgt' for _s in sequence[_i:_i + k])
+            )
+    return dict(
+            (_s, counts[_s]) for _s in ('a', 'c', 'g', 't', 'n', 'other')
+            ), dict(kmers)
+
+
+class SequenceStatsTest(unittest.TestCase):
+    def stats(self, sequence, k):
+        """
+        :return: the statistics computed with and without numpy, which must
+            be the same.
+        """
+        stats = SequenceStats(k).update(sequence)
+        if composition.np is not None:
+            np, composition.np = composition.np, None
+            try:
+                self.assertEqual(
+                        SequenceStats(k).update(sequence).to_dict(),
+                        stats.to_dict()
+                        )
+            finally:
+                composition.np = np
+        return stats
+
+    def test_counts(self):
+        rng = random.Random(2)
+        sequence = ''.join(rng.choice('acgtACGTnNry-') for _ in range(5000))
+        for k in (1, 3, 5):
+            stats = self.stats(sequence, k)
+            counts, kmers = _counts(sequence, k)
+            self.assertEqual(stats.composition, counts)
+            self.assertEqual(stats.kmer_counts(), kmers)
+            self.assertEqual(stats.length, 5000)
+            self.assertEqual(
+                    stats.gc,
+                    (counts['g'] + counts['c']) /
+                    sum(counts[_s] for _s in 'acgt')
+                    )
+
+    def test_small(self):
+        stats = self.stats('acgTTn', 2)
+        self.assertEqual(stats.composition, {
+            'a': 1, 'c': 1, 'g': 1, 't': 2, 'n': 1, 'other': 0
+            })
+        self.assertEqual(stats.kmer_counts(),
+                         {'ac': 1, 'cg': 1, 'gt': 1, 'tt': 1})
+        self.assertEqual(stats.gc, 2 / 5)
+        self.assertEqual(self.stats('a', 3).kmer_counts(), {})
+        self.assertIsNone(self.stats('nnn', 1).gc)
+        self.assertEqual(SequenceStats().update('acgt').kmer_counts(), {})
+
+    def test_input_types(self):
+        stats = SequenceStats(2).update('acggt').to_dict()
+        self.assertEqual(SequenceStats(2).update(b'acggt').to_dict(), stats)
+        self.assertEqual(
+                SequenceStats(2).update(PackedSequence.pack(b'acggt'))
+                .to_dict(),
+                stats
+                )
+
+    def test_merge(self):
+        merged = SequenceStats(2).update('aacg').merge(
+                SequenceStats(2).update('cgtt')
+                )
+        # k-mers spanning both sequences are not counted
+        self.assertEqual(merged.kmer_counts(), {
+            'aa': 1, 'ac': 1, 'cg': 2, 'gt': 1, 'tt': 1
+            })
+        self.assertEqual(merged.records, 2)
+        self.assertEqual(merged.length, 8)
+        with self.assertRaises(ValueError):
+            merged.merge(SequenceStats(3))
+        restored = SequenceStats.from_dict(merged.to_dict())
+        self.assertEqual(restored.to_dict(), merged.to_dict())
+        self.assertEqual(
+                pickle.loads(pickle.dumps(merged)).to_dict(), merged.to_dict()
+                )
+
+    def test_gc_skew(self):
+        self.assertEqual(
+                gc_skew('ggcc' + 'gggc' + 'aat', window=4),
+                [0., 0.5, None]
+                )
+        if composition.np is not None:
+            sequence = ''.join(random.Random(3).choice('acgtn')
+                               for _ in range(1003))
+            np, composition.np = composition.np, None
+            try:
+                expected = gc_skew(sequence, window=100)
+            finally:
+                composition.np = np
+            self.assertEqual(gc_skew(sequence, window=100), expected)
+
+
+class SequenceStatsParserTest(unittest.TestCase):
+    def parser(self, **kwargs):
+        parser = Parser()
+        parser.content_parser = dict(
+                parser.content_parser,
+                origin={None: SequenceStatsParser(**kwargs)}
+                )
+        return parser
+
+    def test_parse(self):
+        eager = Parser().parse(io.StringIO(RECORDS))
+        genomes = self.parser(k=2, window=50).parse(io.StringIO(RECORDS))
+        self.assertEqual(
+                list(self.parser(k=2, window=50).iter_parse_buffer(
+                    RECORDS.encode('utf-8')
+                    )),
+                genomes
+                )
+        total = SequenceStats(2)
+        for genome, _eager in zip(genomes, eager):
+            sequence = _eager['content']['sequence']
+            self.assertEqual(genome['content']['sequence'], sequence)
+            summary = genome['content']['composition']
+            self.assertEqual(
+                    summary['gc_skew'], gc_skew(sequence, window=50)
+                    )
+            del summary['gc_skew']
+            self.assertEqual(
+                    summary, SequenceStats(2).update(sequence).to_dict()
+                    )
+            total.add_genome(genome)
+        self.assertEqual(total.records, 2)
+        self.assertEqual(total.length, 180)
+
+    def test_sequence_types(self):
+        eager = Parser().parse(io.StringIO(RECORD_A))[0]
+        sequence = eager['content']['sequence']
+        for kind, expected in (
+                ('bytes', sequence.encode('ascii')),
+                ('2bit', PackedSequence.pack(sequence.encode('ascii')))):
+            genome = self.parser(sequence=kind).parse(
+                    io.StringIO(RECORD_A)
+                    )[0]
+            self.assertEqual(genome['content']['sequence'], expected)
+        genome = self.parser(sequence=None).parse(io.StringIO(RECORD_A))[0]
+        self.assertNotIn('sequence', genome['content'])
+        self.assertEqual(genome['content']['composition']['length'], 120)
+        with self.assertRaises(ValueError):
+            SequenceStatsParser(sequence='str2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+from __future__ import unicode_literals, absolute_import
+# Parsing compressed files gives the genomes of the uncompressed file.
+import io
+import os
+import bz2
+import shutil
+import tempfile
+import unittest
+
+try:
+    import lzma
+except ImportError:  # python 2
+    lzma = None
+
+from gbparse import Parser
+from gbparse.compression import compression_of, open_path, random_access
+
+from records import RECORDS, write, write_gzip, write_bgzf
+
+
+class CompressionTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.expected = Parser().parse(io.StringIO(RECORDS))
+        self.data = RECORDS.encode('utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def check(self, path, compression):
+        self.assertEqual(compression_of(path), compression)
+        self.assertEqual(Parser().parse_path(path), self.expected)
+        for threaded in (True, False):
+            with open_path(path, threaded=threaded) as fobj:
+                self.assertEqual(fobj.read(), self.data)
+
+    def test_uncompressed(self):
+        self.check(write(self.path('records.gb')), None)
+
+    def test_gzip(self):
+        path = write_gzip(self.path('records.gb.gz'))
+        self.check(path, 'gzip')
+        self.assertFalse(random_access(path))
+
+    def test_bgzf(self):
+        path = write_bgzf(self.path('records.gb.gz'))
+        self.check(path, 'bgzf')
+        self.assertTrue(random_access(path))
+        # seeking only decompresses the blocks that are read
+        with open_path(path, seekable=True) as fobj:
+            for offset in (1500, 10, 700, len(self.data) - 5):
+                fobj.seek(offset)
+                self.assertEqual(fobj.tell(), offset)
+                self.assertEqual(
+                        fobj.read(600), self.data[offset:offset + 600]
+                        )
+
+    def test_bz2(self):
+        path = self.path('records.gb.bz2')
+        with bz2.BZ2File(path, 'wb') as fobj:
+            fobj.write(self.data)
+        self.check(path, 'bz2')
+
+    @unittest.skipIf(lzma is None, 'xz requires python 3')
+    def test_xz(self):
+        path = self.path('records.gb.xz')
+        with lzma.open(path, 'wb') as fobj:
+            fobj.write(self.data)
+        self.check(path, 'xz')
+
+    def test_zstd(self):
+        try:
+            import zstandard
+        except ImportError:
+            self.skipTest('zstandard is not installed')
+        path = self.path('records.gb.zst')
+        with open(path, 'wb') as fobj:
+            fobj.write(zstandard.ZstdCompressor().compress(self.data))
+        self.check(path, 'zstd')
+
+    def test_empty(self):
+        path = write(self.path('empty.gb.gz'), '')
+        self.assertEqual(compression_of(path), 'gzip')
+        self.assertEqual(Parser().parse_path(write(self.path('empty.gb'), '')),
+                         [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+from __future__ import unicode_literals, absolute_import
+# Settings of the Parser loaded by gbparse.config.load_config.
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import configparser
+
+from gbparse import Parser
+from gbparse import config
+
+from records import RECORD_A
+
+
+class LoadConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, text):
+        path = os.path.join(self.folder, 'config.cfg')
+        with io.open(path, 'w', encoding='utf-8') as fobj:
+            fobj.write(text)
+        return path
+
+    def test_default(self):
+        settings = config.load_config()
+        self.assertEqual(settings['val_sep_long'], 21)
+        self.assertEqual(settings['fetch_retries'], 3)
+        self.assertIs(config.load_config(config.DEFAULT_PATH), settings)
+
+    def test_path_cache(self):
+        path = self.write('[GenBank]\nfetch_retries=7\n')
+        settings = config.load_config(path)
+        self.assertEqual(settings['fetch_retries'], 7)
+        # options not given are taken from the default configuration
+        self.assertEqual(settings['val_sep_long'], 21)
+        # the file is read once per process
+        self.write('[GenBank]\nfetch_retries=8\n')
+        self.assertIs(config.load_config(path), settings)
+        relative = os.path.relpath(path)
+        self.assertIs(config.load_config(relative), settings)
+        self.assertEqual(Parser(path).fetch_retries, 7)
+        with self.assertRaises(IOError):
+            config.load_config(os.path.join(self.folder, 'missing.cfg'))
+
+    def test_dict(self):
+        parser = Parser(config={'GenBank': {'fetch_retries': 5}})
+        self.assertEqual(parser.fetch_retries, 5)
+        self.assertEqual(parser.fetch_timeout, 60.)
+        self.assertEqual(Parser().fetch_retries, 3)
+        self.assertIsNot(
+                config.load_config({'GenBank': {'fetch_retries': 5}}),
+                config.load_config({'GenBank': {'fetch_retries': 5}})
+                )
+
+    def test_config_parser(self):
+        parsed = configparser.ConfigParser()
+        parsed.read_dict({'GenBank': {'fetch_backoff': '2.5'}})
+        parser = Parser(config=parsed)
+        self.assertEqual(parser.fetch_backoff, 2.5)
+        self.assertEqual(parser.fetch_retries, 3)
+        # the settings are used by the parse
+        parser = Parser(config={'Default': {'val_genome_end': '//'}})
+        self.assertEqual(
+                parser.parse(io.StringIO(RECORD_A)),
+                Parser().parse(io.StringIO(RECORD_A))
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
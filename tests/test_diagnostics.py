@@ -0,0 +1,179 @@
+from __future__ import unicode_literals, absolute_import
+# Deduplication, limits, summaries and strict mode of the Diagnostics.
+import io
+import logging
+import unittest
+
+from gbparse import Parser
+from gbparse.diagnostics import Diagnostics, DiagnosticException, \
+    set_context, default_diagnostics
+
+from records import RECORD_A, RECORD_B
+
+# RECORD_A with a section no content parser is defined for
+UNKNOWN_SECTION = RECORD_A.replace(
+        'KEYWORDS    .', 'KEYWORDS    .\nMADEUP      something'
+        )
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class _Counted(object):
+    """
+    Argument of a message counting how often it is formatted.
+    """
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'counted'
+
+
+class DiagnosticsTest(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('gbparse.test_diagnostics')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.WARNING)
+        self.handler = _Collect()
+        self.logger.addHandler(self.handler)
+        set_context(default_diagnostics, 'features', 'cds')
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        set_context(default_diagnostics, None, None)
+
+    def diagnostics(self, **kwargs):
+        return Diagnostics(logger=self.logger, **kwargs)
+
+    def test_duplicates(self):
+        diagnostics = self.diagnostics()
+        for _ in range(3):
+            diagnostics.warn('odd', 'odd value %s', 'x')
+        diagnostics.warn('odd', 'odd value %s', 'y')
+        self.assertEqual(
+                self.handler.messages, ['odd value x', 'odd value y']
+                )
+        self.assertEqual(diagnostics.counts, {('odd', 'features', 'cds'): 4})
+
+    def test_max_messages(self):
+        diagnostics = self.diagnostics(max_messages=2)
+        for i in range(5):
+            diagnostics.warn('odd', 'odd value %d', i)
+        diagnostics.warn('other', 'other value')
+        self.assertEqual(self.handler.messages, [
+            'odd value 0',
+            'odd value 1 (further warnings of this kind are only counted)',
+            'other value',
+            ])
+        self.assertEqual(diagnostics.since(), {
+            'odd in features.cds': 5, 'other in features.cds': 1
+            })
+        # without limit
+        diagnostics = self.diagnostics(max_messages=None)
+        for i in range(20):
+            diagnostics.warn('odd', 'odd value %d', i)
+        self.assertEqual(len(self.handler.messages), 23)
+
+    def test_lazy_formatting(self):
+        counted = _Counted()
+        diagnostics = self.diagnostics(level=logging.DEBUG)
+        diagnostics.warn('odd', 'odd value %s', counted)
+        self.assertEqual(counted.formatted, 0)
+        self.assertEqual(self.handler.messages, [])
+        self.assertEqual(diagnostics.counts, {('odd', 'features', 'cds'): 1})
+
+    def test_summary(self):
+        diagnostics = self.diagnostics(max_messages=0)
+        diagnostics.warn('odd', 'odd value')
+        mark = diagnostics.mark()
+        diagnostics.warn('odd', 'odd value')
+        diagnostics.warn('odd', 'odd value')
+        set_context(default_diagnostics, 'locus', None)
+        diagnostics.warn('short', 'short value')
+        set_context(default_diagnostics, None, None)
+        diagnostics.warn('empty', 'empty record')
+        self.assertEqual(self.handler.messages, [])
+        diagnostics.log_summary(mark)
+        self.assertEqual(self.handler.messages, [
+            'Parsing issued 4 warning(s): empty: 1, odd in features.cds: 2, '
+            'short in locus: 1'
+            ])
+        # nothing since the mark, no summary
+        diagnostics.log_summary(diagnostics.mark())
+        self.assertEqual(len(self.handler.messages), 1)
+        diagnostics = self.diagnostics(summary=False)
+        diagnostics.warn('odd', 'odd value')
+        diagnostics.log_summary()
+        self.assertEqual(len(self.handler.messages), 2)
+
+    def test_merge_and_reset(self):
+        diagnostics = self.diagnostics()
+        diagnostics.warn('odd', 'odd value')
+        diagnostics.merge({('odd', 'features', 'cds'): 2,
+                           ('short', 'locus', None): 1})
+        self.assertEqual(diagnostics.since(), {
+            'odd in features.cds': 3, 'short in locus': 1
+            })
+        diagnostics.reset()
+        self.assertEqual(diagnostics.counts, {})
+        diagnostics.warn('odd', 'odd value')
+        self.assertEqual(self.handler.messages, ['odd value', 'odd value'])
+
+    def test_strict(self):
+        diagnostics = self.diagnostics(strict=True)
+        with self.assertRaises(DiagnosticException) as raised:
+            diagnostics.warn('odd', 'odd value %s', 'x')
+        self.assertEqual(
+                str(raised.exception), 'odd value x (odd in features.cds)'
+                )
+        self.assertEqual(self.handler.messages, [])
+
+
+class ParserDiagnosticsTest(unittest.TestCase):
+    def setUp(self):
+        self.handler = _Collect()
+        self.parser = Parser()
+        self.parser.diagnostics.logger = logging.getLogger(
+                'gbparse.test_diagnostics.parser'
+                )
+        self.parser.diagnostics.logger.propagate = False
+        self.parser.diagnostics.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.parser.diagnostics.logger.removeHandler(self.handler)
+
+    def test_parse(self):
+        text = UNKNOWN_SECTION + UNKNOWN_SECTION.replace('XX0001', 'XX0004')
+        genomes = self.parser.parse(io.StringIO(text))
+        self.assertEqual(len(genomes), 2)
+        # the same message is logged once, then the summary of the parse
+        self.assertEqual(self.handler.messages, [
+            'There is no parser defined for the following section/'
+            'subsection: madeup/None',
+            'Parsing issued 2 warning(s): missing_parser in madeup: 2',
+            ])
+
+    def test_strict(self):
+        self.parser.diagnostics.strict = True
+        self.assertEqual(len(self.parser.parse(io.StringIO(RECORD_B))), 1)
+        genomes = []
+        with self.assertRaises(DiagnosticException):
+            self.parser.parse(
+                    io.StringIO(RECORD_B + UNKNOWN_SECTION + RECORD_B),
+                    fct=genomes.append
+                    )
+        # the parse stops at the first warning
+        self.assertEqual(len(genomes), 1)
+        self.assertEqual(sum(self.parser.diagnostics.counts.values()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+from __future__ import unicode_literals, absolute_import
+# Retries of Parser.fetch_many against a local mock HTTP server.
+import io
+import threading
+import unittest
+
+try:
+    import asyncio
+except ImportError:  # python 2
+    asyncio = None
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:  # python 2
+    BaseHTTPRequestHandler = HTTPServer = None
+
+from gbparse import Parser
+
+RECORD = '''\
+LOCUS       XX0000                    60 bp    DNA     linear   BCT 01-JAN-2018
+DEFINITION  Completely made up XX0000.
+ACCESSION   XX0000
+VERSION     XX0000.1  GI:1111111111
+KEYWORDS    .
+SOURCE      Completely made up
+  ORGANISM  Completely made up
+            Bacteria.
+FEATURES             Location/Qualifiers
+     source          1..60
+                     /organism="Completely made up"
+                     /mol_type="genomic DNA"
+     gene            1..60
+                     /gene="gen0"
+     CDS             1..60
+                     /gene="gen0"
+                     /product="hypothetical protein"
+                     /translation="MKKLLLAAAAAAAAAAAAQ"
+ORIGIN
+        1 cagattttca tattatgcag aaaatctact tcgcctgata cgagtcggtt atcttcggat
+//
+'''
+
+
+class _Handler(BaseHTTPRequestHandler if BaseHTTPRequestHandler else object):
+    """
+    Answers each request with the next response of the server's script:
+    'ok' (the complete record), 'unavailable' (503) or 'dropped' (the
+    connection is closed halfway through the body).
+    """
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            action = server.script.pop(0) if server.script else 'ok'
+            server.requests += 1
+        if action == 'unavailable':
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+        body = RECORD.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if action == 'dropped':
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return None
+        self.wfile.write(body)
+        return None
+
+    def log_message(self, *args):
+        return None
+
+
+@unittest.skipIf(HTTPServer is None, 'fetch_many requires python 3')
+class FetchManyTest(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.lock = threading.Lock()
+        self.server.script = []
+        self.server.requests = 0
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.parser = Parser()
+        self.parser.ncbi_nuccore_url = \
+            'http://127.0.0.1:{0}/nuccore?id={{0}}'.format(
+                self.server.server_address[1]
+                )
+        self.parser.fetch_retries = 2
+        self.parser.fetch_backoff = 0.
+        self.parser.fetch_timeout = 5
+        self.expected = Parser().parse(io.StringIO(RECORD))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def fetch(self, script):
+        self.server.script = list(script)
+        return self.parser.fetch_many(1, rate=None)
+
+    def test_complete(self):
+        self.assertEqual(self.fetch([]), self.expected)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_retry_unavailable(self):
+        self.assertEqual(self.fetch(['unavailable']), self.expected)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_retry_dropped_connection(self):
+        # the genomes of the broken response are not returned
+        self.assertEqual(self.fetch(['dropped']), self.expected)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_bounded_batches(self):
+        # the batches are only scheduled 2 * concurrency at a time
+        pending = []
+
+        def count_tasks(genome):
+            pending.append(len(asyncio.all_tasks()) - 1)
+
+        genome_ids = [str(_i) for _i in range(1, 21)]
+        genomes = self.parser.fetch_many(
+                genome_ids, batch_size=1, concurrency=2, rate=None,
+                fct=count_tasks
+                )
+        self.assertEqual(len(genomes), 20)
+        self.assertEqual(len(pending), 20)
+        self.assertLessEqual(max(pending), 4)
+        self.assertEqual(self.server.requests, 20)
+
+    def test_give_up(self):
+        with self.assertRaises(Parser.FetchException):
+            self.fetch(['dropped', 'unavailable', 'dropped'])
+        self.assertEqual(self.server.requests, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+from __future__ import unicode_literals, absolute_import
+# Random access to single genomes with Parser.get and the record index.
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+from gbparse.index import INDEX_SUFFIX, build_index
+
+from records import RECORD_A, RECORD_B, RECORDS, write, write_bgzf
+
+
+class GetTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = write(os.path.join(self.folder, 'records.gb'))
+        self.genome_a, self.genome_b = Parser().parse(io.StringIO(RECORDS))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_keys(self):
+        parser = Parser()
+        # LOCUS name, accession, secondary accession, version and GI number
+        for key in ('XX0001', 'XX0001.1', '1111111111'):
+            self.assertEqual(parser.get(self.path, key), self.genome_a)
+        for key in ('XX0002', 'XX0003', 'XX0002.3'):
+            self.assertEqual(parser.get(self.path, key), self.genome_b)
+        with self.assertRaises(KeyError):
+            parser.get(self.path, 'XX0004')
+        self.assertTrue(os.path.exists(self.path + INDEX_SUFFIX))
+
+    def test_index(self):
+        index = build_index(self.path)
+        self.assertEqual(len(index), 2)
+        data = RECORDS.encode('utf-8')
+        self.assertEqual(
+                index.lookup('XX0002'),
+                (len(RECORD_A.encode('utf-8')), len(RECORD_B.encode('utf-8')))
+                )
+        offset, length = index.lookup('XX0001')
+        self.assertEqual(data[offset:offset + length].decode('utf-8'),
+                         RECORD_A)
+
+    def test_rebuilt(self):
+        parser = Parser()
+        self.assertEqual(parser.get(self.path, 'XX0001'), self.genome_a)
+        # the records swap places, the file keeps its size, the modification
+        # time is set explicitly as its resolution may be coarse
+        mtime = os.stat(self.path).st_mtime
+        write(self.path, RECORD_B + RECORD_A.replace('XX0001', 'XX0009'))
+        os.utime(self.path, (mtime + 10, mtime + 10))
+        genome = parser.get(self.path, 'XX0009')
+        self.assertEqual(genome['accession'], 'XX0009')
+        self.assertEqual(parser.get(self.path, 'XX0002'), self.genome_b)
+        with self.assertRaises(KeyError):
+            parser.get(self.path, 'XX0001')
+        # a new parser loads the rebuilt index from the file
+        self.assertEqual(Parser().get(self.path, 'XX0002'), self.genome_b)
+
+    def test_bgzf(self):
+        path = write_bgzf(os.path.join(self.folder, 'records.gb.gz'))
+        parser = Parser()
+        self.assertEqual(parser.get(path, 'XX0003'), self.genome_b)
+        self.assertEqual(parser.get(path, 'XX0001'), self.genome_a)
+
+
+if __name__ == '__main__':
+    unittest.main()
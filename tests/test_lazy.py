@@ -0,0 +1,163 @@
+from __future__ import unicode_literals, absolute_import
+# Lazy genomes behave like the genomes of an eager parse.
+import io
+import os
+import json
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+from gbparse.diagnostics import DiagnosticException
+
+from records import RECORDS, RECORD_A, RECORD_B, write
+
+# RECORD_A with a feature no content parser is defined for
+UNKNOWN_FEATURE = RECORD_A.replace(
+        '     gene            complement(70..110)\n',
+        '     made_up         1..10\n'
+        '                     /note="no parser"\n'
+        '     gene            complement(70..110)\n'
+        )
+# RECORD_B with a second source feature, after its gene
+SECOND_SOURCE = RECORD_B.replace(
+        '     CDS             10..40\n',
+        '     source          41..60\n'
+        '                     /organism="Also made up"\n'
+        '                     /mol_type="genomic DNA"\n'
+        '     CDS             10..40\n'
+        )
+
+
+class LazyGenomeTest(unittest.TestCase):
+    def setUp(self):
+        self.eager = Parser().parse(io.StringIO(RECORDS))
+
+    def lazy(self, **kwargs):
+        return Parser().parse(io.StringIO(RECORDS), lazy=True, **kwargs)
+
+    def test_json(self):
+        for lazy, eager in zip(self.lazy(), self.eager):
+            # json turns the None keys into 'null'
+            self.assertEqual(
+                    json.loads(json.dumps(lazy)),
+                    json.loads(json.dumps(eager))
+                    )
+            # the keys are in the order of an eager parse
+            self.assertEqual(json.dumps(lazy), json.dumps(eager))
+
+    def test_json_nested(self):
+        for lazy, eager in zip(self.lazy(), self.eager):
+            self.assertEqual(
+                    json.loads(json.dumps(lazy['content'])),
+                    json.loads(json.dumps(eager['content']))
+                    )
+
+    def test_deferred(self):
+        lazy = self.lazy()[0]
+        pending = [_g.keys for _g in lazy._record.pending]
+        self.assertIn([('content', 'genes')], pending)
+        self.assertIn([('content', 'sequence')], pending)
+        self.assertEqual(lazy['locus'], self.eager[0]['locus'])
+        pending = [_g.keys for _g in lazy._record.pending]
+        self.assertNotIn([('locus',)], pending)
+        self.assertIn([('content', 'genes')], pending)
+
+    def test_access(self):
+        lazy = self.lazy()[0]
+        eager = self.eager[0]
+        self.assertEqual(lazy['content']['genes'], eager['content']['genes'])
+        self.assertIn('sequence', lazy['content'])
+        self.assertNotIn('missing', lazy)
+        self.assertEqual(list(lazy), list(eager))
+        self.assertEqual(list(lazy['content']), list(eager['content']))
+        self.assertEqual(lazy, eager)
+        self.assertEqual(eager, lazy)
+        # two lazy genomes
+        self.assertEqual(lazy, self.lazy()[0])
+        self.assertEqual(self.lazy()[0], lazy)
+        self.assertNotEqual(self.lazy()[1], lazy)
+
+    def test_projection(self):
+        eager = Parser().parse(io.StringIO(RECORDS), exclude=['origin'])
+        for lazy, _eager in zip(self.lazy(exclude=['origin']), eager):
+            self.assertNotIn('sequence', lazy['content'])
+            self.assertEqual(json.dumps(lazy), json.dumps(_eager))
+
+    def test_pickle(self):
+        for lazy, eager in zip(self.lazy(), self.eager):
+            self.assertEqual(pickle.loads(pickle.dumps(lazy)), eager)
+
+
+class LazyBufferTest(unittest.TestCase):
+    """
+    Parser.iter_parse_buffer keeps the FEATURES of lazy genomes as a single
+    block, only split into features once accessed.
+    """
+    def setUp(self):
+        self.parser = Parser()
+        self.parser.diagnostics.strict = True
+
+    def lazy(self, text):
+        return list(self.parser.iter_parse_buffer(
+            text.encode('utf-8'), lazy=True
+            ))
+
+    def test_metadata_only(self):
+        lazy = self.lazy(UNKNOWN_FEATURE)[0]
+        self.assertEqual(lazy['locus'][None], 'XX0001')
+        self.assertEqual(lazy['definition'], 'Completely made up XX0001.')
+        self.assertEqual(lazy['content']['organism'], 'completely made up')
+        # the made up feature is only reported once the features are parsed
+        self.assertEqual(self.parser.diagnostics.counts, {})
+        with self.assertRaises(DiagnosticException):
+            lazy['content']['genes']
+
+    def test_eager_parse(self):
+        parser = Parser()
+        parser.diagnostics.max_messages = 0
+        for text in (RECORDS, UNKNOWN_FEATURE, SECOND_SOURCE):
+            eager = parser.parse(io.StringIO(text))
+            warnings = dict(parser.diagnostics.counts)
+            parser.diagnostics.reset()
+            lazy = list(parser.iter_parse_buffer(
+                text.encode('utf-8'), lazy=True
+                ))
+            self.assertEqual(json.dumps(lazy), json.dumps(eager))
+            self.assertEqual(parser.diagnostics.counts, warnings)
+            parser.diagnostics.reset()
+
+    def test_second_source(self):
+        lazy = self.lazy(SECOND_SOURCE)[0]
+        # read when the genome is built, as the first source feature
+        self.assertEqual(lazy['content']['organism'], 'also made up')
+        self.assertEqual(
+                lazy, Parser().parse(io.StringIO(SECOND_SOURCE))[0]
+                )
+
+    def test_parse_path(self):
+        folder = tempfile.mkdtemp()
+        try:
+            path = write(
+                    os.path.join(folder, 'records.gb'),
+                    UNKNOWN_FEATURE + RECORD_B
+                    )
+            genomes = self.parser.parse_path(path, lazy=True)
+            self.assertEqual(
+                    [_g['locus'][None] for _g in genomes],
+                    ['XX0001', 'XX0002']
+                    )
+            self.assertEqual(self.parser.diagnostics.counts, {})
+            self.assertEqual(
+                    genomes[1]['content']['genes'],
+                    Parser().parse(io.StringIO(RECORD_B))[0]['content'][
+                        'genes'
+                        ]
+                    )
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
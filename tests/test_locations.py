@@ -0,0 +1,136 @@
+from __future__ import unicode_literals, absolute_import
+# Location strings and range queries over the features of a genome.
+import io
+import random
+import unittest
+
+from gbparse import Parser
+from gbparse.locations import FeatureIndex, Location, \
+    LocationParsingException, parse_location
+
+from records import RECORD_A
+
+
+class ParseLocationTest(unittest.TestCase):
+    def test_simple(self):
+        self.assertEqual(parse_location('1..60'), Location([(1, 60, 1)]))
+        location = parse_location('complement(70..110)')
+        self.assertEqual(location.parts, [(70, 110, -1)])
+        self.assertEqual(
+                (location.start, location.end, location.strand, len(location)),
+                (70, 110, -1, 41)
+                )
+
+    def test_partial(self):
+        location = parse_location('<1..>60')
+        self.assertTrue(location.partial_start)
+        self.assertTrue(location.partial_end)
+        location = parse_location('complement(<5..60)')
+        self.assertEqual(location.parts, [(5, 60, -1)])
+        self.assertTrue(location.partial_start)
+        self.assertFalse(location.partial_end)
+
+    def test_join(self):
+        location = parse_location('complement(join(<1..120,200..>400))')
+        # the parts in the order they are transcribed
+        self.assertEqual(location.parts, [(200, 400, -1), (1, 120, -1)])
+        self.assertEqual((location.start, location.end), (1, 400))
+        self.assertTrue(location.partial_start and location.partial_end)
+        location = parse_location('join(1..10, complement(20..30))')
+        self.assertEqual(location.parts, [(1, 10, 1), (20, 30, -1)])
+        self.assertEqual(location.strand, 0)
+        self.assertEqual(
+                parse_location('order(1..10,20..30)').parts,
+                [(1, 10, 1), (20, 30, 1)]
+                )
+
+    def test_sites_and_remote_parts(self):
+        self.assertEqual(parse_location('10^11').parts, [(10, 11, 1)])
+        self.assertEqual(parse_location('5').parts, [(5, 5, 1)])
+        self.assertEqual(parse_location('10.20').parts, [(10, 20, 1)])
+        location = parse_location('join(J00194.1:100..202,1..10)')
+        self.assertEqual(location.parts, [(1, 10, 1)])
+        self.assertEqual(location.remote_parts, 1)
+
+    def test_invalid(self):
+        for text in ('', 'join(1..10', 'complement(1..10', 'x..10',
+                     'J00194.1:100..202', 'join(1..10))'):
+            with self.assertRaises(LocationParsingException):
+                parse_location(text)
+
+
+class FeatureIndexTest(unittest.TestCase):
+    def index(self, *locations):
+        return FeatureIndex([{'bp_range': _l} for _l in locations])
+
+    def ranges(self, features):
+        return [_f['bp_range'] for _f in features]
+
+    def test_genome(self):
+        genome = Parser().parse(io.StringIO(RECORD_A))[0]
+        index = FeatureIndex.from_genome(genome)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(
+                self.ranges(index.overlaps(50, 75)),
+                ['1..60', 'complement(70..110)']
+                )
+        self.assertEqual(self.ranges(index.nearest(64)), ['1..60'])
+        self.assertEqual(self.ranges(index.nearest(200)),
+                         ['complement(70..110)'])
+
+    def test_nearest_ties(self):
+        index = self.index('1..10', '20..30', '5..10')
+        # as far downstream as upstream, in the order of the features
+        self.assertEqual(self.ranges(index.nearest(15)),
+                         ['1..10', '20..30', '5..10'])
+        # several features ending at the same position
+        self.assertEqual(self.ranges(index.nearest(13)), ['1..10', '5..10'])
+        self.assertEqual(self.ranges(index.nearest(17)), ['20..30'])
+        # several features starting at the same position
+        index = self.index('1..10', '40..50', '40..45')
+        self.assertEqual(self.ranges(index.nearest(38)),
+                         ['40..50', '40..45'])
+        # covering features win over adjacent ones
+        self.assertEqual(self.ranges(index.nearest(40)),
+                         ['40..50', '40..45'])
+        # beyond all features
+        self.assertEqual(self.ranges(index.nearest(60)), ['40..50'])
+        self.assertEqual(self.ranges(self.index('5..10').nearest(1)),
+                         ['5..10'])
+        self.assertEqual(self.index().nearest(1), [])
+
+    def test_nearest_parts(self):
+        # the parts of a feature are indexed separately
+        index = self.index('join(1..10,50..60)', '30..35')
+        self.assertEqual(self.ranges(index.nearest(45)),
+                         ['join(1..10,50..60)'])
+        self.assertEqual(self.ranges(index.nearest(22)), ['30..35'])
+        self.assertEqual(index.overlaps(20, 25), [])
+
+    def test_overlaps(self):
+        rng = random.Random(0)
+        ranges = []
+        for _ in range(200):
+            start = rng.randint(1, 1000)
+            ranges.append((start, start + rng.randint(0, 100)))
+        index = self.index(*['{0}..{1}'.format(*_r) for _r in ranges])
+        for _ in range(100):
+            start = rng.randint(1, 1100)
+            end = start + rng.randint(0, 50)
+            self.assertEqual(
+                    self.ranges(index.overlaps(start, end)),
+                    [
+                        '{0}..{1}'.format(*_r) for _r in ranges
+                        if _r[0] <= end and _r[1] >= start
+                        ]
+                    )
+
+    def test_invalid(self):
+        index = self.index('1..10', 'nowhere')
+        self.assertEqual(len(index), 1)
+        with self.assertRaises(LocationParsingException):
+            FeatureIndex([{'bp_range': 'nowhere'}], skip_invalid=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
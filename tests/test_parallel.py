@@ -0,0 +1,68 @@
+from __future__ import unicode_literals, absolute_import
+# Parser.parse_parallel gives the genomes of a serial parse, in file order.
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+
+from records import RECORD_A, RECORD_B, write, write_gzip, write_bgzf
+
+# several records per batch and several batches per worker
+TEXT = (RECORD_A + RECORD_B) * 4 + RECORD_A
+
+
+class ParseParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.expected = Parser().parse(io.StringIO(TEXT))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def parse(self, path, **kwargs):
+        return Parser().parse_parallel(
+                path, workers=2, batch_bytes=4096, **kwargs
+                )
+
+    def test_uncompressed(self):
+        path = write(os.path.join(self.folder, 'records.gb'), TEXT)
+        self.assertEqual(self.parse(path), self.expected)
+        # a single batch
+        self.assertEqual(
+                Parser().parse_parallel(path, workers=2), self.expected
+                )
+
+    def test_gzip(self):
+        path = write_gzip(os.path.join(self.folder, 'records.gb.gz'), TEXT)
+        self.assertEqual(self.parse(path), self.expected)
+
+    def test_bgzf(self):
+        path = write_bgzf(os.path.join(self.folder, 'records.gb.gz'), TEXT)
+        self.assertEqual(self.parse(path), self.expected)
+
+    def test_options(self):
+        path = write(os.path.join(self.folder, 'records.gb'), TEXT)
+        expected = Parser().parse(
+                io.StringIO(TEXT), include=['locus', 'features.cds']
+                )
+        self.assertEqual(
+                self.parse(path, include=['locus', 'features.cds']), expected
+                )
+
+    def test_fct(self):
+        path = write(os.path.join(self.folder, 'records.gb'), TEXT)
+        names = []
+        self.assertIsNone(self.parse(
+            path, save_to=os.path.join(self.folder, 'genomes.jsonl'),
+            fct=lambda genome: names.append(genome['locus'][None])
+            ))
+        self.assertEqual(
+                names, [_g['locus'][None] for _g in self.expected]
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
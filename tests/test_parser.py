@@ -0,0 +1,132 @@
+from __future__ import unicode_literals, absolute_import
+# The line scanner of Parser.iter_parse hands each (sub)section its lines.
+import io
+import unittest
+
+from gbparse import Parser
+
+from records import RECORD_A, RECORD_B, RECORDS
+
+
+class _Lines(object):
+    """
+    File object yielding the lines of a text and counting the lines read.
+    """
+    def __init__(self, text):
+        self.lines = text.splitlines(True)
+        self.read = 0
+
+    def __iter__(self):
+        for line in self.lines:
+            self.read += 1
+            yield line
+
+
+class ScannerTest(unittest.TestCase):
+    def parse(self, text=RECORDS, **kwargs):
+        return Parser().parse(io.StringIO(text), **kwargs)
+
+    def test_sections(self):
+        genome = self.parse(RECORD_A)[0]
+        self.assertEqual(genome['locus'][None], 'XX0001')
+        self.assertEqual(genome['locus']['size [bp]'], '120')
+        self.assertEqual(genome['definition'], 'Completely made up XX0001.')
+        self.assertEqual(genome['version'],
+                         {None: 'XX0001.1', 'GI': '1111111111'})
+        # continuation lines of a section
+        self.assertEqual(genome['dblink'], {
+            'BioProject': 'PRJNA111111', 'BioSample': 'SAMN111111'
+            })
+        # subsections
+        self.assertEqual(genome['reference'], [{
+            'info': '1  (bases 1 to 120)',
+            'authors': ['Doe J.', 'Roe R.'],
+            'title': 'Direct Submission',
+            'journal': 'Submitted (01-JAN-2018) Nowhere',
+            }])
+        self.assertEqual(len(genome['content']['sequence']), 120)
+        self.assertTrue(
+                genome['content']['sequence'].startswith('atgaaaaaactg')
+                )
+
+    def test_features(self):
+        genes = self.parse(RECORD_A)[0]['content']['genes']
+        self.assertEqual(
+                [_g['bp_range'] for _g in genes],
+                ['1..60', 'complement(70..110)']
+                )
+        # the CDS and tRNA are merged with their genes
+        self.assertTrue(genes[0]['cds_included'])
+        self.assertEqual(genes[0]['note'], 'a note that spans two lines')
+        self.assertEqual(genes[0]['translation'], 'mkklllaaaaaaaaaaaaq')
+        self.assertTrue(genes[1]['rna_included'])
+        self.assertEqual(genes[1]['product'], 'trna-ala')
+
+    def test_records(self):
+        genomes = self.parse()
+        self.assertEqual(
+                [_g['locus'][None] for _g in genomes], ['XX0001', 'XX0002']
+                )
+        # nothing of the first record leaks into the second one
+        self.assertEqual(genomes[1], self.parse(RECORD_B)[0])
+        self.assertNotIn('dblink', genomes[1])
+
+    def test_reuse(self):
+        # the state of the scanner is reset for each file
+        parser = Parser()
+        iterator = parser.iter_parse(io.StringIO(RECORDS))
+        next(iterator)
+        iterator.close()
+        self.assertEqual(parser.parse(io.StringIO(RECORDS)), self.parse())
+
+
+class IterParseTest(unittest.TestCase):
+    text = (RECORD_A + RECORD_B) * 3
+
+    def test_one_record_at_a_time(self):
+        fobj = _Lines(self.text)
+        expected = Parser().parse(io.StringIO(self.text))
+        ends = [0]
+        for record in (RECORD_A, RECORD_B) * 3:
+            ends.append(ends[-1] + len(record.splitlines()))
+        genomes = []
+        for genome in Parser().iter_parse(fobj):
+            # each genome is yielded once its last line is read
+            self.assertEqual(fobj.read, ends[len(genomes) + 1])
+            genomes.append(genome)
+        self.assertEqual(genomes, expected)
+
+    def test_lazy(self):
+        fobj = _Lines(self.text)
+        iterator = Parser().iter_parse(fobj, lazy=True)
+        first = next(iterator)
+        self.assertEqual(fobj.read, len(RECORD_A.splitlines()))
+        self.assertEqual(first, Parser().parse(io.StringIO(RECORD_A))[0])
+        self.assertEqual(
+                [first] + list(iterator),
+                Parser().parse(io.StringIO(self.text))
+                )
+
+    def test_close(self):
+        fobj = _Lines(self.text)
+        iterator = Parser().iter_parse(fobj)
+        self.assertEqual(next(iterator)['locus'][None], 'XX0001')
+        self.assertEqual(next(iterator)['locus'][None], 'XX0002')
+        read = fobj.read
+        iterator.close()
+        # closing the generator stops reading the file object
+        with self.assertRaises(StopIteration):
+            next(iterator)
+        self.assertEqual(fobj.read, read)
+        self.assertEqual(read, len((RECORD_A + RECORD_B).splitlines()))
+
+    def test_incomplete(self):
+        # a record without its end is not yielded
+        genomes = list(Parser().iter_parse(io.StringIO(RECORDS[:-3])))
+        self.assertEqual(
+                genomes, Parser().parse(io.StringIO(RECORD_A))
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+from __future__ import unicode_literals, absolute_import
+# Parsing only some sections with the include and exclude options.
+import io
+import copy
+import unittest
+
+from gbparse import Parser
+
+from records import RECORDS
+
+
+class ProjectionTest(unittest.TestCase):
+    def setUp(self):
+        self.eager = Parser().parse(io.StringIO(RECORDS))
+
+    def parse(self, **kwargs):
+        """
+        :return: the genomes parsed from text and (checked to be the same)
+            from bytes.
+        """
+        genomes = Parser().parse(io.StringIO(RECORDS), **kwargs)
+        self.assertEqual(
+                list(Parser().iter_parse_buffer(
+                    RECORDS.encode('utf-8'), **kwargs
+                    )),
+                genomes
+                )
+        return genomes
+
+    def test_include_sections(self):
+        genomes = self.parse(include=['locus', 'DEFINITION', 'version'])
+        for genome, eager in zip(genomes, self.eager):
+            self.assertEqual(genome, dict(
+                (_k, eager[_k]) for _k in ('locus', 'definition', 'version')
+                ))
+
+    def test_exclude(self):
+        genomes = self.parse(exclude=['origin', 'reference'])
+        for genome, eager in zip(genomes, self.eager):
+            expected = copy.deepcopy(eager)
+            del expected['reference']
+            del expected['content']['sequence']
+            self.assertEqual(genome, expected)
+
+    def test_exclude_subsection(self):
+        genomes = self.parse(exclude=['reference.authors'])
+        for genome, eager in zip(genomes, self.eager):
+            expected = copy.deepcopy(eager)
+            for reference in expected['reference']:
+                del reference['authors']
+            self.assertEqual(genome, expected)
+
+    def test_include_features(self):
+        # without the gene features the CDS are features of their own
+        genomes = self.parse(include=['locus', 'features.cds'])
+        for genome, eager in zip(genomes, self.eager):
+            self.assertEqual(genome['locus'], eager['locus'])
+            self.assertEqual(
+                    genome['content']['genes'],
+                    [
+                        _g for _g in eager['content']['genes']
+                        if _g['cds_included']
+                        ]
+                    )
+            self.assertNotIn('sequence', genome['content'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+from __future__ import unicode_literals, absolute_import
+# Tokenizing the qualifiers of FEATURES subsections from their content lines
+# (tokenize) and from their raw bytes (tokenize_bytes).
+import unittest
+
+from gbparse.content_parsers import qualifiers
+from gbparse.content_parsers.qualifiers import tokenize, tokenize_bytes
+
+
+def _subsection(location, lines, key='CDS'):
+    """
+    :return: the content lines and the raw bytes of a subsection.
+    """
+    raw = '     {0:<16}{1}\n'.format(key, location) + ''.join(
+            ' ' * 21 + _line + '\n' for _line in lines
+            )
+    return [location] + lines, raw.encode('utf-8')
+
+
+class TokenizeTest(unittest.TestCase):
+    def assertTokens(self, lines, expected, location='1..60', lower=False):
+        content_lines, data = _subsection(location, lines)
+        self.assertEqual(tokenize(content_lines, lower), (location, expected))
+        self.assertEqual(tokenize_bytes(data, lower), (location, expected))
+
+    def test_quoted(self):
+        self.assertTokens(
+                ['/gene="abcD"', '/product="hypothetical protein"'],
+                {'gene': 'abcD', 'product': 'hypothetical protein'}
+                )
+
+    def test_lower(self):
+        self.assertTokens(
+                ['/Gene="abcD"'], {'gene': 'abcd'}, location='1..60',
+                lower=True
+                )
+
+    def test_slash_and_equal_sign(self):
+        self.assertTokens(
+                [
+                    '/note="see http://example.org/?a=b"',
+                    '/gene="a/b"',
+                    ],
+                {'note': 'see http://example.org/?a=b', 'gene': 'a/b'}
+                )
+
+    def test_line_starting_with_slash(self):
+        self.assertTokens(
+                ['/note="the first part', '/second=part"', '/gene="x"'],
+                {'note': 'the first part /second=part', 'gene': 'x'}
+                )
+
+    def test_escaped_quotes(self):
+        self.assertTokens(
+                ['/note="a ""quoted"" word"', '/gene="x"'],
+                {'note': 'a "quoted" word', 'gene': 'x'}
+                )
+        self.assertTokens(
+                ['/note="a ""quoted', '/value"" on two lines"'],
+                {'note': 'a "quoted /value" on two lines'}
+                )
+
+    def test_multi_line(self):
+        self.assertTokens(
+                [
+                    '/note="a note that spans',
+                    'three', 'lines"',
+                    '/translation="MKKL',
+                    'LLAA',
+                    'Q"',
+                    ],
+                {
+                    'note': 'a note that spans three lines',
+                    'translation': 'MKKLLLAAQ',
+                    }
+                )
+
+    def test_opening_quote_at_line_end(self):
+        self.assertTokens(
+                ['/note="', 'on the next line"', '/gene="x"'],
+                {'note': ' on the next line', 'gene': 'x'}
+                )
+
+    def test_repeated(self):
+        self.assertTokens(
+                [
+                    '/db_xref="GI:1"', '/gene="x"', '/db_xref="GeneID:2"',
+                    '/db_xref="UniProt:3"',
+                    ],
+                {
+                    'db_xref': ['GI:1', 'GeneID:2', 'UniProt:3'],
+                    'gene': 'x',
+                    }
+                )
+        self.assertTokens(
+                ['/db_xref="GI:1"', '/db_xref="GeneID:2"', '/pseudo',
+                 '/pseudo'],
+                {'db_xref': ['GI:1', 'GeneID:2'], 'pseudo': ['', '']}
+                )
+
+    def test_flags_and_unquoted(self):
+        self.assertTokens(
+                [
+                    '/gene="x"', '/pseudo', '/codon_start=1',
+                    '/transl_table=11', '/product="a/b"',
+                    ],
+                {
+                    'gene': 'x', 'pseudo': '', 'codon_start': '1',
+                    'transl_table': '11', 'product': 'a/b',
+                    }
+                )
+
+    def test_multi_line_location(self):
+        content_lines = ['join(1..10,', '20..30)', '/gene="x"']
+        self.assertEqual(
+                tokenize(content_lines), ('join(1..10,20..30)', {'gene': 'x'})
+                )
+        data = (
+                '     CDS             join(1..10,\n' +
+                ' ' * 21 + '20..30)\n' + ' ' * 21 + '/gene="x"\n'
+                ).encode('utf-8')
+        self.assertEqual(
+                tokenize_bytes(data), ('join(1..10,20..30)', {'gene': 'x'})
+                )
+
+    def test_unusual_whitespace(self):
+        _, data = _subsection('1..60', ['/note="a b"', '/gene="x"'])
+        data = data.replace(b'\n', b' \r\n')
+        self.assertEqual(
+                tokenize_bytes(data), ('1..60', {'note': 'a b', 'gene': 'x'})
+                )
+
+    def test_layout_cache_bounded(self):
+        qualifiers._layout.cache_clear()
+        for i in range(qualifiers._MAX_LAYOUTS + 10):
+            tokenize(['1..60', '/key{0}="x"'.format(i)])
+        info = qualifiers._layout.cache_info()
+        self.assertEqual(info.maxsize, qualifiers._MAX_LAYOUTS)
+        self.assertEqual(info.currsize, qualifiers._MAX_LAYOUTS)
+        # the layout used most recently is kept, the oldest is evicted
+        tokenize(['1..60', '/key{0}="y"'.format(qualifiers._MAX_LAYOUTS)])
+        self.assertEqual(qualifiers._layout.cache_info().hits, info.hits + 1)
+        self.assertEqual(
+                tokenize(['1..60', '/key0="x"']), ('1..60', {'key0': 'x'})
+                )
+        self.assertEqual(
+                qualifiers._layout.cache_info().misses, info.misses + 1
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+from __future__ import unicode_literals, absolute_import
+# Content parsers given as references and registered as entry points.
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+from gbparse.content_parsers import registry, default_parser
+from gbparse.content_parsers.registry import ContentParsers, \
+    PluginException, resolve
+
+from records import RECORD_A, RECORD_B, upper_comment, write
+
+ENTRY_POINTS = '''\
+[gbparse.content_parsers]
+comment = records:upper_comment [extra]
+features.mobile_element = records:upper_comment
+'''
+
+
+class PluginTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        dist_info = os.path.join(self.folder, 'gbparse_test-1.0.dist-info')
+        os.mkdir(dist_info)
+        with open(os.path.join(dist_info, 'METADATA'), 'w') as fobj:
+            fobj.write('Metadata-Version: 2.1\nName: gbparse-test\n'
+                       'Version: 1.0\n')
+        with open(os.path.join(dist_info, 'entry_points.txt'), 'w') as fobj:
+            fobj.write(ENTRY_POINTS)
+        sys.path.insert(0, self.folder)
+        registry._plugins = None
+
+    def tearDown(self):
+        sys.path.remove(self.folder)
+        registry._plugins = None
+        shutil.rmtree(self.folder)
+
+    def test_entry_points(self):
+        self.assertEqual(registry.plugin_parsers(), {
+            'comment': {None: 'records:upper_comment'},
+            'features': {'mobile_element': 'records:upper_comment'},
+            })
+        genome = Parser().parse(io.StringIO(RECORD_A))[0]
+        self.assertEqual(genome['comment'], {None: 'MADE UP RECORD.'})
+        # parsers set on a Parser take precedence
+        parser = Parser()
+        parser.content_parser['comment'][None] = lambda lines, genome: 'set'
+        genome = parser.parse(io.StringIO(RECORD_A))[0]
+        self.assertEqual(genome['comment'], {None: 'set'})
+
+
+class ContentParsersTest(unittest.TestCase):
+    def test_isolation(self):
+        first, second = Parser(), Parser()
+        first.content_parser['comment'][None] = upper_comment
+        first.content_parser.register('features', 'mobile_element', 'x:y')
+        self.assertIsNot(second.content_parser['comment'][None], upper_comment)
+        self.assertNotIn('mobile_element', second.content_parser['features'])
+        self.assertNotIn('mobile_element', default_parser['features'])
+        self.assertIsNot(first.content_parser, second.content_parser)
+
+    def test_set_and_update(self):
+        comment = {None: upper_comment}
+        features = {'mobile_element': upper_comment}
+        parsers = ContentParsers()
+        parsers['comment'] = comment
+        parsers.update({'features': features}, origin={None: None})
+        parsers.setdefault('madeup', {})[None] = upper_comment
+        # the given dicts are copied
+        for given, section in ((comment, 'comment'),
+                               (features, 'features')):
+            self.assertEqual(parsers[section], given)
+            self.assertIsNot(parsers[section], given)
+        parsers['comment']['madeup'] = upper_comment
+        self.assertNotIn('madeup', comment)
+        comment[None] = None
+        self.assertIs(parsers['comment'][None], upper_comment)
+        # setting the parsers of a Parser copies them as well
+        parser = Parser()
+        parser.content_parser = parsers
+        parser.content_parser['features']['gene'] = upper_comment
+        self.assertNotIn('gene', parsers['features'])
+        copied = parsers.copy()
+        copied['madeup'][None] = None
+        self.assertIs(parsers['madeup'][None], upper_comment)
+
+    def test_references(self):
+        parser = Parser()
+        parser.content_parser['comment'][None] = 'records:upper_comment'
+        genome = parser.parse(io.StringIO(RECORD_A))[0]
+        self.assertEqual(genome['comment'], {None: 'MADE UP RECORD.'})
+
+    def test_references_parallel(self):
+        # the workers import the referenced parser themselves
+        text = (RECORD_A + RECORD_B) * 3
+        folder = tempfile.mkdtemp()
+        try:
+            parser = Parser()
+            parser.content_parser['comment'][None] = 'records:upper_comment'
+            genomes = parser.parse_parallel(
+                    write(os.path.join(folder, 'records.gb'), text),
+                    workers=2, batch_bytes=2048
+                    )
+        finally:
+            shutil.rmtree(folder)
+        self.assertEqual(genomes, parser.parse(io.StringIO(text)))
+        self.assertEqual(
+                [_g.get('comment') for _g in genomes],
+                [{None: 'MADE UP RECORD.'}, None] * 3
+                )
+
+
+class ResolveTest(unittest.TestCase):
+    def test_resolve(self):
+        self.assertIs(resolve('records:upper_comment'), upper_comment)
+        self.assertIs(resolve('os.path:join'), os.path.join)
+        self.assertIs(resolve(upper_comment), upper_comment)
+        for reference in ('records', 'records:missing', 'missing:parser',
+                          ':upper_comment'):
+            with self.assertRaises(PluginException):
+                resolve(reference)
+
+
+if __name__ == '__main__':
+    unittest.main()
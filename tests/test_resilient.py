@@ -0,0 +1,139 @@
+from __future__ import unicode_literals, absolute_import
+# Parser.parse_resilient skips malformed records and resumes interrupted
+# parses.
+import io
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+
+from records import RECORD_A, RECORD_B, write, write_gzip
+
+# a DBLINK entry without value makes the content parser raise
+BROKEN = RECORD_B.replace('XX0002', 'XX0005').replace(
+        'KEYWORDS    .', 'DBLINK      nothing\nKEYWORDS    .'
+        )
+OTHER_A = RECORD_A.replace('XX0001', 'XX0006')
+OTHER_B = RECORD_B.replace('XX0002', 'XX0007')
+TEXT = RECORD_A + BROKEN + RECORD_B + OTHER_A + OTHER_B
+
+
+class _Interrupt(Exception):
+    pass
+
+
+class ResilientTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.rejects = self.path('rejects.jsonl')
+        self.checkpoint = self.path('checkpoint.json')
+        self.output = self.path('genomes.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def read_lines(self, path):
+        with io.open(path, 'r', encoding='utf-8') as f_in:
+            return [json.loads(_l) for _l in f_in]
+
+    def names(self, genomes):
+        # json turns the None keys into 'null'
+        return [_g['locus'].get(None, _g['locus'].get('null'))
+                for _g in genomes]
+
+    def test_rejects(self):
+        for path in (write(self.path('records.gb'), TEXT),
+                     write_gzip(self.path('records.gb.gz'), TEXT)):
+            genomes = Parser().parse_resilient(path, rejects=self.rejects)
+            self.assertEqual(
+                    self.names(genomes),
+                    ['XX0001', 'XX0002', 'XX0006', 'XX0007']
+                    )
+            self.assertEqual(
+                    genomes[1], Parser().parse(io.StringIO(RECORD_B))[0]
+                    )
+            rejected, = self.read_lines(self.rejects)
+            self.assertEqual(rejected['locus'], 'XX0005')
+            self.assertEqual(rejected['section'], 'dblink')
+            self.assertEqual(rejected['error'], 'ValueError')
+            offset = len(RECORD_A.encode('utf-8'))
+            self.assertEqual(rejected['offset'], offset)
+            self.assertEqual(
+                    TEXT.encode('utf-8')[
+                        offset:offset + rejected['length']
+                        ].decode('utf-8'),
+                    BROKEN
+                    )
+
+    def test_incomplete(self):
+        # the last record is not terminated
+        path = write(self.path('records.gb'), RECORD_A + RECORD_B[:-3])
+        genomes = Parser().parse_resilient(path, rejects=self.rejects)
+        self.assertEqual(self.names(genomes), ['XX0001'])
+        rejected, = self.read_lines(self.rejects)
+        self.assertEqual(rejected['error'], 'IncompleteRecordException')
+        self.assertIsNone(rejected['section'])
+
+    def test_resume(self):
+        path = write(self.path('records.gb'), TEXT)
+        handled = []
+
+        def interrupt(genome):
+            # the parse stops while handling the fourth record
+            if genome['locus'][None] == 'XX0006':
+                raise _Interrupt()
+            handled.append(genome['locus'][None])
+
+        with self.assertRaises(_Interrupt):
+            Parser().parse_resilient(
+                    path, rejects=self.rejects, checkpoint=self.checkpoint,
+                    save_to=self.output, fct=interrupt, checkpoint_every=2
+                    )
+        self.assertEqual(handled, ['XX0001', 'XX0002'])
+        # the second genome was written after the last checkpoint
+        self.assertEqual(
+                self.names(self.read_lines(self.output)), ['XX0001', 'XX0002']
+                )
+        Parser().parse_resilient(
+                path, rejects=self.rejects, checkpoint=self.checkpoint,
+                save_to=self.output, resume=True, checkpoint_every=2
+                )
+        # the output is truncated to the checkpoint before it is appended to
+        self.assertEqual(
+                self.names(self.read_lines(self.output)),
+                ['XX0001', 'XX0002', 'XX0006', 'XX0007']
+                )
+        self.assertEqual(
+                [_r['locus'] for _r in self.read_lines(self.rejects)],
+                ['XX0005']
+                )
+        with io.open(self.checkpoint, 'r', encoding='utf-8') as f_in:
+            state = json.load(f_in)
+        self.assertTrue(state['complete'])
+        self.assertEqual((state['records'], state['rejected']), (4, 1))
+        # resuming a complete parse does nothing
+        self.assertEqual(
+                Parser().parse_resilient(
+                    path, checkpoint=self.checkpoint, resume=True
+                    ),
+                []
+                )
+
+    def test_changed_file(self):
+        path = write(self.path('records.gb'), TEXT)
+        Parser().parse_resilient(path, checkpoint=self.checkpoint)
+        write(path, TEXT + RECORD_A)
+        with self.assertRaises(ValueError):
+            Parser().parse_resilient(
+                    path, checkpoint=self.checkpoint, resume=True
+                    )
+
+
+if __name__ == '__main__':
+    unittest.main()
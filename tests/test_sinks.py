@@ -0,0 +1,101 @@
+from __future__ import unicode_literals, absolute_import
+# Output sinks of the parser.
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+from gbparse.sinks import Sink, JsonLinesSink, JsonDirSink, ParquetSink, \
+    SQLiteSink, sink_for
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+from records import RECORDS
+
+
+class SinkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_abstract(self):
+        class Incomplete(Sink):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+        with self.assertRaises(TypeError):
+            Sink()
+
+    def test_json_lines(self):
+        path = os.path.join(self.directory, 'genomes.jsonl')
+        with JsonLinesSink(path, batch_size=1) as sink:
+            Parser().parse(io.StringIO(RECORDS), save_to=sink)
+            self.assertEqual(sink.written, 2)
+        genomes = Parser().parse(io.StringIO(RECORDS))
+        with io.open(path, encoding='utf-8') as fobj:
+            self.assertEqual(
+                    [json.loads(_line) for _line in fobj],
+                    [json.loads(json.dumps(_g)) for _g in genomes]
+                    )
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        path = os.path.join(self.directory, 'genomes.parquet')
+        genomes = Parser().parse(io.StringIO(RECORDS))
+        with ParquetSink(path, batch_size=1) as sink:
+            Parser().parse(io.StringIO(RECORDS), save_to=sink)
+            self.assertEqual(sink.written, 2)
+        # a row group per batch
+        self.assertEqual(pq.ParquetFile(path).num_row_groups, 2)
+        table = pq.read_table(path).to_pydict()
+        self.assertEqual(table['locus'], ['XX0001', 'XX0002'])
+        self.assertEqual(table['accession'], ['XX0001', 'XX0002'])
+        self.assertEqual(table['version'], ['XX0001.1', 'XX0002.3'])
+        self.assertEqual(
+                table['definition'],
+                [_g['definition'] for _g in genomes]
+                )
+        self.assertEqual(
+                [json.loads(_g) for _g in table['genome']],
+                [json.loads(json.dumps(_g)) for _g in genomes]
+                )
+        # written by path, lazily parsed genomes are complete
+        Parser().parse(io.StringIO(RECORDS), save_to=path, lazy=True)
+        self.assertEqual(pq.read_table(path).to_pydict(), table)
+
+    def test_sink_for(self):
+        for name, sink_class in (('genomes.jsonl', JsonLinesSink),
+                                 ('genomes.jsonl.gz', JsonLinesSink),
+                                 ('genomes.db', SQLiteSink),
+                                 ('genomes.sqlite', SQLiteSink),
+                                 ('genomes', JsonDirSink)):
+            sink = sink_for(os.path.join(self.directory, name))
+            self.assertIsInstance(sink, sink_class)
+            sink.close()
+        self.assertIsNone(sink_for(None))
+        with self.assertRaises(ValueError):
+            sink_for(os.path.join(self.directory, 'genomes.parquet'), True)
+
+    def test_sink_for_folder(self):
+        # folders get a JsonDirSink whatever their extension
+        for name in ('genomes.db', 'genomes.parquet', 'genomes.jsonl'):
+            path = os.path.join(self.directory, name)
+            os.mkdir(path)
+            self.assertIsInstance(sink_for(path), JsonDirSink)
+            Parser().parse(io.StringIO(RECORDS), save_to=path)
+            self.assertEqual(
+                    sorted(os.listdir(path)), ['XX0001.json', 'XX0002.json']
+                    )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+from __future__ import unicode_literals, absolute_import
+# Parsing with Parser.stats gives the genomes of a plain parse and counts the
+# records and the content parser calls.
+import io
+import os
+import json
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+from gbparse.stats import ParseStats, SectionStats
+
+from records import RECORD_A, RECORD_B, write
+
+TEXT = (RECORD_A + RECORD_B) * 4 + RECORD_A
+
+
+def _counts(stats):
+    """
+    :return: the counters of the sections of a ParseStats (without timings).
+    """
+    return dict(
+            (_k, (_s.calls, _s.lines, _s.bytes))
+            for _k, _s in stats.sections.items()
+            )
+
+
+class ParseStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.expected = Parser().parse(io.StringIO(TEXT))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def parser(self, **kwargs):
+        parser = Parser()
+        parser.stats = ParseStats(**kwargs)
+        return parser
+
+    def test_genomes(self):
+        path = write(os.path.join(self.folder, 'records.gb'), TEXT)
+        parser = self.parser()
+        self.assertEqual(parser.parse(io.StringIO(TEXT)), self.expected)
+        self.assertEqual(parser.parse_path(path), self.expected)
+        self.assertEqual(
+                list(parser.iter_parse(io.StringIO(TEXT), lazy=True)),
+                self.expected
+                )
+        self.assertEqual(parser.stats.records, 3 * len(self.expected))
+
+    def test_counters(self):
+        parser = self.parser()
+        parser.parse(io.StringIO(TEXT))
+        stats = parser.stats
+        self.assertEqual(stats.records, 9)
+        self.assertEqual(stats.sections[('locus', None)].calls, 9)
+        # RECORD_A has two genes, a CDS and a tRNA, RECORD_B a gene and a CDS
+        self.assertEqual(stats.sections[('features', 'gene')].calls, 14)
+        self.assertEqual(stats.sections[('features', 'cds')].calls, 9)
+        self.assertEqual(stats.sections[('features', 'trna')].calls, 5)
+        self.assertEqual(
+                stats.sections[('source', 'organism')].lines, 5 * 3 + 4 * 2
+                )
+        self.assertEqual(
+                stats.sections[('comment', None)].bytes,
+                5 * len('Made up record.')
+                )
+        self.assertTrue(stats.seconds > 0)
+        self.assertTrue(all(_s.seconds >= 0 for _s in stats.sections.values()))
+        self.assertTrue(0 < stats.parser_seconds <= stats.seconds)
+        self.assertAlmostEqual(
+                stats.parser_seconds + stats.scanner_seconds, stats.seconds
+                )
+        summary = json.loads(json.dumps(stats.summary()))
+        self.assertEqual(summary['records'], 9)
+        self.assertEqual(summary['sections']['features.cds']['calls'], 9)
+        self.assertIn('features.cds', stats.report())
+        stats.reset()
+        self.assertEqual((stats.records, stats.seconds, stats.sections),
+                         (0, 0., {}))
+
+    def test_hooks(self):
+        events = []
+        parser = self.parser(
+                on_record_start=lambda: events.append('start'),
+                on_record_end=lambda genome, seconds: events.append(
+                    (genome['locus'][None], seconds >= 0)
+                    ),
+                on_section=lambda section, subsection, seconds, lines, n_bytes:
+                events.append(section) if section == 'locus' else None
+                )
+        parser.parse(io.StringIO(RECORD_A + RECORD_B))
+        self.assertEqual(events, [
+            'start', 'locus', ('XX0001', True),
+            'start', 'locus', ('XX0002', True),
+            ])
+
+    def test_parallel(self):
+        path = write(os.path.join(self.folder, 'records.gb'), TEXT)
+        serial = self.parser()
+        self.assertEqual(serial.parse_path(path), self.expected)
+        parallel = self.parser()
+        self.assertEqual(
+                parallel.parse_parallel(path, workers=2, batch_bytes=4096),
+                self.expected
+                )
+        self.assertEqual(parallel.stats.records, serial.stats.records)
+        self.assertEqual(_counts(parallel.stats), _counts(serial.stats))
+        self.assertTrue(parallel.stats.seconds > 0)
+
+    def test_section_stats(self):
+        stats = SectionStats()
+        stats.calls, stats.seconds, stats.lines, stats.bytes = 1, 0.5, 2, 10
+        merged = SectionStats().merge(stats).merge(stats)
+        self.assertEqual(
+                merged.to_dict(),
+                {'calls': 2, 'seconds': 1., 'lines': 4, 'bytes': 20}
+                )
+        self.assertEqual(
+                pickle.loads(pickle.dumps(merged)).to_dict(), merged.to_dict()
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
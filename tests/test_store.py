@@ -0,0 +1,114 @@
+from __future__ import unicode_literals, absolute_import
+# Lineage and queries of the GenomeStore.
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+from gbparse.store import GenomeStore
+from gbparse.content_parsers import default_parsers as dp
+
+from records import RECORDS, RECORD_A, write
+
+# RECORD_A without its source feature, its ORGANISM entry is thus kept
+NO_SOURCE_FEATURE = RECORD_A.replace(
+        '     source          1..120\n'
+        '                     /organism="Completely made up"\n'
+        '                     /mol_type="genomic DNA"\n',
+        ''
+        )
+
+
+class GenomeStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parser = Parser()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def store(self, text):
+        store = GenomeStore(os.path.join(self.directory, 'genomes.db'))
+        self.parser.parse(io.StringIO(text), save_to=store)
+        return store
+
+    def test_no_lineage_by_default(self):
+        genome = self.parser.parse(io.StringIO(RECORD_A))[0]
+        self.assertNotIn('lineage', genome['content'])
+        self.assertEqual(genome['content']['organism'], 'completely made up')
+
+    def test_lineage_parser(self):
+        self.parser.content_parser['source']['organism'] = \
+            dp.source_organism_lineage
+        genome = self.parser.parse(io.StringIO(RECORD_A))[0]
+        self.assertEqual(
+                genome['content']['lineage'],
+                [
+                    'bacteria', 'proteobacteria', 'gammaproteobacteria',
+                    'enterobacterales',
+                    ]
+                )
+        store = self.store(RECORDS)
+        self.assertEqual(
+                [_r['key'] for _r in store.records(taxon='Enterobacterales')],
+                ['XX0001.1']
+                )
+        self.assertEqual(len(store.records(taxon='bacteria')), 2)
+
+    def test_lineage_from_organism(self):
+        store = self.store(NO_SOURCE_FEATURE)
+        self.assertEqual(len(store.records(taxon='proteobacteria')), 1)
+        store = self.store(RECORD_A)
+        self.assertEqual(store.records(taxon='proteobacteria'), [])
+
+    def test_ingest(self):
+        path = write(os.path.join(self.directory, 'records.gb'))
+        store = GenomeStore(os.path.join(self.directory, 'genomes.db'))
+        store.ingest(path, parser=self.parser)
+        self.assertEqual(
+                [_r['key'] for _r in store.records(taxon='Enterobacterales')],
+                ['XX0001.1']
+                )
+        self.assertEqual(len(store.records(taxon='bacteria')), 2)
+        # the parser of the caller is kept, and not changed
+        self.assertEqual(
+                store.genome('XX0001.1')['content']['organism'],
+                'completely made up'
+                )
+        self.assertIs(
+                self.parser.content_parser['source']['organism'],
+                dp.source_organism
+                )
+        self.assertNotIn(
+                'lineage', self.parser.parse_path(path)[0]['content']
+                )
+
+    def test_ingest_custom_parser(self):
+        def organism(content_lines, genome_content):
+            genome_content['content']['organism'] = content_lines[0].upper()
+
+        self.parser.content_parser['source']['organism'] = organism
+        ingest_parser = GenomeStore(
+                os.path.join(self.directory, 'genomes.db')
+                ).ingest_parser(self.parser)
+        genome = ingest_parser.parse(io.StringIO(NO_SOURCE_FEATURE))[0]
+        self.assertEqual(
+                genome['content']['organism'], 'COMPLETELY MADE UP'
+                )
+        self.assertEqual(genome['content']['lineage'][-1], 'enterobacterales')
+        genome = ingest_parser.parse(io.StringIO(RECORD_A), lazy=True)[0]
+        self.assertEqual(genome['content']['lineage'][0], 'bacteria')
+
+    def test_features(self):
+        store = self.store(RECORDS)
+        table = store.features(type='cds')
+        self.assertEqual(table.record.to_list(), ['XX0001.1', 'XX0002.3'])
+        table = store.features(record='XX0001.1', start=65, end=80)
+        # genes are stored together with their CDS or RNA
+        self.assertEqual(table.type.to_list(), ['rna'])
+
+
+if __name__ == '__main__':
+    unittest.main()
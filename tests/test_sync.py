@@ -0,0 +1,100 @@
+from __future__ import unicode_literals, absolute_import
+# Incremental update of a store with update files and deletion lists.
+import io
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from gbparse import Parser
+from gbparse.sinks import SQLiteSink
+from gbparse.store import GenomeStore
+
+from records import RECORD_A, RECORD_B, RECORDS, write, write_gzip
+
+# a new version of XX0001
+UPDATED_A = RECORD_A.replace('XX0001.1', 'XX0001.2').replace(
+        'DEFINITION  Completely made up', 'DEFINITION  Updated'
+        )
+# an older version of XX0002
+OLDER_B = RECORD_B.replace('XX0002.3', 'XX0002.2')
+# a new accession
+NEW = RECORD_B.replace('XX0002', 'XX0004').replace('XX0004.3', 'XX0004.1')
+
+
+class SyncTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def check(self, store, genomes):
+        """
+        Sync a store holding the genomes of RECORDS.
+
+        :param genomes: callable returning the definition of each stored
+            genome by its version.
+        """
+        parser = Parser()
+        parser.parse(io.StringIO(RECORDS), save_to=store)
+        update = write_gzip(
+                self.path('update.flat.gz'),
+                UPDATED_A + OLDER_B + RECORD_B + NEW
+                )
+        report = parser.sync(store, update_files=[update])
+        self.assertEqual(report.added, ['XX0004.1'])
+        self.assertEqual(report.updated, [('XX0001.1', 'XX0001.2')])
+        self.assertEqual(report.deleted, [])
+        self.assertEqual(report.unchanged, 2)
+        self.assertEqual(store.versions(),
+                         {'XX0001': 2, 'XX0002': 3, 'XX0004': 1})
+        self.assertEqual(genomes(), {
+            'XX0001.2': 'Updated XX0001.',
+            'XX0002.3': 'Completely made up XX0002.',
+            'XX0004.1': 'Completely made up XX0004.',
+            })
+        # listing an older version keeps the stored genome, updates and
+        # deletions are applied in one sync
+        deletions = write(
+                self.path('gbdel.txt'),
+                '# deleted accessions\nXX0001.1\n\nXX0004.1 some reason\n'
+                )
+        newer_a = UPDATED_A.replace('XX0001.2', 'XX0001.5')
+        report = parser.sync(
+                store, update_files=[write(self.path('update.flat'), newer_a)],
+                deletions=[deletions]
+                )
+        self.assertEqual(report.updated, [('XX0001.2', 'XX0001.5')])
+        self.assertEqual(report.deleted, ['XX0004'])
+        self.assertEqual(store.versions(), {'XX0001': 5, 'XX0002': 3})
+        self.assertEqual(sorted(genomes()), ['XX0001.5', 'XX0002.3'])
+        # without version, all versions are deleted
+        report = parser.sync(
+                store, deletions=[write(self.path('gbdel.txt'), 'XX0001\n')]
+                )
+        self.assertEqual(report.deleted, ['XX0001'])
+        self.assertEqual(sorted(genomes()), ['XX0002.3'])
+
+    def test_sqlite_sink(self):
+        with SQLiteSink(self.path('genomes.sqlite')) as store:
+            self.check(store, lambda: dict(
+                (_k, json.loads(_g)['definition'])
+                for _k, _g in store._db.execute(
+                    'SELECT key, genome FROM genomes'
+                    )
+                ))
+
+    def test_genome_store(self):
+        with GenomeStore(self.path('genomes.db')) as store:
+            self.check(store, lambda: dict(
+                (_k, store.genome(_k)['definition']) for _k in store.keys()
+                ))
+
+
+if __name__ == '__main__':
+    unittest.main()
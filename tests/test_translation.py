@@ -0,0 +1,166 @@
+from __future__ import unicode_literals, absolute_import
+# Extraction and translation of the CDS of a genome.
+import io
+import random
+import unittest
+
+from gbparse import Parser
+from gbparse import translation
+from gbparse.translation import ExtractionException, check_translations, \
+    extract, reverse_complement, translate, translate_features, \
+    translate_genome
+
+from records import RECORD_A
+
+
+class ExtractTest(unittest.TestCase):
+    def test_extract(self):
+        sequence = 'aaacccgggt'
+        self.assertEqual(extract(sequence, '4..6'), b'ccc')
+        self.assertEqual(extract(sequence, 'complement(1..3)'), b'ttt')
+        self.assertEqual(extract(sequence, 'join(1..3,7..9)'), b'aaaggg')
+        # the parts in the order they are transcribed
+        self.assertEqual(
+                extract(sequence, 'complement(join(1..3,7..9))'), b'cccttt'
+                )
+        self.assertEqual(reverse_complement(b'acgtRYn'), b'nRYacgt')
+        for location in ('8..11', 'join(1..3,J00194.1:1..3)'):
+            with self.assertRaises(ExtractionException):
+                extract(sequence, location)
+
+
+class TranslateTest(unittest.TestCase):
+    def proteins(self, sequence, *features, **kwargs):
+        """
+        :return: the proteins translated with and without numpy, which must
+            be the same.
+        """
+        features = [
+                _f if isinstance(_f, dict) else {'bp_range': _f}
+                for _f in features
+                ]
+        proteins = translate_features(
+                sequence, features, vectorized=False, **kwargs
+                )
+        if translation.np is not None:
+            self.assertEqual(
+                    translate_features(sequence, features, **kwargs), proteins
+                    )
+        return proteins
+
+    def test_translate(self):
+        self.assertEqual(translate('atgaaatag'), 'MK*')
+        self.assertEqual(translate(b'ATGAAATAGC'), 'MK*')
+        self.assertEqual(translate('atgtga', table=4), 'MW')
+
+    def test_start_and_stop(self):
+        # an alternative start codon is translated as M unless the 5' end is
+        # partial, the final stop codon is dropped
+        sequence = 'gtgaaataa'
+        self.assertEqual(
+                self.proteins(sequence, '1..9', '<1..9', '1..>9', table=11),
+                ['MK', 'VK', 'MK']
+                )
+        self.assertEqual(
+                self.proteins(
+                    reverse_complement(b'gtgaaataa') + b'c',
+                    'complement(1..9)', 'complement(1..>9)', table=11
+                    ),
+                ['MK', 'VK']
+                )
+        # not a start codon of the standard code
+        self.assertEqual(self.proteins(sequence, '1..9'), ['VK'])
+
+    def test_codon_start(self):
+        self.assertEqual(
+                self.proteins(
+                    'cgtgaaataa',
+                    {'bp_range': '1..10', 'codon_start': '2'},
+                    table=11
+                    ),
+                ['VK']
+                )
+
+    def test_transl_table_and_except(self):
+        sequence = 'atgtgataa'
+        self.assertEqual(
+                self.proteins(
+                    sequence, '1..9',
+                    {'bp_range': '1..9', 'transl_table': '4'},
+                    {'bp_range': '1..9', 'transl_except': '(pos:4..6,aa:Sec)'},
+                    ),
+                ['M*', 'MW', 'MU']
+                )
+
+    def test_ambiguous(self):
+        # ytg stands for ttg and ctg, both leucine
+        self.assertEqual(
+                self.proteins('atgytgnnntaa', '1..12'), ['MLX']
+                )
+
+    def test_invalid(self):
+        self.assertEqual(
+                self.proteins('atgaaataa', '1..9', '5..20', 'nowhere', {}),
+                ['MK', None, None, None]
+                )
+
+    def test_random(self):
+        rng = random.Random(1)
+        sequence = ''.join(rng.choice('acgt') for _ in range(3000))
+        sequence = sequence[:100] + 'ry' + sequence[102:]
+        features = []
+        for _ in range(300):
+            start = rng.randint(1, 2900)
+            end = min(3000, start + rng.randint(0, 90))
+            location = '{0}..{1}'.format(start, end)
+            if rng.random() < 0.2:
+                location = 'join({0},{1}..{2})'.format(
+                        location, end + 5, min(3000, end + 40)
+                        )
+            if rng.random() < 0.5:
+                location = 'complement({0})'.format(location)
+            features.append({
+                'bp_range': location,
+                'codon_start': rng.choice('123'),
+                })
+        proteins = self.proteins(sequence, *features, table=11)
+        for feature, protein in zip(features, proteins):
+            nucleotides = extract(sequence, feature['bp_range'])[
+                    int(feature['codon_start']) - 1:
+                    ]
+            expected = translate(nucleotides, 11)
+            if expected.endswith('*'):
+                expected = expected[:-1]
+            if feature['codon_start'] == '1' and \
+                    nucleotides[:3] in (b'gtg', b'ttg', b'ctg', b'att',
+                                        b'atc', b'ata'):
+                expected = 'M' + expected[1:]
+            self.assertEqual(protein, expected)
+
+    def test_genome(self):
+        genome = Parser().parse(io.StringIO(RECORD_A))[0]
+        cds = genome['content']['genes'][0]
+        # the CDS of the record runs beyond its stop codon
+        translations = translate_genome(genome, table=11)
+        self.assertEqual(
+                [_t.protein for _t in translations],
+                ['MKKLLLAAAAAAAAAAAQ*S']
+                )
+        self.assertEqual(
+                check_translations(genome, table=11)[0].feature, cds
+                )
+        cds['bp_range'] = '1..57'
+        cds['translation'] = 'mkklllaaaaaaaaaaaq'
+        translations = translate_genome(genome, table=11)
+        self.assertEqual(len(translations), 1)
+        self.assertEqual(translations[0].protein, 'MKKLLLAAAAAAAAAAAQ')
+        self.assertEqual(translations[0].expected, 'MKKLLLAAAAAAAAAAAQ')
+        self.assertTrue(translations[0].matches)
+        self.assertEqual(check_translations(genome, table=11), [])
+        del genome['content']['sequence']
+        with self.assertRaises(ExtractionException):
+            translate_genome(genome)
+
+
+if __name__ == '__main__':
+    unittest.main()